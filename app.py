@@ -1,22 +1,197 @@
+import functools
+import os
 import streamlit as st
-import numpy as np
-import pandas as pd
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from scipy.stats import norm, t as t_dist
 from io import BytesIO
 
-# Configuración de estilo
-plt.style.use('ggplot')
-plt.rcParams['figure.figsize'] = (10, 6)
+from muestreo import cache_disco, tiempos
 
-def exportar_excel(df):
-    """Exporta DataFrame a Excel"""
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Resultados')
-    return output.getvalue()
+# numpy, pandas, scipy y matplotlib se importan dentro de cada módulo de la
+# app: la página de ayuda no los necesita y el arranque en frío es más rápido.
+
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def exportar_excel(hojas, clave=None):
+    """
+    Informe Excel de una tabla o de varias hojas (nombre → DataFrame, diccionario
+    de parámetros o función). Se genera por bloques solo al hacer clic en descargar;
+    con ``clave`` (los parámetros que lo determinan) se reutiliza desde la caché en disco.
+    """
+    from muestreo import exportacion
+    return exportacion.diferido_excel(hojas if isinstance(hojas, dict) else {'Resultados': hojas}, clave=clave)
+
+def fragmento(funcion):
+    """
+    ``st.fragment`` medido: si cambia un widget propio del fragmento solo se
+    vuelve a ejecutar esa sección (no toda la página) y su tiempo se registra
+    como una ejecución aparte, «página · sección».
+    """
+    @functools.wraps(funcion)
+    def seccion(*args, **kwargs):
+        ejecucion = tiempos.ejecucion_actual()
+        if ejecucion is not None and ejecucion.segundos is None:
+            return funcion(*args, **kwargs)  # dentro del rerun completo
+        tiempos.iniciar_ejecucion(f"{ejecucion_tiempos.pagina} · {funcion.__name__.strip('_')}")
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            finalizar_ejecucion(en_fragmento=True)
+    return st.fragment(seccion)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+@cache_disco.memoizar('app.curva_efecto_p')
+def curva_efecto_p(z, error, N, puntos=100):
+    """Curva n(p) memoizada por (z, E, N, puntos)"""
+    from muestreo import motor
+    return motor.curva_n_proporcion(z, error, N, puntos)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+@cache_disco.memoizar('app.superficie_sensibilidad')
+def superficie_sensibilidad(superficie, rango_x, rango_y, puntos, **fijos):
+    """Rejilla (x, y, n) memoizada por superficie, rangos, resolución y parámetros fijos"""
+    from muestreo import superficies
+    x = superficies.eje(*rango_x, puntos)
+    y = superficies.eje(*rango_y, puntos)
+    return x, y, superficies.calcular(superficie, x, y, **fijos)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+@cache_disco.memoizar('app.dimensionar_dif_medias')
+def dimensionar_dif_medias(delta, sigma, alpha, potencia, bilateral, usar_t):
+    """n por grupo memoizado: con t la búsqueda entera evalúa la t no central varias veces"""
+    from muestreo import motor
+    if usar_t:
+        return int(motor.n_dif_medias_t(delta, sigma, alpha, potencia, bilateral))
+    return int(motor.n_dif_medias_z(delta, sigma, alpha, potencia, bilateral))
+
+@st.cache_data(max_entries=256, show_spinner=False)
+@cache_disco.memoizar('app.dimensionar_dif_proporciones')
+def dimensionar_dif_proporciones(p1, p2, alpha, potencia, bilateral, metodo):
+    """(n por grupo, potencia alcanzada) memoizados: los métodos exactos tardan décimas de segundo"""
+    from muestreo import proporciones
+    n = int(proporciones.n_dif_proporciones(p1, p2, alpha, potencia, bilateral, metodo))
+    return n, float(proporciones.potencia_dif_proporciones(p1, p2, n, alpha, bilateral, metodo))
+
+@fragmento
+def panel_superficie(superficie, clave, eje_x, eje_y, fijos, punto, titulo, etiqueta_valor="n"):
+    """
+    Expander con el mapa de calor de n sobre dos parámetros y el diseño actual marcado.
+    ``eje_x`` / ``eje_y``: (etiqueta, mínimo, máximo, rango inicial, paso) de cada slider.
+    """
+    from muestreo import figuras
+    with st.expander("🗺️ Superficie de sensibilidad"):
+        st.caption("Tamaño de muestra para todas las combinaciones de dos parámetros, calculado en una sola operación. "
+                   "Una rejilla ya vista se sirve desde la caché.")
+        if not st.toggle("Calcular superficie", key=f"ver_sup_{clave}"):
+            return
+        c1, c2, c3 = st.columns(3)
+        rango_x = c1.slider(eje_x[0], eje_x[1], eje_x[2], eje_x[3], step=eje_x[4], key=f"sup_x_{clave}")
+        rango_y = c2.slider(eje_y[0], eje_y[1], eje_y[2], eje_y[3], step=eje_y[4], key=f"sup_y_{clave}")
+        puntos = c3.select_slider("Resolución (puntos por eje)", [50, 100, 250, 500, 1000], value=250, key=f"sup_res_{clave}")
+        if not (rango_x[0] < rango_x[1] and rango_y[0] < rango_y[1]):
+            st.warning("Elige un rango con mínimo menor que máximo en ambos ejes.")
+            return
+        with tiempos.etapa(f"superficie.{superficie}"):
+            x, y, Z = superficie_sensibilidad(superficie, tuple(rango_x), tuple(rango_y), puntos, **fijos)
+        visible = rango_x[0] <= punto[0] <= rango_x[1] and rango_y[0] <= punto[1] <= rango_y[1]
+        st.image(figuras.grafico_superficie(x, y, Z, punto if visible else None, eje_x[0], eje_y[0], titulo, etiqueta_valor))
+        st.caption(f"{Z.size:,} combinaciones · {etiqueta_valor} entre {int(Z.min()):,} y {int(Z.max()):,}"
+                   + ("" if visible else " · el diseño actual está fuera del rango mostrado"))
+
+@fragmento
+def panel_simulacion(diseno, construir_poblacion, parametros, clave, confianza, columna_grupo=None,
+                     ajustar_parametros=None, valor_nulo=None, bilateral=True, controles=None, tamano_poblacion=None):
+    """Expander de validación Monte Carlo del diseño calculado (población sintética o cargada)"""
+    with st.expander("🧪 Validar el diseño por simulación (Monte Carlo)"):
+        st.caption("Extrae muestras repetidas de una población y compara la cobertura y el error observados con los nominales.")
+        if tamano_poblacion and tamano_poblacion > 10_000_000:
+            st.info("La simulación está disponible para poblaciones de hasta 10 millones de elementos.")
+            return
+        opciones = controles() if controles else {}
+        archivo_pob = None
+        if diseno != "dos_medias":
+            archivo_pob = st.file_uploader("Población propia (CSV, opcional; si no, se genera una sintética)", type=["csv"], key=f"pob_{clave}")
+        c1, c2, c3 = st.columns(3)
+        replicas = c1.select_slider("Réplicas", [1_000, 10_000, 100_000], value=10_000, key=f"rep_{clave}")
+        semilla = c2.number_input("Semilla", min_value=0, value=2024, step=1, key=f"sem_sim_{clave}")
+        procesos = c3.number_input("Procesos", min_value=1, max_value=os.cpu_count() or 1, value=os.cpu_count() or 1, key=f"proc_{clave}")
+
+        if archivo_pob is not None:
+            import pandas as pd
+            df_pob = pd.read_csv(archivo_pob)
+            c4, c5 = st.columns(2)
+            col_valor = c4.selectbox("Columna de la variable", df_pob.select_dtypes("number").columns, key=f"val_{clave}")
+            col_grupo = c5.selectbox(columna_grupo, df_pob.columns, key=f"grp_{clave}") if columna_grupo else None
+
+        if not st.button("Simular", key=f"btn_sim_{clave}"):
+            return
+        from muestreo import simulacion
+        with st.spinner(f"Simulando {replicas:,} muestras..."):
+            if archivo_pob is not None:
+                poblacion = simulacion.preparar_poblacion(diseno, df_pob[col_valor], df_pob[col_grupo] if col_grupo else None)
+                params = ajustar_parametros(poblacion) if ajustar_parametros else parametros
+            else:
+                poblacion = construir_poblacion(int(semilla), **opciones)
+                params = parametros
+            with tiempos.etapa(f"simulacion.{diseno}"):
+                resultado = simulacion.simular(diseno, poblacion, params, replicas, confianza, int(semilla),
+                                               int(procesos), valor_nulo, bilateral)
+
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Cobertura empírica", f"{resultado['cobertura']:.1%}",
+                  f"{(resultado['cobertura'] - confianza) * 100:+.1f} pp vs nominal", delta_color="off")
+        m2.metric("Error empírico (percentil)", f"±{resultado['error_empirico']:.4g}",
+                  f"margen medio ±{resultado['margen_medio']:.4g}", delta_color="off")
+        if resultado['potencia'] is not None:
+            m3.metric("Potencia empírica", f"{resultado['potencia']:.1%}")
+        elif resultado['deff_empirico'] is not None:
+            m3.metric("DEFF empírico", f"{resultado['deff_empirico']:.2f}")
+        st.caption(f"{resultado['replicas']:,} réplicas en {resultado['segundos']:.2f} s con {resultado['procesos']} proceso(s). "
+                   f"Sesgo: {resultado['sesgo']:.4g}; EE empírico {resultado['ee_empirico']:.4g} vs EE estimado {resultado['ee_medio']:.4g}.")
+        if resultado['cobertura'] < confianza - 0.02:
+            st.warning("⚠️ La cobertura está por debajo de la nominal: el diseño o su fórmula de varianza no son adecuados para esta población.")
+
+def mostrar_tiempos(ejecucion):
+    """Panel lateral con las etapas del rerun y lo que queda para widgets y Streamlit"""
+    filas = [
+        {'Etapa': '↳ ' * e['nivel'] + e['etapa'], 'Tipo': e['tipo'], 'ms': round(e['segundos'] * 1000, 2)}
+        for e in ejecucion.etapas if e is not None
+    ]
+    filas.append({'Etapa': 'widgets y Streamlit', 'Tipo': '—',
+                  'ms': round((ejecucion.segundos - ejecucion.total_etapas()) * 1000, 2)})
+    with st.sidebar.expander("⏱️ Tiempos de esta ejecución", expanded=True):
+        st.caption(f"{ejecucion.pagina} · total {ejecucion.segundos * 1000:.1f} ms")
+        st.dataframe(filas, hide_index=True, use_container_width=True)
+        st.caption("Acumulado del proceso (s):")
+        st.dataframe(tiempos.registro.resumen(), hide_index=True, use_container_width=True)
+        cache = cache_disco.cache_disco()
+        if cache is not None:
+            estadisticas = cache.estadisticas()
+            st.caption(f"Caché en disco: {estadisticas['entradas']:,} entradas · {estadisticas['bytes'] / 2**20:.1f} MB · "
+                       f"aciertos {estadisticas['tasa_aciertos']:.0%} en este proceso")
+            st.dataframe(estadisticas['espacios'], hide_index=True, use_container_width=True)
+        from muestreo import tablas
+        tabla = tablas.tabla_proporciones()
+        if tabla is not None:
+            estadisticas = tabla.estadisticas()
+            st.caption(f"Tabla precalculada de proporciones: {estadisticas['aciertos']:,} consultas en la rejilla, "
+                       f"{estadisticas['fallos']:,} calculadas ({estadisticas['tasa_aciertos']:.0%} de aciertos)")
+
+def finalizar_ejecucion(en_fragmento=False):
+    """Cierra la medición del rerun, muestra el panel (con ?depurar=1) y exporta las métricas"""
+    ejecucion = tiempos.ejecucion_actual()
+    if ejecucion is None or ejecucion.segundos is not None:
+        return
+    ejecucion.cerrar()
+    if depurar_tiempos and en_fragmento:
+        # Un fragmento no puede escribir en la barra lateral
+        st.caption(f"⏱️ {ejecucion.pagina} · {ejecucion.segundos * 1000:.1f} ms (solo esta sección)")
+    elif depurar_tiempos:
+        mostrar_tiempos(ejecucion)
+    tiempos.exportar_segun_entorno(ejecucion)
+
+def detener():
+    """st.stop() que antes cierra la medición del rerun"""
+    finalizar_ejecucion()
+    st.stop()
 
 # Configuración de página
 st.set_page_config(page_title="Calculadora de Tamaño de Muestra", layout="wide", page_icon="🔢")
@@ -27,14 +202,20 @@ st.markdown("Herramienta completa para calcular tamaños de muestra en diferente
 # Selección principal
 opcion_principal = st.sidebar.radio(
     "Selecciona el módulo:",
-    ["📊 Por Tipo de Estimación", "🎯 Por Tipo de Muestreo", "❓ Ayuda y Glosario"]
+    ["📊 Por Tipo de Estimación", "🎯 Por Tipo de Muestreo", "📦 Procesamiento por Lotes", "❓ Ayuda y Glosario"],
+    key="modulo_principal"
 )
 
+# Tiempos por etapa de este rerun; el panel se ve con ?depurar=1 o MUESTREO_DEPURAR=1
+ejecucion_tiempos = tiempos.iniciar_ejecucion(opcion_principal)
+depurar_tiempos = os.environ.get('MUESTREO_DEPURAR') == '1' or st.query_params.get('depurar') == '1'
+
 st.sidebar.markdown("---")
 st.sidebar.info("""
 **Módulos disponibles:**
 - **Por Tipo de Estimación:** Media, Proporción, Diferencias
 - **Por Tipo de Muestreo:** Aleatorio, Estratificado, Conglomerados, Sistemático
+- **Procesamiento por Lotes:** Miles de escenarios desde un archivo
 - **Ayuda:** Glosario y conceptos clave
 """)
 
@@ -245,14 +426,22 @@ if opcion_principal == "❓ Ayuda y Glosario":
         st.latex(r"n_h = n \cdot \frac{N_h}{N} = n \cdot W_h")
         st.markdown("**Asignación Óptima (Neyman):**")
         st.latex(r"n_h = n \cdot \frac{N_h \cdot \sigma_h}{\sum_{i=1}^{L} N_i \cdot \sigma_i}")
+        st.markdown("**Asignación Óptima con Costos:**")
+        st.latex(r"n_h = n \cdot \frac{N_h \sigma_h / \sqrt{c_h}}{\sum_{i=1}^{L} N_i \sigma_i / \sqrt{c_i}}")
+        st.markdown("**Tamaño total** (w_h = fracción asignada al estrato h, D = E²/Z²):")
+        st.latex(r"n = \frac{\sum_h N_h^2 \sigma_h^2 / w_h}{N^2 D + \sum_h N_h \sigma_h^2}")
         
         st.markdown("---")
         st.markdown("### 5️⃣ Muestreo por Conglomerados")
-        st.latex(r"DEFF = 1 + (m - 1) \cdot \rho")
-        st.latex(r"n_{conglomerados} = n_{MAS} \cdot DEFF")
+        st.latex(r"DEFF = 1 + \left((1 + CV^2)\,m - 1\right) \cdot \rho")
+        st.latex(r"a = \left\lceil \frac{n_{MAS} \cdot DEFF}{m} \right\rceil")
+        st.latex(r"m_{opt} = \sqrt{\frac{c_1}{c_2} \cdot \frac{1 - \rho}{\rho}}")
+        st.latex(r"\pi_i = a \cdot \frac{M_i}{\sum_j M_j}")
         st.markdown("Donde:")
-        st.markdown("- m: tamaño promedio del conglomerado")
+        st.markdown("- m: elementos observados por conglomerado (todo el conglomerado en una etapa)")
+        st.markdown("- CV: coeficiente de variación del tamaño de los conglomerados")
         st.markdown("- ρ: coeficiente de correlación intraclase")
+        st.markdown("- c₁, c₂: costo por conglomerado y por elemento; π_i: probabilidad de inclusión PPS")
         
         st.markdown("---")
         st.markdown("### 6️⃣ Muestreo Sistemático")
@@ -267,13 +456,14 @@ if opcion_principal == "❓ Ayuda y Glosario":
         st.markdown("---")
         st.markdown("### 8️⃣ Valores Críticos Comunes")
         
-        df_valores = pd.DataFrame({
-            'Confianza': ['90%', '95%', '99%'],
-            'α': [0.10, 0.05, 0.01],
-            'Z_{α/2}': [1.645, 1.960, 2.576],
-            'Uso': ['Exploratorio', 'Estándar', 'Riguroso']
-        })
-        st.dataframe(df_valores, use_container_width=True)
+        # Tabla en markdown para no cargar pandas en la página de ayuda
+        st.markdown("""
+        | Confianza | α | Z_{α/2} | Uso |
+        |-----------|------|---------|--------------|
+        | 90% | 0.10 | 1.645 | Exploratorio |
+        | 95% | 0.05 | 1.960 | Estándar |
+        | 99% | 0.01 | 2.576 | Riguroso |
+        """)
     
     # TAB 3: GUÍA DE USO
     with tab_ejemplos:
@@ -406,6 +596,9 @@ if opcion_principal == "❓ Ayuda y Glosario":
 # MÓDULO 1: POR TIPO DE ESTIMACIÓN
 # ==========================================
 elif opcion_principal == "📊 Por Tipo de Estimación":
+    import numpy as np
+    import pandas as pd
+    from muestreo import motor, tablas
     
     tipo_calculo = st.selectbox(
         "Selecciona el tipo de estimación:",
@@ -416,6 +609,7 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
             "⚖️ Diferencia de Proporciones (2 grupos)"
         ]
     )
+    ejecucion_tiempos.pagina = tipo_calculo
     
     st.markdown("---")
     
@@ -497,16 +691,19 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
         with col2:
             st.subheader("Resultados")
             
-            alpha_mas = 1 - confianza_mas
-            z_mas = norm.ppf(1 - alpha_mas/2)
+            with tiempos.etapa("media.calculo"):
+                z_mas = float(motor.z_critico(confianza_mas))
+                if objetivo_mas == "Media poblacional":
+                    # n₀ = (Z² × σ²) / E²
+                    n0_mas = float(motor.n0_media(z_mas, sigma_mas, error_mas))
+                    # n = n₀ / (1 + (n₀-1)/N)
+                    n_mas = int(motor.redondear_n(motor.ajuste_fpc(n0_mas, N_mas)))
+                else:
+                    # n₀ = (Z² × p × (1-p)) / E²; n de la tabla precalculada si está en la rejilla
+                    n0_mas = float(motor.n0_proporcion(z_mas, p_mas, error_mas))
+                    n_mas = tablas.n_proporcion(p_mas, error_mas, confianza_mas, N_mas)
             
             if objetivo_mas == "Media poblacional":
-                # n₀ = (Z² × σ²) / E²
-                n0_mas = (z_mas ** 2 * sigma_mas ** 2) / (error_mas ** 2)
-                # n = n₀ / (1 + (n₀-1)/N)
-                n_mas = n0_mas / (1 + (n0_mas - 1) / N_mas)
-                n_mas = int(np.ceil(n_mas))
-                
                 st.metric("Tamaño de muestra (n)", f"{n_mas:,}")
                 st.metric("n₀ (sin corrección)", f"{int(n0_mas):,}")
                 
@@ -529,12 +726,6 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
                 """)
                 
             else:  # Proporción
-                # n₀ = (Z² × p × (1-p)) / E²
-                n0_mas = (z_mas ** 2 * p_mas * (1 - p_mas)) / (error_mas ** 2)
-                # n = n₀ / (1 + (n₀-1)/N)
-                n_mas = n0_mas / (1 + (n0_mas - 1) / N_mas)
-                n_mas = int(np.ceil(n_mas))
-                
                 st.metric("Tamaño de muestra (n)", f"{n_mas:,}")
                 st.metric("n₀ (sin corrección)", f"{int(n0_mas):,}")
                 
@@ -553,6 +744,15 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
                 la proporción con un margen de error de ±{error_mas*100:.1f}% y {confianza_mas*100:.0f}% de confianza.
                 """)
         
+        if objetivo_mas == "Media poblacional":
+            panel_superficie("media", "media", ("Error máximo (E)", 0.1, 100.0, (1.0, 10.0), 0.1), ("Confianza", 0.80, 0.999, (0.80, 0.99), 0.001),
+                             {'sigma': sigma_mas, 'N': N_mas}, (error_mas, confianza_mas, n_mas),
+                             f"n para estimar la media (σ = {sigma_mas:g}, N = {N_mas:,})")
+        else:
+            panel_superficie("proporcion", "media_p", ("Margen de error (E)", 0.005, 0.3, (0.01, 0.10), 0.005), ("Confianza", 0.80, 0.999, (0.80, 0.99), 0.001),
+                             {'p': p_mas, 'N': N_mas}, (error_mas, confianza_mas, n_mas),
+                             f"n para estimar la proporción (p = {p_mas:g}, N = {N_mas:,})")
+        
         # Procedimiento
         st.markdown("---")
         st.subheader("📋 Procedimiento de Selección")
@@ -602,7 +802,9 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
         st.download_button(
             "📥 Descargar resultados (Excel)",
             exportar_excel(df_mas),
-            "muestreo_aleatorio_simple.xlsx"
+            "muestreo_aleatorio_simple.xlsx",
+            MIME_EXCEL,
+            on_click="ignore"
         )
     
     # ==========================================
@@ -667,18 +869,17 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
         with col2:
             st.subheader("Resultados")
             
-            # Cálculo
-            alpha_prop = 1 - confianza_prop
-            z_prop = norm.ppf(1 - alpha_prop/2)
-            
-            n_prop = int(np.ceil((z_prop ** 2 * p * (1 - p)) / (error_prop ** 2)))
-            
-            # Corrección por población finita
-            if poblacion_prop > 0 and poblacion_prop < 100000:
-                n_prop_ajustado = int(np.ceil(n_prop / (1 + (n_prop - 1) / poblacion_prop)))
+            # Cálculo, con corrección por población finita para 0 < N < 100,000
+            with tiempos.etapa("proporcion.calculo"):
+                z_prop = float(motor.z_critico(confianza_prop))
+                n_prop = tablas.n_proporcion(p, error_prop, confianza_prop)  # ⌈n₀⌉: columna de N infinita
+                poblacion_finita = 0 < poblacion_prop < 100000
+                if poblacion_finita:
+                    n_prop_ajustado = int(motor.redondear_n(motor.ajuste_fpc(n_prop, poblacion_prop)))
+                else:
+                    n_prop_ajustado = n_prop
+            if poblacion_finita:
                 st.warning(f"⚠️ Población finita detectada (N = {poblacion_prop:,})")
-            else:
-                n_prop_ajustado = n_prop
             
             st.metric("Tamaño de muestra requerido", f"{n_prop_ajustado:,}")
             
@@ -710,28 +911,40 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
         # Gráfico de sensibilidad a p
         st.markdown("---")
         st.subheader("📊 Efecto de p en el Tamaño de Muestra")
+        from muestreo import figuras
+        
+        # La FPC solo se aplica para 0 < N < 100,000 (igual que arriba)
+        N_curva = poblacion_prop if 0 < poblacion_prop < 100000 else 0
+        st.image(figuras.grafico_efecto_p(z_prop, error_prop, N_curva, p, n_prop_ajustado))
+        
+        # Cambiar la resolución solo vuelve a ejecutar este fragmento
+        @fragmento
+        def _exportar_curva_p():
+            with st.expander("📤 Exportar curva n(p)"):
+                puntos_export = st.select_slider(
+                    "Resolución (puntos)",
+                    options=[1000, 10000, 100000, 1000000],
+                    value=10000
+                )
+                
+                def _csv_curva_p():
+                    p_exp, n_exp = curva_efecto_p(z_prop, error_prop, N_curva, puntos_export)
+                    return pd.DataFrame({'p': p_exp, 'n': n_exp}).to_csv(index=False)
+                
+                st.download_button(
+                    "📥 Descargar curva (CSV)",
+                    _csv_curva_p,
+                    "curva_n_proporcion.csv",
+                    "text/csv",
+                    on_click="ignore"
+                )
         
-        p_values = np.linspace(0.01, 0.99, 100)
-        n_values = []
-        
-        for p_val in p_values:
-            n_temp = int(np.ceil((z_prop ** 2 * p_val * (1 - p_val)) / (error_prop ** 2)))
-            if poblacion_prop > 0 and poblacion_prop < 100000:
-                n_temp = int(np.ceil(n_temp / (1 + (n_temp - 1) / poblacion_prop)))
-            n_values.append(n_temp)
-        
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.plot(p_values, n_values, 'b-', linewidth=2)
-        ax.axvline(p, color='r', linestyle='--', label=f'p usado: {p:.2f}')
-        ax.axhline(n_prop_ajustado, color='r', linestyle='--', alpha=0.5)
-        ax.scatter([p], [n_prop_ajustado], color='r', s=100, zorder=5)
-        ax.set_xlabel('Proporción Poblacional (p)', fontsize=12)
-        ax.set_ylabel('Tamaño de Muestra (n)', fontsize=12)
-        ax.set_title('Tamaño de Muestra según Proporción (máximo en p=0.5)', fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        ax.legend()
-        st.pyplot(fig)
-        plt.close()
+        _exportar_curva_p()
+        
+        panel_superficie("proporcion_p", "prop", ("Proporción (p)", 0.01, 0.99, (0.01, 0.99), 0.01),
+                         ("Margen de error (E)", 0.005, 0.3, (0.01, 0.10), 0.005),
+                         {'confianza': confianza_prop, 'N': N_curva}, (p, error_prop, n_prop_ajustado),
+                         f"n para estimar una proporción ({confianza_prop:.0%} de confianza)")
         
         # Exportar
         df_resultados = pd.DataFrame([{
@@ -744,11 +957,17 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
             'Población': poblacion_prop if poblacion_prop > 0 else 'Infinita'
         }])
         
+        def _hoja_curva_p():
+            p_exp, n_exp = curva_efecto_p(z_prop, error_prop, N_curva, 1000)
+            return pd.DataFrame({'p': p_exp, 'n': n_exp})
+        
         st.download_button(
-            "📥 Descargar resultados (Excel)",
-            exportar_excel(df_resultados),
+            "📥 Descargar informe (Excel)",
+            exportar_excel({'Resultados': df_resultados, 'Curva n(p)': _hoja_curva_p},
+                           clave=['proporcion', df_resultados.to_dict('records'), z_prop, error_prop, N_curva]),
             "tamano_muestra_proporcion.xlsx",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            MIME_EXCEL,
+            on_click="ignore"
         )
     
     # ==========================================
@@ -816,34 +1035,13 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
             st.subheader("Resultados")
             
             # Tamaño del efecto
-            d_cohen = delta / sigma_dif
-            
-            # Valores críticos
-            if tipo_prueba == "Bilateral (two-tailed)":
-                z_alpha_dif = norm.ppf(1 - alpha_dif/2)
-            else:
-                z_alpha_dif = norm.ppf(1 - alpha_dif)
-            
+            d_cohen = float(motor.d_cohen(delta, sigma_dif))
+            bilateral_dif = tipo_prueba == "Bilateral (two-tailed)"
             beta_dif = 1 - potencia_dif
-            z_beta_dif = norm.ppf(1 - beta_dif)
             
-            # Cálculo con Z
-            n_por_grupo_z = int(np.ceil(2 * ((z_alpha_dif + z_beta_dif) * sigma_dif / delta) ** 2))
-            
-            # Ajuste con t si se solicita
-            if usar_t_dif:
-                n_iter = n_por_grupo_z
-                for _ in range(50):
-                    gl_dif = 2 * n_iter - 2
-                    t_alpha_dif = t_dist.ppf(1 - alpha_dif/2 if tipo_prueba == "Bilateral (two-tailed)" else 1 - alpha_dif, gl_dif)
-                    t_beta_dif = t_dist.ppf(1 - beta_dif, gl_dif)
-                    n_new = int(np.ceil(2 * ((t_alpha_dif + t_beta_dif) * sigma_dif / delta) ** 2))
-                    if abs(n_new - n_iter) <= 1:
-                        break
-                    n_iter = n_new
-                n_por_grupo = n_new
-            else:
-                n_por_grupo = n_por_grupo_z
+            # Cálculo con Z, con ajuste t si se solicita
+            with tiempos.etapa("dif_medias.calculo"):
+                n_por_grupo = dimensionar_dif_medias(delta, sigma_dif, alpha_dif, potencia_dif, bilateral_dif, usar_t_dif)
             
             # Asegurar mínimo
             n_por_grupo = max(n_por_grupo, 3)
@@ -886,52 +1084,64 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
         # Curva de potencia
         st.markdown("---")
         st.subheader("📊 Curva de Potencia Estadística")
+        from muestreo import figuras
+        
+        # La resolución alimenta la imagen y la hoja de la curva del informe: cambiarla
+        # solo vuelve a ejecutar este fragmento (curva + informe), no toda la página
+        @fragmento
+        def _curva_e_informe_dif():
+            resolucion_curva = st.select_slider(
+                "Resolución de la curva (puntos)",
+                options=[100, 1000, 10000, 100000],
+                value=1000
+            )
+            
+            # Potencia exacta (t no central) si se eligió t-Student; ambas colas si es bilateral.
+            # La imagen se reutiliza entre sesiones mientras los parámetros no cambien
+            st.image(figuras.grafico_curva_potencia(
+                delta, sigma_dif, n_por_grupo, alpha_dif, bilateral_dif,
+                't' if usar_t_dif else 'normal', potencia_dif, resolucion_curva
+            ))
+            
+            df_resultados = pd.DataFrame([{
+                'Tipo': 'Diferencia de Medias',
+                'Δ': delta,
+                'σ': sigma_dif,
+                'd Cohen': f"{d_cohen:.3f}",
+                'α': alpha_dif,
+                'Potencia': f"{potencia_dif:.0%}",
+                'n por grupo': n_por_grupo,
+                'n total': n_total,
+                'Tipo prueba': tipo_prueba
+            }])
+            
+            def _hoja_potencia():
+                from muestreo.potencia import curva_potencia
+                deltas, potencias = curva_potencia(delta * 0.3, delta * 2, sigma_dif, n_por_grupo, alpha_dif,
+                                                   bilateral_dif, 't' if usar_t_dif else 'normal', resolucion_curva)
+                return pd.DataFrame({'Δ': deltas, 'Potencia': potencias})
+            
+            st.download_button(
+                "📥 Descargar informe (Excel)",
+                exportar_excel({'Resultados': df_resultados, 'Curva de potencia': _hoja_potencia},
+                               clave=['dif_medias', df_resultados.to_dict('records'), potencia_dif, usar_t_dif, resolucion_curva]),
+                "tamano_muestra_dif_medias.xlsx",
+                MIME_EXCEL,
+                on_click="ignore"
+            )
         
-        deltas_range = np.linspace(delta * 0.3, delta * 2, 100)
-        potencias = []
-        
-        for d_temp in deltas_range:
-            d_cohen_temp = d_temp / sigma_dif
-            ncp = d_cohen_temp * np.sqrt(n_por_grupo / 2)
-            if tipo_prueba == "Bilateral (two-tailed)":
-                critico = norm.ppf(1 - alpha_dif/2)
-            else:
-                critico = norm.ppf(1 - alpha_dif)
-            pot_temp = 1 - norm.cdf(critico - ncp)
-            potencias.append(pot_temp)
-        
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.plot(deltas_range, potencias, 'b-', linewidth=2)
-        ax.axvline(delta, color='r', linestyle='--', label=f'Δ especificada: {delta}')
-        ax.axhline(potencia_dif, color='g', linestyle='--', alpha=0.5, label=f'Potencia: {potencia_dif:.0%}')
-        ax.scatter([delta], [potencia_dif], color='r', s=100, zorder=5)
-        ax.set_xlabel('Diferencia entre Medias (Δ)', fontsize=12)
-        ax.set_ylabel('Potencia Estadística (1-β)', fontsize=12)
-        ax.set_title('Curva de Potencia', fontsize=14, fontweight='bold')
-        ax.grid(True, alpha=0.3)
-        ax.legend()
-        ax.set_ylim([0, 1])
-        st.pyplot(fig)
-        plt.close()
+        _curva_e_informe_dif()
         
-        # Exportar
-        df_resultados = pd.DataFrame([{
-            'Tipo': 'Diferencia de Medias',
-            'Δ': delta,
-            'σ': sigma_dif,
-            'd Cohen': f"{d_cohen:.3f}",
-            'α': alpha_dif,
-            'Potencia': f"{potencia_dif:.0%}",
-            'n por grupo': n_por_grupo,
-            'n total': n_total,
-            'Tipo prueba': tipo_prueba
-        }])
+        # n por grupo para cada Δ y potencia; con t, la corrección de Guenther aproxima el n exacto
+        panel_superficie("dif_medias", "dif", ("Diferencia a detectar (Δ)", 0.1, 100.0, (1.0, 20.0), 0.1),
+                         ("Potencia (1-β)", 0.50, 0.99, (0.60, 0.99), 0.01),
+                         {'sigma': sigma_dif, 'alpha': alpha_dif, 'bilateral': bilateral_dif, 'metodo': 't' if usar_t_dif else 'normal'},
+                         (delta, potencia_dif, n_por_grupo), f"n por grupo (σ = {sigma_dif:g}, α = {alpha_dif:g})")
         
-        st.download_button(
-            "📥 Descargar resultados (Excel)",
-            exportar_excel(df_resultados),
-            "tamano_muestra_dif_medias.xlsx",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        # Potencia y cobertura observadas con grupos normales simulados
+        panel_simulacion(
+            "dos_medias", lambda semilla: {}, {'delta': delta, 'sigma': sigma_dif, 'n': n_por_grupo},
+            "dif_medias", 1 - alpha_dif, bilateral=bilateral_dif
         )
     
     # ==========================================
@@ -943,9 +1153,14 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
         st.info("""
         **Objetivo:** Detectar una diferencia entre dos proporciones poblacionales.
         
-        **Fórmula:** n = [Z_{α/2}√(2p̄(1-p̄)) + Z_{β}√(p₁(1-p₁) + p₂(1-p₂))]² / (p₁ - p₂)²
+        **Fórmula (normal):** n = [Z_{α/2}√(2p̄(1-p̄)) + Z_{β}√(p₁(1-p₁) + p₂(1-p₂))]² / (p₁ - p₂)²
+        
+        Con proporciones pequeñas o muestras chicas conviene la corrección de Fleiss o una prueba exacta
+        (Fisher o Barnard), cuya potencia se calcula enumerando todos los resultados posibles.
         """)
         
+        from muestreo import proporciones
+        
         col1, col2 = st.columns([1, 1])
         
         with col1:
@@ -973,23 +1188,41 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
                 options=[0.70, 0.75, 0.80, 0.85, 0.90, 0.95],
                 value=0.80
             )
+            
+            tipo_prueba_prop2 = st.radio(
+                "Tipo de prueba",
+                ["Bilateral (two-tailed)", "Unilateral (one-tailed)"],
+                help="La unilateral contrasta en la dirección de p₁ - p₂"
+            )
+            
+            metodo_prop2 = st.selectbox(
+                "Método",
+                proporciones.METODOS_PROPORCIONES,
+                format_func=proporciones.NOMBRES_METODOS.get,
+                help="Fleiss agrega la corrección por continuidad; Fisher y Barnard usan la potencia exacta"
+            )
         
         with col2:
             st.subheader("Resultados")
             
+            if p1 == p2:
+                st.warning("⚠️ Las proporciones deben ser distintas")
+                detener()
+            
             # Diferencia
             dif_prop = abs(p1 - p2)
             p_promedio = (p1 + p2) / 2
-            
-            # Valores críticos
-            z_alpha_prop2 = norm.ppf(1 - alpha_prop2/2)
-            beta_prop2 = 1 - potencia_prop2
-            z_beta_prop2 = norm.ppf(1 - beta_prop2)
+            bilateral_prop2 = tipo_prueba_prop2 == "Bilateral (two-tailed)"
             
             # Cálculo
-            numerador = (z_alpha_prop2 * np.sqrt(2 * p_promedio * (1 - p_promedio)) + 
-                        z_beta_prop2 * np.sqrt(p1*(1-p1) + p2*(1-p2)))
-            n_por_grupo = int(np.ceil((numerador / dif_prop) ** 2))
+            try:
+                with tiempos.etapa("dif_proporciones.calculo"):
+                    n_por_grupo, potencia_real = dimensionar_dif_proporciones(
+                        p1, p2, alpha_prop2, potencia_prop2, bilateral_prop2, metodo_prop2
+                    )
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                detener()
             n_total = 2 * n_por_grupo
             
             st.metric("Tamaño por grupo", f"{n_por_grupo:,}")
@@ -1000,30 +1233,141 @@ elif opcion_principal == "📊 Por Tipo de Estimación":
                 st.metric("Diferencia", f"{dif_prop:.2%}")
                 st.metric("α", f"{alpha_prop2:.2%}")
             with col_b:
-                st.metric("Potencia", f"{potencia_prop2:.0%}")
+                st.metric("Potencia alcanzada", f"{potencia_real:.1%}")
                 st.metric("p promedio", f"{p_promedio:.2%}")
             
             st.success(f"""
             ✅ **Interpretación:**
             
             Necesitas **{n_por_grupo:,} sujetos por grupo** para detectar 
-            una diferencia de {dif_prop*100:.1f} puntos porcentuales con {potencia_prop2*100:.0f}% de potencia.
+            una diferencia de {dif_prop*100:.1f} puntos porcentuales con {potencia_prop2*100:.0f}% de potencia
+            ({proporciones.NOMBRES_METODOS[metodo_prop2].lower()}).
             """)
+            
+            if metodo_prop2 in proporciones.METODOS_EXACTOS:
+                st.info("📌 La potencia exacta oscila con n (dientes de sierra): se informa el primer n "
+                        "encontrado que alcanza la potencia objetivo")
+        
+        # Curva de potencia
+        st.markdown("---")
+        st.subheader("📊 Curva de Potencia Estadística")
+        from muestreo import figuras
+        
+        st.image(figuras.grafico_potencia_proporciones(
+            p1, p2, n_por_grupo, alpha_prop2, bilateral_prop2, metodo_prop2, potencia_prop2
+        ))
+        
+        # Exportar
+        df_resultados = pd.DataFrame([{
+            'Tipo': 'Diferencia de Proporciones',
+            'p₁': p1,
+            'p₂': p2,
+            'α': alpha_prop2,
+            'Potencia': f"{potencia_prop2:.0%}",
+            'Potencia alcanzada': round(potencia_real, 4),
+            'Método': proporciones.NOMBRES_METODOS[metodo_prop2],
+            'n por grupo': n_por_grupo,
+            'n total': n_total,
+            'Tipo prueba': tipo_prueba_prop2
+        }])
+        
+        def _hoja_potencia_prop():
+            ns, potencias = proporciones.curva_potencia_n(p1, p2, 2, max(2 * n_por_grupo, 10), alpha_prop2,
+                                                          bilateral_prop2, metodo_prop2)
+            return pd.DataFrame({'n por grupo': ns, 'Potencia': potencias})
+        
+        st.download_button(
+            "📥 Descargar informe (Excel)",
+            exportar_excel({'Resultados': df_resultados, 'Curva de potencia': _hoja_potencia_prop},
+                           clave=['dif_proporciones', df_resultados.to_dict('records'), potencia_prop2]),
+            "tamano_muestra_dif_proporciones.xlsx",
+            MIME_EXCEL,
+            on_click="ignore"
+        )
+
+# ==========================================
+# MÓDULO 3: PROCESAMIENTO POR LOTES
+# ==========================================
+elif opcion_principal == "📦 Procesamiento por Lotes":
+    from muestreo import lotes
+    
+    st.header("📦 Procesamiento por Lotes")
+    
+    st.info("""
+    **Objetivo:** Calcular el tamaño de muestra de muchos escenarios a la vez (región × indicador × confianza × margen).
+    
+    **Columnas del archivo:**
+    - `objetivo`: media o proporcion (opcional, se deduce de sigma / p)
+    - `sigma`: desviación estándar (para medias)
+    - `p`: proporción esperada (para proporciones)
+    - `error`: error máximo E
+    - `confianza`: 0.90, 0.95, 0.99 (o 90, 95, 99)
+    - `N`: tamaño de población (0 o vacío = infinita)
+    """)
+    
+    archivo_lote = st.file_uploader(
+        "Tabla de escenarios",
+        type=["csv", "parquet", "xlsx"],
+        help="Una fila por escenario"
+    )
+    
+    if archivo_lote is not None:
+        try:
+            with tiempos.etapa("lotes.lectura", "datos"):
+                df_lote = lotes.leer_parametros(archivo_lote)
+        except Exception as e:
+            st.error(f"No se pudo leer el archivo: {e}")
+            detener()
+        
+        with tiempos.etapa("lotes.calculo"):
+            df_res_lote = lotes.calcular_lote(df_lote)
+        invalidos = int((~df_res_lote['valido']).sum())
+        
+        col_a, col_b, col_c = st.columns(3)
+        col_a.metric("Escenarios", f"{len(df_res_lote):,}")
+        col_b.metric("Inválidos", f"{invalidos:,}")
+        col_c.metric("n máximo", f"{int(df_res_lote['n'].max()):,}" if invalidos < len(df_res_lote) else "—")
+        
+        if invalidos > 0:
+            st.warning(f"⚠️ {invalidos:,} filas tienen parámetros inválidos (σ ≤ 0, p fuera de (0,1), E ≤ 0 o confianza fuera de rango)")
+        
+        st.dataframe(df_res_lote.head(100), use_container_width=True)
+        
+        # Cambiar el formato no vuelve a leer ni a calcular el lote: solo se ejecuta este fragmento
+        @fragmento
+        def _descargar_lote():
+            formato_lote = st.radio("Formato de descarga", ["csv", "parquet", "xlsx"], horizontal=True)
+            from muestreo import exportacion
+            # El archivo se escribe por bloques solo al hacer clic
+            st.download_button(
+                "📥 Descargar resultados",
+                exportacion.diferido(df_res_lote, formato_lote),
+                f"tamanos_muestra_lote.{formato_lote}",
+                exportacion.MIME[formato_lote],
+                on_click="ignore"
+            )
+        
+        _descargar_lote()
 
 # ==========================================
 # MÓDULO 2: POR TIPO DE MUESTREO
 # ==========================================
 else:  # Este 'else' cierra el bloque de opcion_principal
+    import numpy as np
+    import pandas as pd
+    from muestreo import motor, tablas
     
     tipo_muestreo = st.selectbox(
         "Selecciona el tipo de muestreo:",
         [
             "🎲 Muestreo Aleatorio Simple (MAS)",
             "📊 Muestreo Estratificado",
+            "🧮 Estratificado Multi-indicador",
             "🏘️ Muestreo por Conglomerados",
             "📏 Muestreo Sistemático"
         ]
     )
+    ejecucion_tiempos.pagina = tipo_muestreo
     
     st.markdown("---")
     
@@ -1051,18 +1395,17 @@ else:  # Este 'else' cierra el bloque de opcion_principal
 
         with col2:
             st.subheader("Resultados")
-            # Cálculo de Z
-            alpha = 1 - confianza_mas
-            z_val = norm.ppf(1 - alpha/2)
-            
-            # Cálculo de n0 (Muestra infinita)
-            if objetivo_mas == "Estimar Media (Promedio)":
-                n0 = (z_val**2 * sigma_mas**2) / error_mas**2
-            else:
-                n0 = (z_val**2 * p_mas * (1-p_mas)) / error_mas**2
-            
-            # Ajuste por Población Finita
-            n_final = int(np.ceil(n0 / (1 + (n0 - 1) / N_mas)))
+            with tiempos.etapa("mas.calculo"):
+                if objetivo_mas == "Estimar Media (Promedio)":
+                    # Cálculo de Z y de n0 (Muestra infinita)
+                    z_val = motor.z_critico(confianza_mas)
+                    n0 = motor.n0_media(z_val, sigma_mas, error_mas)
+                    
+                    # Ajuste por Población Finita
+                    n_final = int(motor.redondear_n(motor.ajuste_fpc(n0, N_mas)))
+                else:
+                    # Proporción: de la tabla precalculada si (p, E, confianza, N) está en la rejilla
+                    n_final = tablas.n_proporcion(p_mas, error_mas, confianza_mas, N_mas)
             
             st.metric("Tamaño de muestra (n)", f"{n_final:,}")
             
@@ -1076,7 +1419,53 @@ else:  # Este 'else' cierra el bloque de opcion_principal
         
         # Botón de exportación
         df_mas = pd.DataFrame([{'Método': 'MAS', 'N': N_mas, 'n': n_final, 'Confianza': confianza_mas, 'Error': error_mas}])
-        st.download_button("📥 Descargar Resultado (Excel)", exportar_excel(df_mas), "calculo_mas.xlsx")
+        st.download_button("📥 Descargar Resultado (Excel)", exportar_excel(df_mas), "calculo_mas.xlsx", MIME_EXCEL, on_click="ignore")
+        
+        if objetivo_mas == "Estimar Media (Promedio)":
+            panel_superficie("media", "mas", ("Error máximo (E)", 0.1, 100.0, (0.5, 5.0), 0.1), ("Confianza", 0.80, 0.999, (0.80, 0.99), 0.001),
+                             {'sigma': sigma_mas, 'N': N_mas}, (error_mas, confianza_mas, n_final),
+                             f"n para estimar la media (σ = {sigma_mas:g}, N = {N_mas:,})")
+        else:
+            panel_superficie("proporcion", "mas_p", ("Margen de error (E)", 0.005, 0.3, (0.01, 0.10), 0.005), ("Confianza", 0.80, 0.999, (0.80, 0.99), 0.001),
+                             {'p': p_mas, 'N': N_mas}, (error_mas, confianza_mas, n_final),
+                             f"n para estimar la proporción (p = {p_mas:g}, N = {N_mas:,})")
+        
+        from muestreo import simulacion
+        if objetivo_mas == "Estimar Media (Promedio)":
+            poblacion_mas = lambda semilla: simulacion.preparar_poblacion("mas", simulacion.poblacion_normal(N_mas, 0.0, sigma_mas, semilla))
+        else:
+            poblacion_mas = lambda semilla: simulacion.preparar_poblacion("mas", simulacion.poblacion_bernoulli(N_mas, p_mas, semilla))
+        panel_simulacion("mas", poblacion_mas, {'n': min(n_final, N_mas)}, "mas", confianza_mas, tamano_poblacion=N_mas)
+        
+        # Selección real desde el marco muestral
+        st.markdown("---")
+        st.markdown("### 🎯 Seleccionar la Muestra desde el Marco Muestral")
+        st.caption("El archivo se lee por bloques; para marcos de cientos de millones de filas usa `python -m muestreo.seleccion`.")
+        
+        @fragmento
+        def _seleccionar_marco_mas():
+            archivo_marco = st.file_uploader("Marco muestral (CSV o Parquet)", type=["csv", "parquet"], key="marco_mas")
+            c_sel1, c_sel2, c_sel3 = st.columns(3)
+            n_seleccion = c_sel1.number_input("Tamaño de muestra (n)", min_value=1, value=n_final, key="n_sel_mas")
+            semilla_mas = c_sel2.number_input("Semilla aleatoria", min_value=0, value=42, step=1, key="semilla_mas")
+            formato_sel = c_sel3.radio("Formato de salida", ["csv", "parquet"], horizontal=True, key="fmt_sel_mas")
+            
+            if archivo_marco is not None and st.button("Seleccionar muestra", key="btn_sel_mas"):
+                from muestreo import seleccion
+                buffer_sel = BytesIO()
+                with tiempos.etapa("mas.seleccion", "datos"):
+                    resumen_sel = seleccion.seleccionar_mas(
+                        archivo_marco, n_seleccion, buffer_sel, semilla=int(semilla_mas), formato_salida=formato_sel
+                    )
+                st.success(f"✅ Se seleccionaron **{resumen_sel['n']:,}** de {resumen_sel['N']:,} registros (semilla {int(semilla_mas)}).")
+                st.download_button(
+                    "📥 Descargar muestra seleccionada",
+                    buffer_sel.getvalue(),
+                    f"muestra_mas.{formato_sel}",
+                    on_click="ignore"
+                )
+        
+        _seleccionar_marco_mas()
 
     # ==========================================
     # B. MUESTREO ESTRATIFICADO
@@ -1085,94 +1474,303 @@ else:  # Este 'else' cierra el bloque de opcion_principal
         st.header("Muestreo Estratificado")
         st.info("Útil cuando la población se divide en subgrupos (estratos) internamente homogéneos pero diferentes entre sí.")
         
+        from muestreo import estratificado
+        
         col1, col2 = st.columns([1, 1])
         with col1:
             st.subheader("Configuración Global")
             objetivo_est = st.radio("Objetivo:", ["Media", "Proporción"], key="obj_est")
-            num_estratos = st.slider("Número de estratos", 2, 6, 3)
+            fuente_est = st.radio("Estratos:", ["Ingresar manualmente", "Cargar tabla de estratos"], key="fuente_est")
             confianza_est = st.select_slider("Confianza", [0.90, 0.95, 0.99], value=0.95, key="conf_est")
             error_est = st.number_input("Error total deseado (E)", value=2.0 if objetivo_est == "Media" else 0.05)
-            metodo_asignacion = st.selectbox("Tipo de Asignación:", ["Proporcional", "Óptima de Neyman", "Igual"])
-        
-        st.subheader("Configuración por Estrato")
-        estratos_data = []
-        total_N = 0
-        
-        # Loop para generar inputs dinámicos
-        for i in range(num_estratos):
-            st.markdown(f"**Estrato {i+1}**")
-            cols = st.columns(3)
-            with cols[0]:
-                N_h = st.number_input(f"Población N_{i+1}", min_value=1, value=1000*(i+1), key=f"N_est_{i}")
-            with cols[1]:
-                label_v = f"Desv. Std (σ_{i+1})" if objetivo_est=='Media' else f"Proporción (p_{i+1})"
-                val_h = st.number_input(label_v, value=10.0 if objetivo_est=='Media' else 0.5, key=f"v_est_{i}")
-                # Si es proporción, calculamos sigma implícita
-                sigma_h = val_h if objetivo_est=='Media' else np.sqrt(val_h*(1-val_h))
-            with cols[2]:
-                costo_h = st.number_input(f"Costo unitario", value=1.0, disabled=(metodo_asignacion != "Óptima de Neyman"), key=f"c_est_{i}")
-            
-            estratos_data.append({'Estrato': i+1, 'N_h': N_h, 'sigma_h': sigma_h, 'costo_h': costo_h})
-            total_N += N_h
-
-        # Cálculos
-        z_est = norm.ppf(1 - (1-confianza_est)/2)
-        D = (error_est**2) / (z_est**2)
-        
-        suma_Nh_sigmah = sum([d['N_h'] * d['sigma_h'] for d in estratos_data])
-        suma_Nh_sigmah2 = sum([d['N_h'] * d['sigma_h']**2 for d in estratos_data])
-        
-        # Fórmula del tamaño total n
-        if metodo_asignacion == "Proporcional":
-            n_total = suma_Nh_sigmah2 / (total_N**2 * D + suma_Nh_sigmah2)
-        elif metodo_asignacion == "Óptima de Neyman":
-            # Simplificación asumiendo costos iguales para la fórmula básica de Neyman mostrada aquí
-            n_total = (suma_Nh_sigmah**2) / (total_N**2 * D + suma_Nh_sigmah2)
-        else: # Asignación Igual (aproximación simple)
-            n_total = 30 * num_estratos 
-
-        n_total = int(np.ceil(n_total))
+            metodo_asignacion = st.selectbox("Tipo de Asignación:", list(estratificado.METODOS_ASIGNACION))
+            n_min_est = st.number_input("Mínimo por estrato (n_h mín.)", min_value=0, value=2, help="2 permite estimar la varianza dentro de cada estrato")
+            
+            if metodo_asignacion == "Óptima con costos":
+                restriccion_est = st.radio("Restricción:", ["Error objetivo (E)", "Presupuesto total"], key="restr_est")
+                if restriccion_est == "Presupuesto total":
+                    presupuesto_est = st.number_input("Presupuesto total (C)", min_value=0.0, value=1000.0, step=100.0)
+                costo_fijo_est = st.number_input("Costo fijo (c₀)", min_value=0.0, value=0.0, step=10.0, help="Costo que no depende del tamaño de muestra")
+        
+        if fuente_est == "Ingresar manualmente":
+            st.subheader("Configuración por Estrato")
+            num_estratos = st.slider("Número de estratos", 2, 20, 3)
+            estratos_data = []
+            
+            # Loop para generar inputs dinámicos
+            for i in range(num_estratos):
+                st.markdown(f"**Estrato {i+1}**")
+                cols = st.columns(3)
+                with cols[0]:
+                    N_h = st.number_input(f"Población N_{i+1}", min_value=1, value=1000*(i+1), key=f"N_est_{i}")
+                with cols[1]:
+                    label_v = f"Desv. Std (σ_{i+1})" if objetivo_est=='Media' else f"Proporción (p_{i+1})"
+                    val_h = st.number_input(label_v, value=10.0 if objetivo_est=='Media' else 0.5, key=f"v_est_{i}")
+                    # Si es proporción, calculamos sigma implícita
+                    sigma_h = val_h if objetivo_est=='Media' else np.sqrt(val_h*(1-val_h))
+                with cols[2]:
+                    costo_h = st.number_input(f"Costo unitario", min_value=0.01, value=1.0, disabled=(metodo_asignacion != "Óptima con costos"), key=f"c_est_{i}")
+                
+                estratos_data.append({'Estrato': i+1, 'N_h': N_h, 'sigma_h': sigma_h, 'costo_h': costo_h})
+            
+            tabla_est = {
+                'estrato': np.array([d['Estrato'] for d in estratos_data]),
+                'N_h': np.array([d['N_h'] for d in estratos_data], dtype=float),
+                'sigma_h': np.array([d['sigma_h'] for d in estratos_data]),
+                'costo_h': np.array([d['costo_h'] for d in estratos_data]),
+                'n_min': None,
+                'n_max': None,
+            }
+        else:
+            st.subheader("Tabla de Estratos")
+            st.caption("Columnas: `N_h` y `sigma_h` (o `p_h`); opcionales: `estrato`, `costo_h`, `n_min`, `n_max`.")
+            archivo_est = st.file_uploader("Tabla de estratos", type=["csv", "parquet", "xlsx"], key="archivo_est")
+            if archivo_est is None:
+                detener()
+            from muestreo import lotes
+            try:
+                tabla_est = estratificado.leer_tabla_estratos(lotes.leer_parametros(archivo_est))
+            except Exception as e:
+                st.error(f"No se pudo leer la tabla de estratos: {e}")
+                detener()
+        
+        N_h_arr = tabla_est['N_h']
+        sigma_h_arr = tabla_est['sigma_h']
+        costo_h_arr = tabla_est['costo_h']
+        total_N = int(N_h_arr.sum())
+        
+        n_min_arr = tabla_est['n_min'] if tabla_est['n_min'] is not None else n_min_est
+        
+        with tiempos.etapa("estratificado.calculo"):
+            if metodo_asignacion == "Óptima con costos":
+                # n_h ∝ N_h σ_h / √c_h con presupuesto fijo o error fijo, respetando límites
+                optimo_est = estratificado.asignacion_optima_costos(
+                    N_h_arr, sigma_h_arr, costo_h_arr,
+                    presupuesto=presupuesto_est if restriccion_est == "Presupuesto total" else None,
+                    error=error_est if restriccion_est == "Error objetivo (E)" else None,
+                    confianza=confianza_est, costo_fijo=costo_fijo_est,
+                    n_min=n_min_arr, n_max=tabla_est['n_max']
+                )
+                asignaciones = optimo_est['n_h']
+                n_total = optimo_est['n']
+            else:
+                # Fórmula del tamaño total n
+                n_total = estratificado.n_total_estratificado(N_h_arr, sigma_h_arr, error_est, confianza_est, metodo_asignacion, costo_h_arr)
+                
+                # Distribución de la muestra (n_h): enteros exactos con límites por estrato
+                asignaciones = estratificado.asignar(
+                    n_total, N_h_arr, sigma_h_arr, metodo_asignacion, costo_h_arr,
+                    n_min=n_min_arr, n_max=tabla_est['n_max']
+                )
+        n_asignado = int(asignaciones.sum())
         
         st.divider()
         c1, c2 = st.columns(2)
-        c1.metric("Tamaño de Muestra Total (n)", f"{n_total:,}")
+        c1.metric("Tamaño de Muestra Total (n)", f"{n_asignado:,}")
         c1.metric("Población Total (N)", f"{total_N:,}")
-        
-        # Distribución de la muestra (n_h)
-        asignaciones = []
-        if metodo_asignacion == "Proporcional":
-            for d in estratos_data: asignaciones.append(int(n_total * (d['N_h']/total_N)))
-        elif metodo_asignacion == "Óptima de Neyman":
-            for d in estratos_data: asignaciones.append(int(n_total * (d['N_h']*d['sigma_h'])/suma_Nh_sigmah))
-        else:
-            asignaciones = [int(n_total/num_estratos)] * num_estratos
+        c1.metric("Número de estratos", f"{N_h_arr.size:,}")
+        if metodo_asignacion == "Óptima con costos":
+            c1.metric("Costo total", f"{optimo_est['costo']:,.2f}")
+            c1.metric("Error alcanzado (E)", f"±{optimo_est['error']:.4f}")
+            if not optimo_est['factible']:
+                c1.warning("⚠️ La restricción no es alcanzable con los límites por estrato; se muestra la asignación más cercana.")
+        elif n_asignado != n_total:
+            c1.warning(f"⚠️ La fórmula pide n = {n_total:,}; los límites por estrato (mínimo o n_h ≤ N_h) lo llevan a {n_asignado:,}.")
             
         # Tabla de resultados
         df_res = pd.DataFrame({
-            'Estrato': [d['Estrato'] for d in estratos_data],
-            'Población (N_h)': [d['N_h'] for d in estratos_data],
+            'Estrato': tabla_est['estrato'],
+            'Población (N_h)': N_h_arr.astype(np.int64),
             'Muestra Asignada (n_h)': asignaciones,
-            '% de Muestreo': [f"{(n/N)*100:.1f}%" for n, N in zip(asignaciones, [d['N_h'] for d in estratos_data])]
+            '% de Muestreo': np.round(asignaciones / N_h_arr * 100, 1)
         })
         c2.dataframe(df_res, hide_index=True)
-        st.download_button("📥 Descargar Asignación (Excel)", exportar_excel(df_res), "asignacion_estratificada.xlsx")
+        parametros_est = {
+            'Objetivo': objetivo_est, 'Asignación': metodo_asignacion, 'Confianza': confianza_est,
+            'N total': total_N, 'n total': n_asignado, 'Estratos': N_h_arr.size,
+        }
+        if metodo_asignacion == "Óptima con costos":
+            parametros_est.update({'Costo total': optimo_est['costo'], 'Error alcanzado (E)': optimo_est['error']})
+        else:
+            parametros_est['Error (E)'] = error_est
+        st.download_button("📥 Descargar Asignación (Excel)",
+                           exportar_excel({'Parámetros': parametros_est, 'Asignación': df_res}),
+                           "asignacion_estratificada.xlsx", MIME_EXCEL, on_click="ignore")
+        
+        from muestreo import simulacion
+        
+        def _reasignar_estratos(poblacion):
+            # Con una población propia se reasigna el mismo n con sus N_h y σ_h
+            limites = poblacion['limites']
+            N_pob = np.diff(limites).astype(float)
+            sigma_pob = np.array([poblacion['y'][a:b].std(ddof=1) for a, b in zip(limites[:-1], limites[1:])])
+            metodo_pob = "Óptima de Neyman" if metodo_asignacion == "Óptima con costos" else metodo_asignacion
+            # Límites por estrato de la tabla, emparejados por etiqueta de estrato
+            indice_tabla = {str(e): i for i, e in enumerate(tabla_est['estrato'])}
+            filas = [indice_tabla.get(str(e)) for e in poblacion['estratos']]
+            if None in filas:
+                n_min_pob, n_max_pob = n_min_est, None
+            else:
+                n_min_pob = n_min_arr[filas] if tabla_est['n_min'] is not None else n_min_est
+                n_max_pob = tabla_est['n_max'][filas] if tabla_est['n_max'] is not None else None
+            return {'n_h': estratificado.asignar(n_asignado, N_pob, sigma_pob, metodo_pob,
+                                                 n_min=n_min_pob, n_max=n_max_pob)}
+        
+        panel_simulacion(
+            "estratificado",
+            lambda semilla: simulacion.preparar_poblacion("estratificado", *simulacion.poblacion_estratos(N_h_arr, 0.0, sigma_h_arr, semilla)),
+            {'n_h': asignaciones}, "est", confianza_est, columna_grupo="Columna de estrato",
+            ajustar_parametros=_reasignar_estratos, tamano_poblacion=total_N
+        )
+        
+        if metodo_asignacion == "Óptima con costos":
+            st.markdown("---")
+            st.subheader("💰 Frontera Costo – Precisión")
+            from muestreo import figuras
+            
+            with tiempos.etapa("estratificado.frontera"):
+                frontera = estratificado.frontera_costo_varianza(
+                    N_h_arr, sigma_h_arr, costo_h_arr, confianza=confianza_est,
+                    costo_fijo=costo_fijo_est, n_min=n_min_arr, n_max=tabla_est['n_max']
+                )
+            df_frontera = pd.DataFrame({
+                'Presupuesto': frontera['presupuesto'],
+                'n total': np.round(frontera['n'], 1),
+                'Varianza de la media': frontera['varianza'],
+                'Error (E)': frontera['error']
+            })
+            st.image(figuras.grafico_frontera(
+                frontera['presupuesto'] - costo_fijo_est, frontera['error'],
+                punto=(optimo_est['costo'] - costo_fijo_est, optimo_est['error'])
+            ))
+            st.dataframe(df_frontera, hide_index=True, use_container_width=True)
+            st.download_button("📥 Descargar Frontera (Excel)", exportar_excel(df_frontera), "frontera_costo_precision.xlsx", MIME_EXCEL, on_click="ignore")
+
+    # ==========================================
+    # B2. ESTRATIFICADO MULTI-INDICADOR
+    # ==========================================
+    elif tipo_muestreo == "🧮 Estratificado Multi-indicador":
+        st.header("Muestreo Estratificado Multi-indicador")
+        st.info("Encuentra la asignación de costo mínimo que cumple la precisión de todos los indicadores de la encuesta a la vez (método de Bethel–Chromy).")
+        
+        from muestreo import estratificado, lotes
+        
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            st.subheader("Configuración Global")
+            confianza_mi = st.select_slider("Confianza", [0.90, 0.95, 0.99], value=0.95, key="conf_mi")
+            tipo_objetivo_mi = st.radio("Precisión por indicador:", ["Coeficiente de variación (CV)", "Error absoluto (E)"], key="tipo_obj_mi")
+            objetivo_defecto_mi = st.number_input(
+                "Objetivo por defecto",
+                min_value=0.0001,
+                value=0.05 if tipo_objetivo_mi.startswith("Coeficiente") else 1.0,
+                format="%.4f",
+                help="Valor inicial para todos los indicadores; se puede editar indicador por indicador"
+            )
+            n_min_mi = st.number_input("Mínimo por estrato (n_h mín.)", min_value=0, value=2, key="n_min_mi")
+        
+        with col2:
+            st.subheader("Tabla de Estratos × Indicadores")
+            st.caption("Columnas: `N_h`; opcionales `estrato`, `costo_h`. Cada indicador es `sigma_<nombre>` (con `media_<nombre>` para CV) o `p_<nombre>`.")
+            archivo_mi = st.file_uploader("Tabla de estratos", type=["csv", "parquet", "xlsx"], key="archivo_mi")
+        
+        if archivo_mi is not None:
+            try:
+                tabla_mi = estratificado.leer_tabla_indicadores(lotes.leer_parametros(archivo_mi))
+            except Exception as e:
+                st.error(f"No se pudo leer la tabla: {e}")
+                detener()
+            
+            st.subheader("Objetivos de Precisión")
+            df_objetivos = st.data_editor(
+                pd.DataFrame({'Indicador': tabla_mi['indicadores'], 'Objetivo': objetivo_defecto_mi}),
+                disabled=['Indicador'], hide_index=True, key="objetivos_mi"
+            )
+            objetivos_mi = df_objetivos['Objetivo'].to_numpy(dtype=float)
+            
+            usar_cv_mi = tipo_objetivo_mi.startswith("Coeficiente")
+            try:
+                with tiempos.etapa("multi_indicador.calculo"):
+                    resultado_mi = estratificado.asignacion_multivariada(
+                        tabla_mi['N_h'], tabla_mi['S_hj'], tabla_mi['costo_h'],
+                        error_j=None if usar_cv_mi else objetivos_mi,
+                        cv_j=objetivos_mi if usar_cv_mi else None,
+                        medias_hj=tabla_mi['medias_hj'], confianza=confianza_mi, n_min=n_min_mi
+                    )
+            except ValueError as e:
+                st.error(str(e))
+                detener()
+            
+            st.divider()
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Tamaño de Muestra Total (n)", f"{resultado_mi['n']:,}")
+            c2.metric("Costo total", f"{resultado_mi['costo']:,.2f}")
+            c3.metric("Estratos × Indicadores", f"{len(tabla_mi['N_h']):,} × {len(tabla_mi['indicadores']):,}")
+            if not resultado_mi['factible']:
+                st.warning("⚠️ Algún objetivo no es alcanzable con los límites por estrato; se muestra la asignación más cercana.")
+            elif not resultado_mi['convergio']:
+                st.warning("⚠️ El algoritmo no alcanzó la tolerancia; la asignación cumple los objetivos pero puede no ser la de costo mínimo.")
+            
+            alcanzado = resultado_mi['cv_j'] if usar_cv_mi else resultado_mi['error_j']
+            df_indicadores_mi = pd.DataFrame({
+                'Indicador': tabla_mi['indicadores'],
+                'Objetivo': objetivos_mi,
+                'Alcanzado': alcanzado,
+                'Restricción activa': np.isclose(alcanzado, objetivos_mi, rtol=0.02)
+            })
+            df_asignacion_mi = pd.DataFrame({
+                'Estrato': tabla_mi['estrato'],
+                'Población (N_h)': tabla_mi['N_h'].astype(np.int64),
+                'Costo unitario': tabla_mi['costo_h'],
+                'Muestra Asignada (n_h)': resultado_mi['n_h']
+            })
+            
+            c_izq, c_der = st.columns(2)
+            c_izq.dataframe(df_asignacion_mi, hide_index=True)
+            c_der.dataframe(df_indicadores_mi, hide_index=True)
+            st.download_button("📥 Descargar Asignación (Excel)", exportar_excel({'Asignación': df_asignacion_mi, 'Indicadores': df_indicadores_mi}),
+                               "asignacion_multi_indicador.xlsx", MIME_EXCEL, on_click="ignore")
 
     # ==========================================
     # C. MUESTREO POR CONGLOMERADOS
     # ==========================================
     elif tipo_muestreo == "🏘️ Muestreo por Conglomerados":
+        from muestreo import conglomerados
+        
         st.header("Muestreo por Conglomerados")
         st.info("Se seleccionan grupos completos (escuelas, cajas, manzanas) en lugar de individuos. Es más barato pero menos preciso (DEFF > 1).")
         
+        # Marco de conglomerados opcional: id + medida de tamaño
+        archivo_cong = st.file_uploader(
+            "Marco de conglomerados (CSV o Parquet, opcional)", type=["csv", "parquet"], key="marco_cong",
+            help="Una fila por conglomerado con su identificador y su tamaño (número de elementos)"
+        )
+        marco_cong = None
+        if archivo_cong is not None:
+            marco_cong = pd.read_parquet(archivo_cong) if archivo_cong.name.endswith(".parquet") else pd.read_csv(archivo_cong)
+            c_m1, c_m2 = st.columns(2)
+            col_id = c_m1.selectbox("Columna identificadora", marco_cong.columns, key="col_id_cong")
+            numericas = marco_cong.select_dtypes("number").columns
+            col_tam = c_m2.selectbox("Columna de tamaño", numericas, index=len(numericas) - 1 if len(numericas) else 0, key="col_tam_cong")
+            resumen_cong = conglomerados.resumen_marco(marco_cong[col_tam])
+        
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Datos de Población")
-            M_total = st.number_input("Número total de conglomerados (M)", value=200, help="Total de grupos disponibles")
-            tam_prom = st.number_input("Tamaño promedio del conglomerado", value=50, help="Promedio de elementos dentro de cada grupo")
+            if marco_cong is None:
+                M_total = st.number_input("Número total de conglomerados (M)", value=200, help="Total de grupos disponibles")
+                tam_prom = st.number_input("Tamaño promedio del conglomerado", value=50, help="Promedio de elementos dentro de cada grupo")
+                cv_tam = st.number_input("CV del tamaño de los conglomerados", 0.0, 5.0, 0.0, help="Desviación estándar / promedio de los tamaños. 0 = todos iguales")
+            else:
+                M_total = resumen_cong['M_total']
+                tam_prom = resumen_cong['tam_prom']
+                cv_tam = resumen_cong['cv_tamano']
+                st.caption(f"Del marco: M = {M_total:,}, tamaño promedio = {tam_prom:,.1f}, CV = {cv_tam:.2f}")
             icc = st.number_input("Coeficiente Correlación Intraclase (ICC)", 0.0, 1.0, 0.05, help="Qué tan parecidos son los elementos dentro de un grupo. 0=distintos, 1=idénticos")
             
             st.subheader("Parámetros de Estimación")
             objetivo_cong = st.radio("Objetivo", ["Media", "Proporción"], key="obj_cong")
+            confianza_cong = st.select_slider("Nivel de Confianza", [0.90, 0.95, 0.99], value=0.95, key="conf_cong")
             
             if objetivo_cong == "Media":
                 sigma_tot = st.number_input("Desviación estándar global (σ)", value=20.0)
@@ -1180,33 +1778,114 @@ else:  # Este 'else' cierra el bloque de opcion_principal
             else:
                 p_cong = st.slider("Proporción estimada (p)", 0.01, 0.99, 0.50)
                 error_cong = st.number_input("Error máximo (E)", 0.01, 0.2, 0.05)
+            
+            st.subheader("Etapas")
+            etapas = st.radio("Diseño", ["Una etapa (censo del conglomerado)", "Dos etapas (submuestreo)"], key="etapas_cong")
+            opciones_etapa = {}
+            if etapas == "Dos etapas (submuestreo)":
+                criterio_m = st.radio("Elementos por conglomerado", ["% de submuestreo", "Óptimo por costos"], horizontal=True, key="criterio_m")
+                if criterio_m == "% de submuestreo":
+                    opciones_etapa['fraccion_submuestreo'] = st.slider("Submuestreo dentro del conglomerado (%)", 1, 100, 50) / 100
+                else:
+                    c_c1, c_c2 = st.columns(2)
+                    opciones_etapa['costo_conglomerado'] = c_c1.number_input("Costo por conglomerado (c₁)", min_value=0.01, value=100.0)
+                    opciones_etapa['costo_elemento'] = c_c2.number_input("Costo por elemento (c₂)", min_value=0.01, value=2.0)
                 
         with col2:
             st.subheader("Resultados")
-            # 1. Calcular Efecto de Diseño (DEFF)
-            deff = 1 + (tam_prom - 1) * icc
-            
-            # 2. Calcular n como si fuera MAS
-            z_val = 1.96 # Asumiendo 95%
-            if objetivo_cong == "Media":
-                n_mas = (z_val**2 * sigma_tot**2) / error_cong**2
-            else:
-                n_mas = (z_val**2 * p_cong * (1-p_cong)) / error_cong**2
-            
-            # 3. Ajustar n con DEFF
-            n_complex = n_mas * deff
-            
-            # 4. Calcular número de conglomerados (m)
-            m_clusters = int(np.ceil(n_complex / tam_prom))
+            # 1. n como si fuera MAS, con la confianza elegida
+            with tiempos.etapa("conglomerados.calculo"):
+                z_val = motor.z_critico(confianza_cong)
+                if objetivo_cong == "Media":
+                    n_mas = motor.n0_media(z_val, sigma_tot, error_cong)
+                else:
+                    n_mas = motor.n0_proporcion(z_val, p_cong, error_cong)
+                
+                # 2. DEFF con tamaños variables y número de conglomerados
+                diseno = conglomerados.diseno_dos_etapas(n_mas, tam_prom, icc, cv_tam, M_total=M_total, **opciones_etapa)
+            a_clusters, m_elem, deff = diseno['a'], diseno['m'], diseno['deff']
             
-            st.metric("Conglomerados a seleccionar (m)", f"{m_clusters:,}")
-            st.metric("Total de elementos (n)", f"{m_clusters * int(tam_prom):,}")
+            st.metric("Conglomerados a seleccionar (a)", f"{a_clusters:,}")
+            st.metric("Elementos por conglomerado (m)", f"{m_elem:,}")
+            st.metric("Total de elementos (n)", f"{diseno['n']:,}")
             st.metric("Efecto de Diseño (DEFF)", f"{deff:.2f}")
+            if 'costo' in diseno:
+                st.metric("Costo estimado", f"{diseno['costo']:,.2f}")
             
             if deff > 2:
                 st.warning("⚠️ El DEFF es alto. Los elementos dentro de los grupos son muy parecidos. Necesitas mucha más muestra que en un aleatorio simple.")
-            
-        st.success(f"Plan de acción: De tus {M_total} conglomerados, selecciona aleatoriamente **{m_clusters}** y censa a todos sus elementos.")
+            if not diseno['factible']:
+                st.error(f"⚠️ Se requieren {a_clusters:,} conglomerados pero solo hay {M_total:,}. Aumenta m o relaja el error.")
+        
+        if etapas == "Dos etapas (submuestreo)":
+            st.success(f"Plan de acción: De tus {M_total:,} conglomerados, selecciona **{a_clusters}** (idealmente con PPS) y en cada uno elige aleatoriamente **{m_elem}** elementos.")
+        else:
+            st.success(f"Plan de acción: De tus {M_total:,} conglomerados, selecciona aleatoriamente **{a_clusters}** y censa a todos sus elementos.")
+        
+        parametros_cong = {
+            'Objetivo': objetivo_cong, 'Confianza': confianza_cong, 'Error (E)': error_cong,
+            'M (conglomerados)': M_total, 'Tamaño promedio': tam_prom, 'CV del tamaño': cv_tam, 'ICC': icc,
+            'Etapas': etapas, 'n MAS equivalente': float(n_mas),
+        }
+        hojas_cong = {'Parámetros': parametros_cong, 'Diseño': pd.DataFrame([diseno])}
+        if marco_cong is not None:
+            # Probabilidades de inclusión πPS de todo el marco, calculadas solo al exportar
+            hojas_cong['Marco'] = lambda: marco_cong[[col_id, col_tam]].assign(**{
+                conglomerados.COLUMNA_PROBABILIDAD: conglomerados.probabilidades_inclusion(marco_cong[col_tam].to_numpy(), min(a_clusters, M_total))
+            })
+        st.download_button("📥 Descargar diseño (Excel)", exportar_excel(hojas_cong), "diseno_conglomerados.xlsx", MIME_EXCEL, on_click="ignore")
+        
+        # Con submuestreo cada conglomerado aporta m elementos: el CV del tamaño no interviene
+        cv_superficie = cv_tam if etapas == "Una etapa (censo del conglomerado)" else 0.0
+        panel_superficie("conglomerados", "cong", ("Elementos por conglomerado (m)", 1.0, 500.0, (1.0, 100.0), 1.0),
+                         ("ICC", 0.0, 1.0, (0.0, 0.30), 0.005),
+                         {'n_mas': float(n_mas), 'cv_tamano': cv_superficie}, (m_elem, icc, a_clusters),
+                         f"Conglomerados necesarios (n MAS = {float(n_mas):,.0f}, CV = {cv_superficie:.2f})", etiqueta_valor="a")
+        
+        if diseno['factible']:
+            from muestreo import simulacion
+            es_proporcion = objetivo_cong == "Proporción"
+            panel_simulacion(
+                "conglomerados",
+                lambda semilla: simulacion.preparar_poblacion("conglomerados", *simulacion.poblacion_conglomerados(
+                    M_total, tam_prom, icc, 0.0, 1.0 if es_proporcion else sigma_tot, cv_tam,
+                    proporcion=p_cong if es_proporcion else None, semilla=semilla
+                )),
+                {'a': a_clusters, 'm': m_elem if etapas == "Dos etapas (submuestreo)" else None},
+                "cong", confianza_cong, columna_grupo="Columna de conglomerado",
+                tamano_poblacion=M_total * tam_prom
+            )
+        
+        # Selección PPS desde el marco de conglomerados
+        st.markdown("---")
+        st.markdown("### 🎯 Selección con Probabilidad Proporcional al Tamaño (PPS)")
+        if marco_cong is None:
+            st.caption("Carga el marco de conglomerados para seleccionar la muestra. Para marcos muy grandes usa `python -m muestreo.conglomerados`.")
+        elif diseno['factible']:
+            @fragmento
+            def _seleccionar_pps():
+                c_p1, c_p2, c_p3 = st.columns(3)
+                a_sel = c_p1.number_input("Conglomerados (a)", min_value=1, max_value=M_total, value=min(a_clusters, M_total), key="a_sel_cong")
+                metodo_pps = c_p2.radio("Método", list(conglomerados.METODOS_PPS), format_func=lambda x: {"sistematico": "PPS sistemático", "sampford": "Sampford"}[x], key="metodo_pps")
+                semilla_cong = c_p3.number_input("Semilla aleatoria", min_value=0, value=42, step=1, key="semilla_cong")
+                
+                if st.button("Seleccionar conglomerados", key="btn_pps"):
+                    try:
+                        with tiempos.etapa("conglomerados.seleccion_pps"):
+                            indices, pi = conglomerados.seleccionar_pps(marco_cong[col_tam].to_numpy(), int(a_sel), metodo_pps, int(semilla_cong))
+                    except RuntimeError as e:
+                        st.error(str(e))
+                    else:
+                        muestra_cong = marco_cong.iloc[indices][[col_id, col_tam]].copy()
+                        muestra_cong[conglomerados.COLUMNA_PROBABILIDAD] = pi
+                        muestra_cong['peso'] = 1 / pi
+                        muestra_cong[conglomerados.COLUMNA_CERTEZA] = pi >= 1
+                        st.dataframe(muestra_cong, use_container_width=True, hide_index=True)
+                        st.caption(f"{int((pi >= 1).sum())} conglomerados de certeza (π = 1). Peso = 1/π.")
+                        st.download_button("📥 Descargar conglomerados seleccionados (CSV)", muestra_cong.to_csv(index=False).encode("utf-8"),
+                                           "conglomerados_pps.csv", on_click="ignore")
+            
+            _seleccionar_pps()
 
     # ==========================================
     # D. MUESTREO SISTEMÁTICO
@@ -1217,47 +1896,98 @@ else:  # Este 'else' cierra el bloque de opcion_principal
         
         col1, col2 = st.columns(2)
         with col1:
-            N_sys = st.number_input("Tamaño de la Población (N)", value=5000)
-            n_deseado = st.number_input("Tamaño de muestra deseado (n)", value=384, help="Calcula este valor usando el módulo de 'Estimación de una Media/Proporción' primero")
+            N_sys = st.number_input("Tamaño de la Población (N)", min_value=1, value=5000)
+            n_deseado = st.number_input("Tamaño de muestra deseado (n)", min_value=1, value=384, help="Calcula este valor usando el módulo de 'Estimación de una Media/Proporción' primero")
+            metodo_sys = st.radio(
+                "Método de selección",
+                ["lineal", "fraccional", "circular"],
+                format_func=lambda x: {
+                    "lineal": "Lineal (k entero)",
+                    "fraccional": "Intervalo fraccional (k = N/n)",
+                    "circular": "Circular (arranque en 1..N)"
+                }[x],
+                help="El intervalo fraccional y el circular siempre entregan exactamente n unidades"
+            )
+            semilla_sys = st.number_input("Semilla aleatoria", min_value=0, value=42, step=1, key="semilla_sys")
         
         with col2:
-            # Calcular intervalo k
-            if n_deseado > 0:
-                k = int(N_sys / n_deseado)
-            else:
-                k = 0
-            
-            # Arranque aleatorio
-            if k > 0:
-                inicio = np.random.randint(1, k+1)
+            from muestreo.seleccion import SeleccionSistematica
+            
+            if n_deseado > N_sys:
+                st.error("El tamaño de muestra no puede superar a la población.")
+                detener()
+            
+            # Intervalo k y arranque aleatorio reproducible
+            with tiempos.etapa("sistematico.calculo"):
+                seleccion_sys = SeleccionSistematica(N_sys, n_deseado, metodo_sys, semilla=int(semilla_sys))
+            k = seleccion_sys.k
+            inicio = seleccion_sys.inicio
+            
+            st.metric("Intervalo de salto (k)", f"{k:.4f}" if metodo_sys == "fraccional" else k)
+            st.metric("Arranque aleatorio (r)", f"{inicio:.4f}" if metodo_sys == "fraccional" else inicio)
+            st.metric("Unidades seleccionadas", f"{seleccion_sys.n_efectivo:,}")
+            
+            if metodo_sys == "fraccional":
+                st.markdown(f"""
+                **Instrucciones:**
+                1. Ordena tu lista de población del 1 al {N_sys}.
+                2. Calcula r + i·k para i = 0, 1, 2, ... y redondea hacia arriba.
+                3. Las primeras posiciones son: {', '.join(map(str, seleccion_sys.primeras(4).tolist()))}, ...
+                """)
             else:
-                inicio = 0
-            
-            st.metric("Intervalo de salto (k)", k)
-            st.metric("Arranque aleatorio (r)", inicio)
-            
-            st.markdown(f"""
-            **Instrucciones:**
-            1. Ordena tu lista de población del 1 al {N_sys}.
-            2. Selecciona el sujeto número **{inicio}**.
-            3. Selecciona el sujeto **{inicio} + {k} = {inicio+k}**.
-            4. Continúa sumando {k} hasta completar la muestra.
-            """)
+                st.markdown(f"""
+                **Instrucciones:**
+                1. Ordena tu lista de población del 1 al {N_sys}.
+                2. Selecciona el sujeto número **{inicio}**.
+                3. Selecciona el sujeto **{inicio} + {k} = {inicio+k}**.
+                4. Continúa sumando {k} hasta completar la muestra{" (al pasar de N, vuelve al inicio de la lista)" if metodo_sys == "circular" else ""}.
+                """)
 
         st.markdown("---")
         st.markdown("### 📄 Generar Lista de Selección")
-        if st.button("Generar lista de números a muestrear"):
-            if k > 0:
-                muestra = [inicio + i*k for i in range(n_deseado)]
-                # Filtramos si alguno se pasa de N (por redondeos)
-                muestra = [x for x in muestra if x <= N_sys]
-                
-                st.write(f"Mostrando primeros 20 números de identificación:")
-                st.code(f"{muestra[:20]} ...")
-                
-                st.download_button("📥 Descargar lista completa (.txt)", str(muestra), "seleccion_sistematica.txt")
-            else:
-                st.error("El tamaño de muestra debe ser mayor a 0.")
+        st.write("Mostrando primeros 20 números de identificación:")
+        st.code(f"{seleccion_sys.primeras(20).tolist()} ...")
+        
+        @fragmento
+        def _descargar_lista_sistematica():
+            formato_sys = st.radio("Formato de la lista completa", ["csv", "npy"], horizontal=True,
+                                   help="npy: arreglo binario int64 legible con numpy.load")
+            
+            def _lista_sistematica():
+                buffer_sys = BytesIO()
+                with tiempos.etapa("exportacion.sistematico", "exportacion"):
+                    seleccion_sys.escribir(buffer_sys, formato_sys)
+                return buffer_sys.getvalue()
+            
+            # La lista se genera solo al hacer clic en descargar
+            st.download_button(
+                "📥 Descargar lista completa",
+                _lista_sistematica,
+                f"seleccion_sistematica.{formato_sys}",
+                on_click="ignore"
+            )
+        
+        _descargar_lista_sistematica()
+
+        # Riesgo de periodicidad: si la lista tiene un ciclo múltiplo de k, la muestra se sesga
+        from muestreo import simulacion
+
+        def _controles_periodicidad():
+            c_per1, c_per2 = st.columns(2)
+            return {
+                'periodo': c_per1.number_input("Periodo del ciclo en la lista", min_value=1.0, value=float(max(int(k), 1)), key="periodo_sys",
+                                               help="Por defecto igual a k: el peor caso para el muestreo sistemático"),
+                'amplitud': c_per2.number_input("Amplitud del ciclo (en unidades de σ)", min_value=0.0, value=1.0, key="amplitud_sys"),
+            }
+
+        panel_simulacion(
+            "sistematico",
+            lambda semilla, periodo, amplitud: simulacion.preparar_poblacion(
+                "sistematico", simulacion.poblacion_periodica(N_sys, periodo, amplitud, 0.0, 1.0, semilla)
+            ),
+            {'n': n_deseado, 'metodo': metodo_sys}, "sys", 0.95,
+            controles=_controles_periodicidad, tamano_poblacion=N_sys
+        )
 
 # Footer
 st.markdown("---")
@@ -1268,3 +1998,5 @@ st.markdown("""
 <p><small>Versión 2.0 - Herramienta educativa y profesional</small></p>
 </div>
 """, unsafe_allow_html=True)
+
+finalizar_ejecucion()
@@ -0,0 +1,121 @@
+"""
+Benchmark de arranque en frío.
+
+Mide, en procesos nuevos de Python:
+
+1. El costo de importación acumulado de cada módulo pesado (``-X importtime``).
+2. El tiempo de la primera ejecución de cada página de ``app.py`` y qué
+   módulos pesados carga.
+
+Uso:
+    python benchmarks/arranque.py [--repeticiones 5] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULOS = [
+    'streamlit',
+    'numpy',
+    'pandas',
+    'scipy.stats',
+    'matplotlib.figure',
+    'pyarrow',
+    'muestreo',
+    'muestreo.motor',
+    'muestreo.potencia',
+    'muestreo.figuras',
+    'muestreo.lotes',
+]
+
+PAGINAS = [
+    '❓ Ayuda y Glosario',
+    '📊 Por Tipo de Estimación',
+    '🎯 Por Tipo de Muestreo',
+    '📦 Procesamiento por Lotes',
+]
+
+PESADOS = ('numpy', 'pandas', 'scipy', 'matplotlib', 'pyarrow')
+
+_SCRIPT_PAGINA = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.session_state['modulo_principal'] = {pagina!r}
+at.run()
+print(json.dumps({{
+    'segundos': time.perf_counter() - t0,
+    'error': bool(at.exception),
+    'cargados': [m for m in {pesados!r} if m in sys.modules],
+}}))
+"""
+
+
+def costo_importacion(modulo):
+    """Microsegundos acumulados de ``import modulo`` en un proceso nuevo"""
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        partes = linea.split('|')
+        if len(partes) == 3 and partes[2].strip() == modulo:
+            return int(partes[1])
+    return 0
+
+
+def arranque_pagina(pagina):
+    """Tiempo de la primera ejecución de una página y módulos pesados cargados"""
+    script = _SCRIPT_PAGINA.format(app=os.path.join(RAIZ, 'app.py'), pagina=pagina, pesados=PESADOS)
+    proceso = subprocess.run(
+        [sys.executable, '-c', script], cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de arranque en frío')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--sin-paginas', action='store_true', help='Omitir la medición por página')
+    parser.add_argument('--json', default=None, help='Guardar resultados en un archivo JSON')
+    args = parser.parse_args(argv)
+
+    resultados = {'importacion_ms': {}, 'paginas': {}}
+
+    print(f"{'Módulo':<22}{'Importación (ms)':>18}")
+    for modulo in MODULOS:
+        muestras = [costo_importacion(modulo) / 1000 for _ in range(args.repeticiones)]
+        mediana = statistics.median(muestras)
+        resultados['importacion_ms'][modulo] = mediana
+        print(f"{modulo:<22}{mediana:>18.1f}")
+
+    if not args.sin_paginas:
+        print()
+        print(f"{'Página':<30}{'Primera ejecución (s)':>22}  Módulos pesados")
+        for pagina in PAGINAS:
+            muestras = [arranque_pagina(pagina) for _ in range(args.repeticiones)]
+            mediana = statistics.median(m['segundos'] for m in muestras)
+            cargados = muestras[-1]['cargados']
+            resultados['paginas'][pagina] = {
+                'segundos': mediana,
+                'cargados': cargados,
+                'error': any(m['error'] for m in muestras),
+            }
+            print(f"{pagina:<30}{mediana:>22.2f}  {', '.join(cargados) or '—'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
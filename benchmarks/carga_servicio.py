@@ -0,0 +1,171 @@
+"""
+Prueba de carga del servicio HTTP (``python -m muestreo.servicio``).
+
+Abre ``--concurrencia`` conexiones persistentes y envía solicitudes POST
+/calcular/{calculadora} con una mezcla de calculadoras. Reporta latencias
+p50/p90/p99, rendimiento (solicitudes por segundo), errores y las métricas
+del servicio (lotes formados y aciertos de caché).
+
+Sin ``--url`` se levanta un servicio local en un puerto libre.
+
+Uso:
+    python benchmarks/carga_servicio.py [--solicitudes 20000] [--concurrencia 64]
+                                        [--repetidos 0.5] [--json salida.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parametros(calculadora, rng):
+    """Parámetros aleatorios válidos para cada calculadora"""
+    if calculadora == 'media':
+        return {'sigma': round(rng.uniform(5, 30), 3), 'error': round(rng.uniform(0.5, 3), 3),
+                'N': rng.randint(100, 1_000_000)}
+    if calculadora == 'proporcion':
+        return {'p': round(rng.uniform(0.05, 0.95), 3), 'error': round(rng.uniform(0.01, 0.1), 4),
+                'N': rng.randint(100, 1_000_000)}
+    if calculadora == 'dif_medias':
+        return {'delta': round(rng.uniform(1, 10), 3), 'sigma': 10, 'potencia': rng.choice([0.8, 0.9])}
+    return {'p1': 0.3, 'p2': round(rng.uniform(0.35, 0.7), 3)}
+
+
+def generar_solicitudes(total, repetidos, semilla=0):
+    """Lista de (calculadora, cuerpo JSON); una fracción ``repetidos`` reutiliza parámetros ya enviados"""
+    rng = random.Random(semilla)
+    calculadoras = ['media', 'proporcion', 'dif_medias', 'dif_proporciones']
+    solicitudes = []
+    for _ in range(total):
+        if solicitudes and rng.random() < repetidos:
+            solicitudes.append(rng.choice(solicitudes))
+        else:
+            calculadora = rng.choice(calculadoras)
+            solicitudes.append((calculadora, json.dumps(_parametros(calculadora, rng)).encode()))
+    return solicitudes
+
+
+async def _cliente(host, puerto, cola, latencias, errores):
+    """Conexión HTTP/1.1 persistente que envía solicitudes hasta vaciar la cola"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        while True:
+            try:
+                calculadora, cuerpo = cola.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            inicio = time.perf_counter()
+            escritor.write(
+                f"POST /calcular/{calculadora} HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo
+            )
+            await escritor.drain()
+            cabecera = await lector.readuntil(b'\r\n\r\n')
+            lineas = cabecera.decode('latin-1').split('\r\n')
+            largo = next(int(l.split(':', 1)[1]) for l in lineas if l.lower().startswith('content-length'))
+            await lector.readexactly(largo)
+            latencias.append(time.perf_counter() - inicio)
+            if ' 200 ' not in lineas[0]:
+                errores.append(lineas[0])
+    finally:
+        escritor.close()
+
+
+async def _carga(url, solicitudes, concurrencia):
+    partes = urlsplit(url)
+    cola = asyncio.Queue()
+    for solicitud in solicitudes:
+        cola.put_nowait(solicitud)
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(_cliente(partes.hostname, partes.port, cola, latencias, errores)
+                           for _ in range(concurrencia)))
+    return latencias, errores, time.perf_counter() - inicio
+
+
+def _percentil(ordenadas, q):
+    return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))]
+
+
+def _levantar_servicio():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        puerto = s.getsockname()[1]
+    proceso = subprocess.Popen([sys.executable, '-m', 'muestreo.servicio', '--puerto', str(puerto)], cwd=RAIZ)
+    url = f'http://127.0.0.1:{puerto}'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + '/salud', timeout=1)
+            return proceso, url
+        except OSError:
+            time.sleep(0.1)
+    proceso.kill()
+    raise RuntimeError('El servicio no respondió')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga del servicio HTTP')
+    parser.add_argument('--url', default=None, help='Servicio ya en ejecución (por defecto se levanta uno local)')
+    parser.add_argument('--solicitudes', type=int, default=20_000)
+    parser.add_argument('--concurrencia', type=int, default=64)
+    parser.add_argument('--repetidos', type=float, default=0.5,
+                        help='Fracción de solicitudes con parámetros ya enviados (aciertos de caché)')
+    parser.add_argument('--json', default=None, help='Guardar resultados en un archivo JSON')
+    args = parser.parse_args(argv)
+
+    proceso = None
+    url = args.url
+    if url is None:
+        proceso, url = _levantar_servicio()
+    try:
+        solicitudes = generar_solicitudes(args.solicitudes, args.repetidos)
+        latencias, errores, segundos = asyncio.run(_carga(url, solicitudes, args.concurrencia))
+        metricas = json.load(urllib.request.urlopen(url + '/metricas'))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    ordenadas = sorted(latencias)
+    resultados = {
+        'solicitudes': len(latencias),
+        'concurrencia': args.concurrencia,
+        'errores': len(errores),
+        'segundos': segundos,
+        'solicitudes_por_segundo': len(latencias) / segundos,
+        'latencia_ms': {
+            'media': statistics.fmean(ordenadas) * 1000,
+            'p50': _percentil(ordenadas, 0.50) * 1000,
+            'p90': _percentil(ordenadas, 0.90) * 1000,
+            'p99': _percentil(ordenadas, 0.99) * 1000,
+            'max': ordenadas[-1] * 1000,
+        },
+        'servicio': metricas,
+    }
+
+    lat = resultados['latencia_ms']
+    print(f"{resultados['solicitudes']:,} solicitudes, {args.concurrencia} conexiones, {resultados['errores']} errores")
+    print(f"Rendimiento: {resultados['solicitudes_por_segundo']:,.0f} solicitudes/s")
+    print(f"Latencia (ms): p50 {lat['p50']:.2f} | p90 {lat['p90']:.2f} | p99 {lat['p99']:.2f} | máx {lat['max']:.2f}")
+    cache = metricas['cache']
+    print(f"Lotes: {metricas['lotes']:,} (promedio {cache['fallos'] / max(metricas['lotes'], 1):.1f} "
+          f"solicitudes/lote) | caché: {cache['tasa_aciertos']:.1%} aciertos")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,371 @@
+"""
+Suite de benchmarks: fórmulas, curvas, gráficos, exportación, páginas de la
+app e importación en frío.
+
+Cada caso se mide en ``--repeticiones`` series; en cada serie la llamada se
+repite hasta sumar al menos ``--tiempo-minimo`` segundos y se guarda el
+tiempo por llamada. Se reportan la mediana y el mínimo de las series.
+
+Los resultados se agregan a un historial JSON (una entrada por ejecución,
+con el commit de git, las versiones y la plataforma) y se comparan con la
+ejecución anterior o con ``--comparar <commit>``: los casos cuya mediana
+empeora más que ``--umbral`` se marcan como regresión.
+
+No necesita pantalla ni navegador (matplotlib usa Agg y las páginas se
+ejecutan con ``streamlit.testing``).
+
+Uso:
+    python benchmarks/rendimiento.py [--grupos motor curvas] [--filtro dif_medias]
+                                     [--filas 1000000] [--repeticiones 5]
+                                     [--historial benchmarks/historial.json]
+                                     [--comparar abc1234] [--umbral 0.2] [--fallar-si-regresion]
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from arranque import costo_importacion  # noqa: E402  (mismo directorio)
+
+GRUPOS = ('motor', 'curvas', 'graficos', 'exportacion', 'paginas', 'importacion')
+HISTORIAL = os.path.join(RAIZ, 'benchmarks', 'historial.json')
+FILAS = 1_000_000
+UMBRAL = 0.20
+
+MODULOS_IMPORTACION = [
+    'numpy', 'pandas', 'scipy.stats', 'matplotlib.figure', 'streamlit',
+    'muestreo', 'muestreo.motor', 'muestreo.potencia', 'muestreo.figuras', 'muestreo.api',
+]
+
+PAGINAS = [
+    ('📊 Por Tipo de Estimación', '📊 Estimación de una Media'),
+    ('📊 Por Tipo de Estimación', '📈 Estimación de una Proporción'),
+    ('📊 Por Tipo de Estimación', '🔄 Diferencia de Medias (2 grupos)'),
+    ('📊 Por Tipo de Estimación', '⚖️ Diferencia de Proporciones (2 grupos)'),
+    ('🎯 Por Tipo de Muestreo', '🎲 Muestreo Aleatorio Simple (MAS)'),
+    ('🎯 Por Tipo de Muestreo', '📊 Muestreo Estratificado'),
+    ('🎯 Por Tipo de Muestreo', '🏘️ Muestreo por Conglomerados'),
+    ('🎯 Por Tipo de Muestreo', '📏 Muestreo Sistemático'),
+    ('❓ Ayuda y Glosario', None),
+]
+
+
+# ==========================================
+# CASOS
+# ==========================================
+
+def casos_motor(filas, temporal):
+    """Cada fórmula con un escenario escalar y con ``filas`` escenarios vectorizados"""
+    import numpy as np
+    from muestreo import conglomerados, estratificado, motor, proporciones, seleccion, tablas
+
+    rng = np.random.default_rng(0)
+    sigma = rng.uniform(5, 30, filas)
+    error = rng.uniform(0.5, 3, filas)
+    p = rng.uniform(0.05, 0.95, filas)
+    e_p = rng.uniform(0.01, 0.1, filas)
+    N = rng.integers(100, 1_000_000, filas).astype(float)
+    delta = rng.uniform(1, 10, filas)
+    p2 = np.clip(p + rng.choice([-1, 1], filas) * rng.uniform(0.05, 0.2, filas), 0.01, 0.99)
+    icc = rng.uniform(0.01, 0.3, filas)
+    tam = rng.uniform(5, 100, filas)
+    n_mas = motor.n_media(sigma, error, 0.95, N)
+    N_h = rng.integers(50, 5_000, filas).astype(float)
+    sigma_h = rng.uniform(1, 20, filas)
+    # La búsqueda exacta con t no central es ~100 veces más cara: 1/10 de las filas
+    filas_t = max(filas // 10, 1)
+    tabla = []
+
+    def buscar_en_tabla():
+        # La tabla (~28 MB) se construye en el calentamiento, solo si el caso se mide
+        if not tabla:
+            tabla.append(tablas.TablaProporciones(tablas.construir(os.path.join(temporal, 'tablas')).parent))
+        return tabla[0].buscar(0.5, 0.05, 0.95, 5000)
+
+    return [
+        ('mas.escalar', lambda: motor.n_media(15.0, 2.0, 0.95, 5000)),
+        ('mas.vector', lambda: motor.n_media(sigma, error, 0.95, N)),
+        ('proporcion.escalar', lambda: motor.n_proporcion(0.5, 0.05, 0.95, 5000)),
+        ('proporcion.vector', lambda: motor.n_proporcion(p, e_p, 0.95, N)),
+        ('proporcion_tabla.escalar', buscar_en_tabla),
+        ('dif_medias_z.escalar', lambda: motor.n_dif_medias_z(5.0, 10.0, 0.05, 0.8)),
+        ('dif_medias_z.vector', lambda: motor.n_dif_medias_z(delta, 10.0, 0.05, 0.8)),
+        ('dif_medias_t.escalar', lambda: motor.n_dif_medias_t(5.0, 10.0, 0.05, 0.8)),
+        (f'dif_medias_t.vector_{filas_t}', lambda: motor.n_dif_medias_t(delta[:filas_t], 10.0, 0.05, 0.8)),
+        ('dif_proporciones.escalar', lambda: motor.n_dif_proporciones(0.3, 0.45)),
+        ('dif_proporciones.vector', lambda: motor.n_dif_proporciones(p, p2)),
+        # Tamaño exacto por enumeración (~1600 por grupo); Barnard sin su caché de regiones
+        ('dif_proporciones_fisher.escalar', lambda: proporciones.n_dif_proporciones(0.5, 0.45, metodo='fisher')),
+        ('dif_proporciones_barnard.escalar', lambda: (
+            proporciones._region_barnard.cache_clear(),
+            proporciones.n_dif_proporciones(0.5, 0.45, metodo='barnard'))),
+        ('estratificado.escalar', lambda: estratificado.asignar(
+            estratificado.n_total_estratificado([3000, 2000, 1000], [5, 10, 20], 1.0, 0.95, "Óptima de Neyman"),
+            [3000, 2000, 1000], [5, 10, 20], "Óptima de Neyman", n_min=2)),
+        ('estratificado.vector', lambda: estratificado.asignar(
+            estratificado.n_total_estratificado(N_h, sigma_h, 0.05, 0.95, "Óptima de Neyman"),
+            N_h, sigma_h, "Óptima de Neyman", n_min=2)),
+        ('conglomerados.escalar', lambda: conglomerados.diseno_dos_etapas(385, 50, 0.05, 0.3, fraccion_submuestreo=0.5)),
+        ('conglomerados.vector', lambda: motor.redondear_n(
+            n_mas * conglomerados.deff_tamano_variable(tam, icc, 0.3) / tam)),
+        ('sistematico.escalar', lambda: seleccion.SeleccionSistematica(100_000, 384, semilla=1).primeras(20)),
+        ('sistematico.vector', lambda: motor.intervalo_sistematico(N, n_mas)),
+    ]
+
+
+def casos_curvas():
+    """Curvas que alimentan los gráficos y las exportaciones"""
+    from muestreo import motor, potencia
+
+    z = float(motor.z_critico(0.95))
+    return [
+        ('n_proporcion.100', lambda: motor.curva_n_proporcion(z, 0.05, 0, 100)),
+        ('n_proporcion.1e6', lambda: motor.curva_n_proporcion(z, 0.05, 5000, 1_000_000)),
+        ('potencia_normal.1e5', lambda: potencia.curva_potencia(1.5, 10, 10, 64, 0.05, True, 'normal', 100_000)),
+        ('potencia_t.1000', lambda: potencia.curva_potencia(1.5, 10, 10, 64, 0.05, True, 't', 1000)),
+        ('potencia_t.1e5', lambda: potencia.curva_potencia(1.5, 10, 10, 64, 0.05, True, 't', 100_000)),
+    ]
+
+
+def casos_graficos(temporal):
+    """Dibujo completo con matplotlib (sin caché) y aciertos de la caché de imágenes en memoria y en disco"""
+    import numpy as np
+    from muestreo import cache_disco, estratificado, figuras, motor
+
+    z = float(motor.z_critico(0.95))
+    frontera = estratificado.frontera_costo_varianza([3000, 2000, 1000], [5, 10, 20], [1, 2, 4])
+    presupuestos, errores = np.asarray(frontera['presupuesto']), np.asarray(frontera['error'])
+    figuras.grafico_efecto_p(z, 0.05, 0, 0.5, 385)
+    disco = cache_disco.CacheDisco(os.path.join(temporal, 'cache.sqlite'))
+    clave_disco = ('efecto_p', z, 0.05, 0.0, 0.5, 385, 'png')
+    disco.obtener('figura', clave_disco, lambda: figuras._dibujar_efecto_p(z, 0.05, 0, 0.5, 385, 'png'))
+    return [
+        ('efecto_p.png', lambda: figuras._dibujar_efecto_p(z, 0.05, 0, 0.5, 385, 'png')),
+        ('efecto_p.svg', lambda: figuras._dibujar_efecto_p(z, 0.05, 0, 0.5, 385, 'svg')),
+        ('curva_potencia_t.png', lambda: figuras._dibujar_curva_potencia(5, 10, 64, 0.05, True, 't', 0.8, 1000, 'png')),
+        ('frontera.png', lambda: figuras._dibujar_frontera(presupuestos, errores, None, 'png')),
+        ('cache.acierto', lambda: figuras.grafico_efecto_p(z, 0.05, 0, 0.5, 385)),
+        ('cache_disco.acierto', lambda: disco.obtener('figura', clave_disco, None)),
+    ]
+
+
+def casos_exportacion(filas):
+    """Excel de una fila (botones de la app) y tablas grandes en Excel/CSV/Parquet"""
+    import numpy as np
+    import pandas as pd
+    from muestreo import exportacion
+
+    rng = np.random.default_rng(0)
+    pequena = pd.DataFrame([{'Método': 'MAS', 'N': 5000, 'n': 357, 'Confianza': 0.95, 'Error': 2.0}])
+    filas_excel = min(filas, 100_000)  # xlsxwriter escribe celda a celda
+    grande = pd.DataFrame({
+        'sigma': rng.uniform(5, 30, filas), 'error': rng.uniform(0.5, 3, filas),
+        'N': rng.integers(100, 1_000_000, filas), 'n': rng.integers(1, 5000, filas),
+        'valido': rng.random(filas) > 0.01,
+    })
+
+    def escribir(escritor, datos, **kwargs):
+        return lambda: escritor(datos, io.BytesIO(), **kwargs)
+
+    return [
+        ('excel.1_fila', escribir(exportacion.escribir_excel, {'Resultados': pequena})),
+        ('excel.informe_3_hojas', escribir(exportacion.escribir_excel, {
+            'Parámetros': {'Confianza': 0.95, 'Error': 2.0}, 'Resultados': pequena, 'Curva': grande.iloc[:1000]})),
+        (f'excel.{filas_excel}_filas', escribir(exportacion.escribir_excel, {'Resultados': grande.iloc[:filas_excel]})),
+        (f'csv.{filas}_filas', escribir(exportacion.escribir, grande, formato='csv')),
+        (f'parquet.{filas}_filas', escribir(exportacion.escribir, grande, formato='parquet')),
+    ]
+
+
+def casos_paginas():
+    """Re-ejecución completa (en caliente) de cada página de la app"""
+    from streamlit.testing.v1 import AppTest
+
+    casos = []
+    for modulo, submodulo in PAGINAS:
+        at = AppTest.from_file(os.path.join(RAIZ, 'app.py'), default_timeout=120)
+        at.run()
+        at.sidebar.radio[0].set_value(modulo).run()
+        if submodulo:
+            at.selectbox[0].set_value(submodulo).run()
+        if at.exception:
+            raise RuntimeError(f"La página {submodulo or modulo} falló: {at.exception[0].message}")
+        casos.append((submodulo or modulo, at.run))
+    return casos
+
+
+# ==========================================
+# MEDICIÓN
+# ==========================================
+
+def medir(funcion, repeticiones, tiempo_minimo):
+    """Segundos por llamada: (mediana, mínimo) de ``repeticiones`` series"""
+    funcion()  # calentamiento: importaciones perezosas y cachés de scipy
+    series = []
+    for _ in range(repeticiones):
+        llamadas, inicio = 0, time.perf_counter()
+        while True:
+            funcion()
+            llamadas += 1
+            transcurrido = time.perf_counter() - inicio
+            if transcurrido >= tiempo_minimo:
+                break
+        series.append(transcurrido / llamadas)
+    return statistics.median(series), min(series)
+
+
+def medir_importacion(modulo, repeticiones):
+    """Importación en frío (proceso nuevo) con ``-X importtime``"""
+    series = [costo_importacion(modulo) / 1e6 for _ in range(repeticiones)]
+    return statistics.median(series), min(series)
+
+
+def ejecutar(grupos, filtro, filas, repeticiones, tiempo_minimo):
+    # Tablas precalculadas y caché en disco de los casos: se borran al terminar
+    with tempfile.TemporaryDirectory(prefix='muestreo-bench-') as temporal:
+        return _ejecutar(grupos, filtro, filas, repeticiones, tiempo_minimo, temporal)
+
+
+def _ejecutar(grupos, filtro, filas, repeticiones, tiempo_minimo, temporal):
+    constructores = {
+        'motor': lambda: casos_motor(filas, temporal),
+        'curvas': casos_curvas,
+        'graficos': lambda: casos_graficos(temporal),
+        'exportacion': lambda: casos_exportacion(filas),
+        'paginas': casos_paginas,
+    }
+    resultados = {}
+    for grupo in grupos:
+        if grupo == 'importacion':
+            casos = [(modulo, None) for modulo in MODULOS_IMPORTACION]
+        else:
+            casos = constructores[grupo]()
+        for nombre, funcion in casos:
+            clave = f'{grupo}/{nombre}'
+            if filtro and filtro not in clave:
+                continue
+            if funcion is None:
+                mediana, minimo = medir_importacion(nombre, repeticiones)
+            else:
+                mediana, minimo = medir(funcion, repeticiones, tiempo_minimo)
+            resultados[clave] = {'mediana': mediana, 'minimo': minimo}
+            print(f"{clave:<58}{_formato_tiempo(mediana):>12}{_formato_tiempo(minimo):>12}", flush=True)
+    return resultados
+
+
+# ==========================================
+# HISTORIAL Y COMPARACIÓN
+# ==========================================
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def entorno():
+    """Commit, versiones y máquina en que se midió"""
+    import matplotlib
+    import numpy
+    import pandas
+    import scipy
+
+    return {
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'modificado': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'fecha': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'scipy': scipy.__version__,
+        'pandas': pandas.__version__,
+        'matplotlib': matplotlib.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def leer_historial(ruta):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def comparar(actual, referencia, umbral):
+    """Casos cuya mediana cambió más que ``umbral`` respecto de la referencia: (clave, razón)"""
+    cambios = []
+    for clave, medida in actual.items():
+        anterior = referencia.get(clave)
+        if anterior and anterior['mediana'] > 0:
+            razon = medida['mediana'] / anterior['mediana']
+            if abs(razon - 1) > umbral:
+                cambios.append((clave, razon))
+    return cambios
+
+
+def _formato_tiempo(segundos):
+    if segundos >= 1:
+        return f"{segundos:.2f} s"
+    if segundos >= 1e-3:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos * 1e6:.1f} µs"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Suite de benchmarks de la calculadora')
+    parser.add_argument('--grupos', nargs='+', choices=GRUPOS, default=list(GRUPOS))
+    parser.add_argument('--filtro', default=None, help='Solo casos cuyo nombre contenga este texto')
+    parser.add_argument('--filas', type=int, default=FILAS, help='Escenarios de los casos vectorizados')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--tiempo-minimo', type=float, default=0.2, help='Segundos mínimos por serie')
+    parser.add_argument('--historial', default=HISTORIAL, help='Archivo JSON donde se acumulan las ejecuciones')
+    parser.add_argument('--sin-historial', action='store_true', help='No guardar esta ejecución')
+    parser.add_argument('--comparar', default=None, help='Commit de referencia (por defecto, la ejecución anterior)')
+    parser.add_argument('--umbral', type=float, default=UMBRAL, help='Cambio relativo que se reporta (0.2 = 20%%)')
+    parser.add_argument('--fallar-si-regresion', action='store_true', help='Salir con código 1 si hay regresiones')
+    args = parser.parse_args(argv)
+
+    print(f"{'Caso':<58}{'Mediana':>12}{'Mínimo':>12}")
+    resultados = ejecutar(args.grupos, args.filtro, args.filas, args.repeticiones, args.tiempo_minimo)
+
+    historial = leer_historial(args.historial)
+    ejecucion = {**entorno(), 'filas': args.filas, 'resultados': resultados}
+
+    # Referencia: la última ejecución del commit pedido (o la última registrada) con las mismas filas
+    candidatas = [h for h in historial if h.get('filas') == args.filas
+                  and (args.comparar is None or h.get('commit') == args.comparar)]
+    regresiones = []
+    if candidatas:
+        referencia = candidatas[-1]
+        cambios = comparar(resultados, referencia['resultados'], args.umbral)
+        print(f"\nComparación con {referencia.get('commit')} ({referencia.get('fecha')}), umbral ±{args.umbral:.0%}:")
+        for clave, razon in sorted(cambios, key=lambda c: -c[1]):
+            print(f"  {'REGRESIÓN' if razon > 1 else 'mejora   '}  {clave:<58}×{razon:.2f}")
+        if not cambios:
+            print("  sin cambios significativos")
+        regresiones = [c for c in cambios if c[1] > 1]
+    elif args.comparar:
+        print(f"\nNo hay ejecuciones del commit {args.comparar} con {args.filas:,} filas en {args.historial}")
+
+    if not args.sin_historial:
+        historial.append(ejecucion)
+        with open(args.historial, 'w', encoding='utf-8') as f:
+            json.dump(historial, f, ensure_ascii=False, indent=1)
+        print(f"\nResultados agregados a {args.historial} ({len(historial)} ejecuciones)")
+    return 1 if regresiones and args.fallar_si_regresion else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
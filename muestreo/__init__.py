@@ -0,0 +1,53 @@
+"""
+Paquete de cálculo de la Calculadora Avanzada de Tamaño de Muestra.
+
+Contiene la lógica estadística independiente de la interfaz Streamlit
+(``app.py``), de modo que pueda reutilizarse en procesos por lotes.
+
+Las funciones públicas se cargan al primer acceso (``muestreo.n_media``)
+para que importar el paquete no arrastre scipy.
+"""
+_FUNCIONES = {
+    'z_critico': 'motor',
+    'z_alfa': 'motor',
+    'z_beta': 'motor',
+    'n0_media': 'motor',
+    'n0_proporcion': 'motor',
+    'ajuste_fpc': 'motor',
+    'redondear_n': 'motor',
+    'n_media': 'motor',
+    'n_proporcion': 'motor',
+    'curva_n_proporcion': 'motor',
+    'n_dif_medias_z': 'motor',
+    'n_dif_medias_t': 'motor',
+    'n_dif_proporciones': 'motor',
+    'd_cohen': 'motor',
+    'deff_conglomerados': 'motor',
+    'n_conglomerados': 'motor',
+    'intervalo_sistematico': 'motor',
+    'pesos_asignacion': 'estratificado',
+    'n_total_estratificado': 'estratificado',
+    'asignar': 'estratificado',
+    'redondeo_mayor_resto': 'estratificado',
+    'asignacion_optima_costos': 'estratificado',
+    'frontera_costo_varianza': 'estratificado',
+    'asignacion_multivariada': 'estratificado',
+    'deff_tamano_variable': 'conglomerados',
+    'diseno_dos_etapas': 'conglomerados',
+    'probabilidades_inclusion': 'conglomerados',
+    'seleccionar_pps': 'conglomerados',
+    'seleccionar_pps_marco': 'conglomerados',
+    'simular': 'simulacion',
+    'calcular': 'api',
+    'calcular_varias': 'api',
+}
+
+__all__ = list(_FUNCIONES)
+
+
+def __getattr__(nombre):
+    if nombre in _FUNCIONES:
+        from importlib import import_module
+        modulo = import_module(f'.{_FUNCIONES[nombre]}', __name__)
+        return getattr(modulo, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -0,0 +1,4 @@
+"""Permite ejecutar ``python -m muestreo``"""
+from .cli import main
+
+raise SystemExit(main())
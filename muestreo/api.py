@@ -0,0 +1,349 @@
+"""
+API de cálculo sin interfaz: una función por calculadora de la app.
+
+Cada función recibe parámetros simples y devuelve un diccionario con tipos
+nativos de Python, listo para serializar a JSON o a una fila CSV:
+
+    >>> from muestreo import api
+    >>> api.calcular('proporcion', error=0.05, N=5000)['n']
+    357
+"""
+import inspect
+
+import numpy as np
+
+from . import cache_disco, conglomerados, estratificado, motor, proporciones
+
+# Alias sin acentos para los métodos de asignación
+_METODOS = {
+    'proporcional': 'Proporcional',
+    'neyman': 'Óptima de Neyman',
+    'costos': 'Óptima con costos',
+    'igual': 'Igual',
+}
+
+
+def _a_python(valor):
+    """Convierte escalares y arreglos de NumPy a tipos nativos"""
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def _resultado(**campos):
+    return {clave: _a_python(valor) for clave, valor in campos.items()}
+
+
+def _validar(condicion, mensaje):
+    if not condicion:
+        raise ValueError(mensaje)
+
+
+def _como_fraccion(confianza):
+    """Confianza como fracción: acepta porcentajes (95 → 0.95), como ``lotes.calcular_lote``"""
+    confianza = np.asarray(confianza, dtype=float)
+    return np.where(confianza > 1, confianza / 100, confianza)[()]
+
+
+def _confianza(confianza):
+    confianza = float(_como_fraccion(confianza))
+    _validar(0 < confianza < 1, "confianza debe estar entre 0 y 1 (o entre 1 y 100 en porcentaje)")
+    return confianza
+
+
+def _validar_N(N, nombre='N'):
+    _validar(N is None or N >= 0, f"{nombre} no puede ser negativo")
+
+
+def _metodo_asignacion(metodo):
+    if metodo in estratificado.METODOS_ASIGNACION:
+        return metodo
+    try:
+        return _METODOS[str(metodo).lower()]
+    except KeyError:
+        raise ValueError(f"Método de asignación desconocido: {metodo}") from None
+
+
+# ==========================================
+# CALCULADORAS
+# ==========================================
+
+def calcular_media(sigma, error, confianza=0.95, N=0):
+    """Estimación de una media (MAS) con corrección por población finita si N > 0"""
+    _validar(sigma > 0 and error > 0, "sigma y error deben ser positivos")
+    _validar_N(N)
+    z = float(motor.z_critico(_confianza(confianza)))
+    n0 = float(motor.n0_media(z, sigma, error))
+    n = int(motor.redondear_n(motor.ajuste_fpc(n0, N)))
+    return _resultado(z=z, n0=n0, n=n, aplica_fpc=bool(N and N > 0))
+
+
+def calcular_proporcion(error, p=0.5, confianza=0.95, N=0):
+    """Estimación de una proporción (MAS) con corrección por población finita si N > 0"""
+    _validar(0 < p < 1 and error > 0, "p debe estar entre 0 y 1 y error debe ser positivo")
+    _validar_N(N)
+    z = float(motor.z_critico(_confianza(confianza)))
+    n0 = float(motor.n0_proporcion(z, p, error))
+    n = int(motor.redondear_n(motor.ajuste_fpc(n0, N)))
+    return _resultado(z=z, n0=n0, n=n, aplica_fpc=bool(N and N > 0))
+
+
+def calcular_mas(error, sigma=None, p=None, confianza=0.95, N=0):
+    """MAS para media (con ``sigma``) o proporción (con ``p``, 0.5 si no se indica)"""
+    if sigma is not None:
+        return calcular_media(sigma, error, confianza, N)
+    return calcular_proporcion(error, 0.5 if p is None else p, confianza, N)
+
+
+def calcular_dif_medias(delta, sigma, alpha=0.05, potencia=0.80, bilateral=True, distribucion='t'):
+    """n por grupo para comparar dos medias (t exacta o aproximación normal)"""
+    _validar(np.isfinite(delta) and np.isfinite(sigma) and delta != 0 and sigma > 0,
+             "delta debe ser finito y distinto de 0 y sigma positivo")
+    _validar(0 < alpha < 1 and 0 < potencia < 1, "alpha y potencia deben estar entre 0 y 1")
+    if distribucion == 't':
+        n = int(motor.n_dif_medias_t(delta, sigma, alpha, potencia, bilateral))
+    elif distribucion == 'normal':
+        n = int(motor.n_dif_medias_z(delta, sigma, alpha, potencia, bilateral))
+    else:
+        raise ValueError(f"Distribución desconocida: {distribucion}")
+    n = max(n, 3)
+    return _resultado(n_por_grupo=n, n_total=2 * n, d_cohen=float(motor.d_cohen(delta, sigma)))
+
+
+def calcular_dif_proporciones(p1, p2, alpha=0.05, potencia=0.80, bilateral=True, metodo='normal'):
+    """n por grupo para comparar dos proporciones (normal, fleiss, arcoseno, fisher o barnard)"""
+    _validar(0 < p1 < 1 and 0 < p2 < 1 and p1 != p2, "p1 y p2 deben ser distintas y estar entre 0 y 1")
+    _validar(0 < alpha < 1 and 0 < potencia < 1, "alpha y potencia deben estar entre 0 y 1")
+    n = int(proporciones.n_dif_proporciones(p1, p2, alpha, potencia, bilateral, metodo))
+    return _resultado(n_por_grupo=n, n_total=2 * n)
+
+
+def calcular_estratificado(N_h, sigma_h, error=None, confianza=0.95, metodo='Proporcional', costo_h=None,
+                           presupuesto=None, costo_fijo=0.0, n_min=2, n_max=None):
+    """
+    Muestreo estratificado: n total y asignación entera por estrato.
+
+    Con ``metodo='costos'`` se fija el ``error`` o el ``presupuesto``.
+    """
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.asarray(sigma_h, dtype=float)
+    costo_h = np.ones_like(N_h) if costo_h is None else np.asarray(costo_h, dtype=float)
+    metodo = _metodo_asignacion(metodo)
+    _validar(np.all(N_h >= 0) and N_h.sum() > 0, "N_h no puede ser negativo y debe sumar más de 0")
+    confianza = _confianza(confianza)
+
+    if metodo == 'Óptima con costos':
+        optimo = estratificado.asignacion_optima_costos(
+            N_h, sigma_h, costo_h, presupuesto=presupuesto, error=None if presupuesto is not None else error,
+            confianza=confianza, costo_fijo=costo_fijo, n_min=n_min, n_max=n_max
+        )
+        return _resultado(n=optimo['n'], n_h=optimo['n_h'], costo=optimo['costo'],
+                          error_alcanzado=optimo['error'], factible=optimo['factible'])
+
+    if error is None:
+        raise ValueError("Se requiere el error máximo (error)")
+    n_total = estratificado.n_total_estratificado(N_h, sigma_h, error, confianza, metodo, costo_h)
+    n_h = estratificado.asignar(n_total, N_h, sigma_h, metodo, costo_h, n_min=n_min, n_max=n_max)
+    return _resultado(n=int(n_h.sum()), n_h=n_h)
+
+
+def calcular_conglomerados(error, tam_prom, icc, sigma=None, p=None, confianza=0.95, M_total=None, cv_tamano=0.0,
+                           m=None, fraccion_submuestreo=None, costo_conglomerado=None, costo_elemento=None):
+    """Conglomerados en una o dos etapas (media con ``sigma`` o proporción con ``p``)"""
+    p = 0.5 if p is None else p
+    _validar(error > 0 and (sigma > 0 if sigma is not None else 0 < p < 1),
+             "error y sigma deben ser positivos y p debe estar entre 0 y 1")
+    _validar(tam_prom > 0 and 0 <= icc <= 1, "tam_prom debe ser positivo e icc estar entre 0 y 1")
+    _validar_N(M_total, 'M_total')
+    z = motor.z_critico(_confianza(confianza))
+    if sigma is not None:
+        n_mas = motor.n0_media(z, sigma, error)
+    else:
+        n_mas = motor.n0_proporcion(z, p, error)
+    diseno = conglomerados.diseno_dos_etapas(
+        float(n_mas), tam_prom, icc, cv_tamano, m=m, fraccion_submuestreo=fraccion_submuestreo,
+        costo_conglomerado=costo_conglomerado, costo_elemento=costo_elemento, M_total=M_total
+    )
+    return _resultado(n_mas=float(n_mas), **diseno)
+
+
+def calcular_sistematico(N, n, metodo='lineal', semilla=None, primeras=20):
+    """Intervalo, arranque y primeras posiciones de una selección sistemática"""
+    from .seleccion import SeleccionSistematica
+    seleccion = SeleccionSistematica(N, n, metodo, semilla)
+    return _resultado(k=seleccion.k, inicio=seleccion.inicio, n_efectivo=seleccion.n_efectivo,
+                      posiciones=seleccion.primeras(primeras))
+
+
+CALCULADORAS = {
+    'media': calcular_media,
+    'proporcion': calcular_proporcion,
+    'mas': calcular_mas,
+    'dif_medias': calcular_dif_medias,
+    'dif_proporciones': calcular_dif_proporciones,
+    'estratificado': calcular_estratificado,
+    'conglomerados': calcular_conglomerados,
+    'sistematico': calcular_sistematico,
+}
+
+# Columnas de la salida CSV (unión de los campos de todas las calculadoras)
+CAMPOS_RESULTADO = (
+    'z', 'n0', 'n', 'aplica_fpc', 'n_por_grupo', 'n_total', 'd_cohen', 'n_h', 'costo', 'error_alcanzado',
+    'factible', 'n_mas', 'm', 'deff', 'a', 'k', 'inicio', 'n_efectivo', 'posiciones',
+)
+
+
+def _calculadora(calculadora):
+    try:
+        return CALCULADORAS[calculadora]
+    except KeyError:
+        raise ValueError(f"Calculadora desconocida: '{calculadora}'. Usa una de {', '.join(CALCULADORAS)}") from None
+
+
+def memorizable(calculadora, parametros):
+    """Si el resultado depende solo de los parámetros (el sistemático sin semilla es aleatorio)"""
+    return not (calculadora == 'sistematico' and parametros.get('semilla') is None)
+
+
+def _ejecutar(calculadora, parametros):
+    funcion = _calculadora(calculadora)
+    try:
+        return funcion(**parametros)
+    except TypeError as e:
+        raise ValueError(f"Parámetros inválidos para '{calculadora}': {e}") from None
+
+
+def calcular(calculadora, **parametros):
+    """Ejecuta la calculadora indicada con sus parámetros (a través de ``cache_disco`` si está configurada)"""
+    _calculadora(calculadora)
+    if not memorizable(calculadora, parametros):
+        return _ejecutar(calculadora, parametros)
+    return cache_disco.obtener(f'api.{calculadora}', parametros, lambda: _ejecutar(calculadora, parametros))
+
+
+# ==========================================
+# VARIAS SOLICITUDES EN UNA LLAMADA
+# ==========================================
+
+def _filas(**columnas):
+    """Transpone columnas de resultados en una lista de diccionarios"""
+    nombres = list(columnas)
+    return [_resultado(**dict(zip(nombres, valores))) for valores in zip(*(np.asarray(c).tolist() for c in columnas.values()))]
+
+
+def _varias_mas(c, n0_de):
+    confianza = _como_fraccion(c['confianza'])
+    validas = (confianza > 0) & (confianza < 1) & (c['N'] >= 0)
+    z = motor.z_critico(np.where(validas, confianza, 0.95))
+    n0 = n0_de(z)
+    validas &= np.isfinite(n0) & (n0 > 0)
+    n = motor.redondear_n(np.where(validas, motor.ajuste_fpc(n0, c['N']), 1))
+    return _filas(z=z, n0=n0, n=n, aplica_fpc=c['N'] > 0), validas
+
+
+def _varias_media(c):
+    validas = (c['sigma'] > 0) & (c['error'] > 0)
+    filas, finitas = _varias_mas(c, lambda z: motor.n0_media(z, c['sigma'], c['error']))
+    return filas, validas & finitas
+
+
+def _varias_proporcion(c):
+    validas = (c['p'] > 0) & (c['p'] < 1) & (c['error'] > 0)
+    filas, finitas = _varias_mas(c, lambda z: motor.n0_proporcion(z, c['p'], c['error']))
+    return filas, validas & finitas
+
+
+def _varias_dif_medias(c):
+    validas = (np.isfinite(c['delta']) & np.isfinite(c['sigma']) & (c['delta'] != 0) & (c['sigma'] > 0)
+               & (c['alpha'] > 0) & (c['alpha'] < 1) & (c['potencia'] > 0) & (c['potencia'] < 1)
+               & np.isin(c['distribucion'], ['t', 'normal']))
+    usar_t = c['distribucion'] == 't'
+    # Las filas inválidas se resuelven con valores neutros y luego se descartan
+    delta = np.where(validas, c['delta'], 1.0)
+    sigma = np.where(validas, c['sigma'], 1.0)
+    alpha = np.where(validas, c['alpha'], 0.05)
+    potencia = np.where(validas, c['potencia'], 0.8)
+    n = np.ones(delta.shape, dtype=np.int64)
+    for mascara, funcion in ((usar_t, motor.n_dif_medias_t), (~usar_t, motor.n_dif_medias_z)):
+        if mascara.any():
+            n[mascara] = funcion(delta[mascara], sigma[mascara], alpha[mascara],
+                                 potencia[mascara], c['bilateral'][mascara].astype(bool))
+    n = np.maximum(n, 3)
+    return _filas(n_por_grupo=n, n_total=2 * n, d_cohen=motor.d_cohen(delta, sigma)), validas
+
+
+def _varias_dif_proporciones(c):
+    p1, p2 = c['p1'], c['p2']
+    validas = ((p1 > 0) & (p1 < 1) & (p2 > 0) & (p2 < 1) & (p1 != p2)
+               & (c['alpha'] > 0) & (c['alpha'] < 1) & (c['potencia'] > 0) & (c['potencia'] < 1))
+    # Los métodos exactos (y los desconocidos) se resuelven fila por fila
+    validas &= np.isin(c['metodo'], ['normal', 'fleiss', 'arcoseno'])
+    p1 = np.where(validas, p1, 0.3)
+    p2 = np.where(validas, p2, 0.5)
+    alpha = np.where(validas, c['alpha'], 0.05)
+    potencia = np.where(validas, c['potencia'], 0.8)
+    bilateral = c['bilateral'].astype(bool)
+    n = np.ones(p1.shape, dtype=np.int64)
+    for metodo in np.unique(c['metodo'][validas]):
+        mascara = validas & (c['metodo'] == metodo)
+        n[mascara] = proporciones.n_dif_proporciones(p1[mascara], p2[mascara], alpha[mascara],
+                                                     potencia[mascara], bilateral[mascara], metodo)
+    return _filas(n_por_grupo=n, n_total=2 * n), validas
+
+
+_VARIAS = {
+    'media': _varias_media,
+    'proporcion': _varias_proporcion,
+    'dif_medias': _varias_dif_medias,
+    'dif_proporciones': _varias_dif_proporciones,
+}
+
+
+def calcular_varias(calculadora, lista_parametros):
+    """
+    Ejecuta varias solicitudes de la misma calculadora.
+
+    Media, proporción y comparaciones de dos grupos se resuelven en una
+    sola llamada vectorizada; el resto (y las filas con parámetros
+    inválidos) fila por fila. Devuelve, por solicitud, el diccionario de
+    resultados o la excepción producida.
+    """
+    lista_parametros = list(lista_parametros)
+    try:
+        funcion = _calculadora(calculadora)
+    except ValueError as e:
+        return [e] * len(lista_parametros)
+
+    salidas = [None] * len(lista_parametros)
+    if calculadora in _VARIAS:
+        firma = inspect.signature(funcion)
+        indices, argumentos = [], []
+        for i, parametros in enumerate(lista_parametros):
+            try:
+                ligados = firma.bind(**parametros)
+            except TypeError:
+                continue
+            ligados.apply_defaults()
+            indices.append(i)
+            argumentos.append(ligados.arguments)
+        if indices:
+            try:
+                columnas = {nombre: np.asarray([a[nombre] for a in argumentos]) for nombre in firma.parameters}
+                with np.errstate(divide='ignore', invalid='ignore'):  # filas inválidas se descartan
+                    filas, validas = _VARIAS[calculadora](columnas)
+            except (TypeError, ValueError):
+                filas, validas = None, None
+            if filas is not None:
+                for i, fila, valida in zip(indices, filas, validas):
+                    if valida:
+                        salidas[i] = fila
+
+    for i, parametros in enumerate(lista_parametros):
+        if salidas[i] is None:
+            try:
+                salidas[i] = _ejecutar(calculadora, parametros)
+            except Exception as e:
+                salidas[i] = e
+    return salidas
@@ -0,0 +1,328 @@
+"""
+Caché persistente en disco (SQLite) compartida entre procesos y reinicios.
+
+Guarda resultados del motor, curvas, imágenes renderizadas y bytes de
+exportación para que varias réplicas de la app (o del servicio) detrás de
+un balanceador los reutilicen aunque se reinicien. Es un segundo nivel: las
+cachés en memoria (``st.cache_data``, ``figuras.cache_figuras``, la LRU del
+servicio) se consultan primero y solo sus fallos llegan al disco.
+
+- Clave: SHA-256 del JSON canónico de (espacio, huella del código,
+  parámetros). Los arreglos de numpy entran por dtype, forma y hash de sus
+  bytes. La huella del código del paquete invalida todo al cambiar el motor.
+- Desalojo: las entradas caducan a los ``ttl`` segundos y, si el archivo
+  supera ``max_bytes``, se borran las de uso más antiguo.
+- Concurrencia: SQLite en modo WAL (lectores sin bloqueo, un escritor a la
+  vez), una conexión por hilo y por proceso. Un error de SQLite nunca
+  interrumpe un cálculo: se trata como fallo de caché.
+- Estadísticas: aciertos y fallos por espacio, del proceso y acumulados en
+  el archivo (todas las réplicas).
+
+Los valores se guardan con pickle: el archivo debe ser local y de confianza.
+
+Variables de entorno:
+    MUESTREO_CACHE_DISCO        ruta del archivo SQLite (sin ella la caché está desactivada)
+    MUESTREO_CACHE_DISCO_MB     tamaño máximo en MB (por defecto 512)
+    MUESTREO_CACHE_DISCO_TTL    vida de cada entrada en segundos (por defecto 30 días; 0 = sin caducidad)
+"""
+import atexit
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+MAX_MB = 512
+TTL = 30 * 24 * 3600
+FRACCION_ENTRADA = 1 / 8    # ninguna entrada puede ocupar más que esta fracción del máximo
+CADA_ESCRITURAS = 64        # cada cuántas escrituras se revisa el tamaño y se guardan los contadores
+REFRESCO_USO = 60.0         # segundos antes de volver a anotar el uso de una entrada leída
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS entradas (
+    clave   TEXT PRIMARY KEY,
+    espacio TEXT NOT NULL,
+    valor   BLOB NOT NULL,
+    bytes   INTEGER NOT NULL,
+    creada  REAL NOT NULL,
+    usada   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entradas_usada ON entradas (usada);
+CREATE TABLE IF NOT EXISTS contadores (
+    espacio  TEXT PRIMARY KEY,
+    aciertos INTEGER NOT NULL DEFAULT 0,
+    fallos   INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+# ==========================================
+# CLAVES CANÓNICAS
+# ==========================================
+
+@functools.lru_cache(maxsize=None)
+def huella_codigo():
+    """Hash del código fuente del paquete: un cambio en el motor invalida la caché"""
+    h = hashlib.sha256()
+    for archivo in sorted(Path(__file__).parent.glob('*.py')):
+        h.update(archivo.name.encode())
+        h.update(archivo.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _canonico(valor):
+    """Tipos que json no serializa: numpy, bytes y conjuntos"""
+    if hasattr(valor, 'dtype') and hasattr(valor, 'tobytes'):
+        if getattr(valor, 'ndim', 0) == 0:
+            return valor.item()
+        return {'ndarray': str(valor.dtype), 'forma': list(valor.shape),
+                'sha256': hashlib.sha256(valor.tobytes()).hexdigest()}
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return {'bytes': hashlib.sha256(valor).hexdigest()}
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor, key=repr)
+    raise TypeError(f"No se puede usar {type(valor).__name__} en una clave de caché")
+
+
+def clave(espacio, partes):
+    """Clave canónica de ``partes`` (cualquier estructura JSON, con numpy) dentro de ``espacio``"""
+    texto = json.dumps([espacio, huella_codigo(), partes], sort_keys=True, separators=(',', ':'),
+                       default=_canonico, ensure_ascii=False)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+# ==========================================
+# CACHÉ
+# ==========================================
+
+class CacheDisco:
+    """Caché clave → valor en un archivo SQLite, con TTL, tamaño máximo y contadores"""
+
+    def __init__(self, ruta, max_bytes=MAX_MB * 1024 * 1024, ttl=TTL):
+        self.ruta = str(ruta)
+        self.max_bytes = int(max_bytes)
+        self.max_entrada = int(self.max_bytes * FRACCION_ENTRADA)
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._local = threading.local()
+        self._heredadas = []
+        self._lock = threading.Lock()
+        self._aciertos = {}
+        self._fallos = {}
+        self._pendientes = {}
+        self._escrituras = 0
+        self.errores = 0
+        Path(self.ruta).parent.mkdir(parents=True, exist_ok=True)
+        self._conexion().executescript(_ESQUEMA)
+
+    def _conexion(self):
+        """Conexión de este hilo; tras un fork se abre otra (SQLite no admite compartirla)"""
+        con = getattr(self._local, 'con', None)
+        if con is not None and self._local.pid == os.getpid():
+            return con
+        if con is not None:
+            self._heredadas.append(con)  # no se cierra: pertenece al proceso padre
+        con = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        con.execute('PRAGMA journal_mode=WAL')
+        con.execute('PRAGMA synchronous=NORMAL')
+        self._local.con = con
+        self._local.pid = os.getpid()
+        return con
+
+    def _contar(self, espacio, acierto):
+        with self._lock:
+            contador = self._aciertos if acierto else self._fallos
+            contador[espacio] = contador.get(espacio, 0) + 1
+            pendiente = self._pendientes.setdefault(espacio, [0, 0])
+            pendiente[0 if acierto else 1] += 1
+
+    def leer(self, espacio, llave):
+        """``(True, valor)`` si ``llave`` está y no ha caducado; si no, ``(False, None)``"""
+        ahora = time.time()
+        try:
+            con = self._conexion()
+            fila = con.execute('SELECT valor, creada, usada FROM entradas WHERE clave = ?', (llave,)).fetchone()
+            if fila is not None and self.ttl is not None and fila[1] < ahora - self.ttl:
+                fila = None
+            if fila is not None and fila[2] < ahora - REFRESCO_USO:
+                con.execute('UPDATE entradas SET usada = ? WHERE clave = ?', (ahora, llave))
+            valor = pickle.loads(fila[0]) if fila is not None else None
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.errores += 1
+            fila = None
+        self._contar(espacio, fila is not None)
+        return (True, valor) if fila is not None else (False, None)
+
+    def guardar(self, espacio, llave, valor):
+        """Guarda ``valor``; devuelve False si es demasiado grande o SQLite falló"""
+        try:
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        if len(datos) > self.max_entrada:
+            return False
+        ahora = time.time()
+        try:
+            self._conexion().execute(
+                'INSERT OR REPLACE INTO entradas (clave, espacio, valor, bytes, creada, usada) VALUES (?, ?, ?, ?, ?, ?)',
+                (llave, espacio, datos, len(datos), ahora, ahora)
+            )
+        except sqlite3.Error:
+            self.errores += 1
+            return False
+        with self._lock:
+            self._escrituras += 1
+            mantener = self._escrituras % CADA_ESCRITURAS == 0
+        if mantener:
+            self.mantener()
+        return True
+
+    def obtener(self, espacio, partes, generar):
+        """Valor de ``partes`` en ``espacio``; si falta, lo crea con ``generar()`` y lo guarda"""
+        llave = clave(espacio, partes)
+        encontrado, valor = self.leer(espacio, llave)
+        if encontrado:
+            return valor
+        valor = generar()
+        self.guardar(espacio, llave, valor)
+        return valor
+
+    def mantener(self):
+        """Borra lo caducado, recorta al tamaño máximo y vuelca los contadores al archivo"""
+        try:
+            con = self._conexion()
+            if self.ttl is not None:
+                con.execute('DELETE FROM entradas WHERE creada < ?', (time.time() - self.ttl,))
+            total = con.execute('SELECT COALESCE(SUM(bytes), 0) FROM entradas').fetchone()[0]
+            if total > self.max_bytes:
+                # Se conservan las de uso más reciente hasta el 90 % del máximo
+                con.execute("""
+                    DELETE FROM entradas WHERE clave IN (
+                        SELECT clave FROM (
+                            SELECT clave, SUM(bytes) OVER (ORDER BY usada DESC, clave) AS acumulado FROM entradas
+                        ) WHERE acumulado > ?
+                    )""", (int(self.max_bytes * 0.9),))
+            self._volcar_contadores(con)
+        except sqlite3.Error:
+            self.errores += 1
+
+    def volcar_contadores(self):
+        """Suma al archivo los aciertos y fallos de este proceso aún no guardados"""
+        try:
+            self._volcar_contadores(self._conexion())
+        except sqlite3.Error:
+            self.errores += 1
+
+    def _volcar_contadores(self, con):
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        if pendientes:
+            con.executemany(
+                'INSERT INTO contadores (espacio, aciertos, fallos) VALUES (?, ?, ?) '
+                'ON CONFLICT (espacio) DO UPDATE SET aciertos = aciertos + excluded.aciertos, fallos = fallos + excluded.fallos',
+                [(espacio, a, f) for espacio, (a, f) in pendientes.items()]
+            )
+
+    def limpiar(self):
+        """Vacía el archivo (todas las réplicas) y reinicia los contadores"""
+        with self._lock:
+            self._aciertos.clear()
+            self._fallos.clear()
+            self._pendientes.clear()
+        con = self._conexion()
+        con.execute('DELETE FROM entradas')
+        con.execute('DELETE FROM contadores')
+
+    def estadisticas(self):
+        """Entradas y bytes del archivo; aciertos, fallos y tasa por espacio (proceso y acumulado)"""
+        def tasa(a, f):
+            return a / (a + f) if a + f else 0.0
+
+        with self._lock:
+            proceso = {e: (self._aciertos.get(e, 0), self._fallos.get(e, 0))
+                       for e in set(self._aciertos) | set(self._fallos)}
+        try:
+            con = self._conexion()
+            self._volcar_contadores(con)
+            entradas, ocupados = con.execute('SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entradas').fetchone()
+            acumulado = {e: (a, f) for e, a, f in con.execute('SELECT espacio, aciertos, fallos FROM contadores')}
+        except sqlite3.Error:
+            self.errores += 1
+            entradas, ocupados, acumulado = None, None, {}
+        a_proc = sum(a for a, _ in proceso.values())
+        f_proc = sum(f for _, f in proceso.values())
+        return {
+            'ruta': self.ruta,
+            'entradas': entradas,
+            'bytes': ocupados,
+            'max_bytes': self.max_bytes,
+            'aciertos': a_proc,
+            'fallos': f_proc,
+            'tasa_aciertos': tasa(a_proc, f_proc),
+            'errores': self.errores,
+            'espacios': [
+                {'espacio': e,
+                 'aciertos': proceso.get(e, (0, 0))[0], 'fallos': proceso.get(e, (0, 0))[1],
+                 'tasa_aciertos': tasa(*proceso.get(e, (0, 0))),
+                 'aciertos_total': acumulado.get(e, (0, 0))[0], 'fallos_total': acumulado.get(e, (0, 0))[1],
+                 'tasa_aciertos_total': tasa(*acumulado.get(e, (0, 0)))}
+                for e in sorted(set(proceso) | set(acumulado))
+            ],
+        }
+
+
+# ==========================================
+# CACHÉ DEL PROCESO (CONFIGURADA POR ENTORNO)
+# ==========================================
+
+_cache = None
+_configurada = False
+_lock_cache = threading.Lock()
+
+
+def cache_disco():
+    """La caché de ``MUESTREO_CACHE_DISCO`` (se abre una vez por proceso), o None si no está configurada"""
+    global _cache, _configurada
+    if not _configurada:
+        with _lock_cache:
+            if not _configurada:
+                ruta = os.environ.get('MUESTREO_CACHE_DISCO')
+                if ruta:
+                    _cache = CacheDisco(
+                        ruta,
+                        max_bytes=float(os.environ.get('MUESTREO_CACHE_DISCO_MB', MAX_MB)) * 1024 * 1024,
+                        ttl=float(os.environ.get('MUESTREO_CACHE_DISCO_TTL', TTL)),
+                    )
+                    atexit.register(_cache.volcar_contadores)
+                _configurada = True
+    return _cache
+
+
+def configurar(ruta=None, **opciones):
+    """Abre (o con ``ruta=None`` desactiva) la caché del proceso sin pasar por el entorno"""
+    global _cache, _configurada
+    with _lock_cache:
+        _cache = CacheDisco(ruta, **opciones) if ruta else None
+        _configurada = True
+    return _cache
+
+
+def obtener(espacio, partes, generar):
+    """Como ``CacheDisco.obtener`` sobre la caché del proceso; sin caché, solo ``generar()``"""
+    cache = cache_disco()
+    if cache is None:
+        return generar()
+    return cache.obtener(espacio, partes, generar)
+
+
+def memoizar(espacio):
+    """Decorador: memoiza en disco la función por sus argumentos (sin caché, la llama directamente)"""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def memoizada(*args, **kwargs):
+            return obtener(espacio, [args, kwargs], lambda: funcion(*args, **kwargs))
+        return memoizada
+    return decorador
@@ -0,0 +1,199 @@
+"""
+Línea de comandos para todas las calculadoras (sin Streamlit).
+
+Un cálculo, con parámetros clave=valor (los valores se leen como JSON):
+    python -m muestreo proporcion error=0.05 N=5000
+    python -m muestreo estratificado 'N_h=[3000,2000,1000]' 'sigma_h=[5,10,20]' error=1 metodo=neyman
+
+Parámetros desde un archivo JSON (objeto o lista de objetos):
+    python -m muestreo dif_medias --entrada parametros.json --formato csv
+
+Lote de solicitudes con memoria acotada (JSONL o CSV con columna ``calculadora``):
+    python -m muestreo lote solicitudes.jsonl resultados.csv --tam-bloque 1000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+from .api import CALCULADORAS, CAMPOS_RESULTADO, calcular, calcular_varias
+
+TAM_BLOQUE = 1_000
+FORMATOS_LOTE = ('jsonl', 'csv')
+
+
+def _valor(texto):
+    """Interpreta un valor de la línea de comandos como JSON o, si no, como texto"""
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError:
+        return texto
+
+
+def _parametros_clave_valor(pares):
+    parametros = {}
+    for par in pares:
+        clave, signo, valor = par.partition('=')
+        if not signo:
+            raise SystemExit(f"Parámetro inválido '{par}': usa clave=valor")
+        parametros[clave] = _valor(valor)
+    return parametros
+
+
+def _formato_lote(ruta, formato=None):
+    formato = (formato or os.path.splitext(str(ruta))[1].lstrip('.')).lower()
+    if formato == 'json':
+        formato = 'jsonl'
+    if formato not in FORMATOS_LOTE:
+        raise SystemExit(f"Formato de lote no soportado: '{formato}'. Usa uno de {', '.join(FORMATOS_LOTE)}")
+    return formato
+
+
+# ==========================================
+# LOTES
+# ==========================================
+
+def _leer_solicitudes(ruta, formato):
+    """Generador de solicitudes (diccionarios) leídas de a una línea/fila"""
+    with open(ruta, newline='', encoding='utf-8') as f:
+        if formato == 'jsonl':
+            for linea in f:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            for fila in csv.DictReader(f):
+                # Las celdas vacías se omiten; listas y números se leen como JSON
+                yield {clave: _valor(valor) for clave, valor in fila.items() if valor not in (None, '')}
+
+
+def resolver(solicitud, numero=None):
+    """Ejecuta una solicitud {'calculadora': ..., parámetros...}; los errores se devuelven en la fila"""
+    parametros = dict(solicitud)
+    identificador = parametros.pop('id', numero)
+    calculadora = parametros.pop('calculadora', None)
+    salida = {'id': identificador, 'calculadora': calculadora}
+    try:
+        salida.update(calcular(calculadora, **parametros))
+    except Exception as e:
+        salida['error'] = str(e)
+    return salida
+
+
+def resolver_bloque(solicitudes, primero=1):
+    """Como ``resolver`` para un bloque; agrupa por calculadora para vectorizar el cálculo"""
+    salidas = []
+    grupos = {}
+    for i, solicitud in enumerate(solicitudes):
+        parametros = dict(solicitud)
+        identificador = parametros.pop('id', primero + i)
+        calculadora = parametros.pop('calculadora', None)
+        salidas.append({'id': identificador, 'calculadora': calculadora})
+        grupos.setdefault(calculadora, []).append((i, parametros))
+
+    for calculadora, miembros in grupos.items():
+        resultados = calcular_varias(calculadora, [p for _, p in miembros])
+        for (i, _), resultado in zip(miembros, resultados):
+            if isinstance(resultado, Exception):
+                salidas[i]['error'] = str(resultado)
+            else:
+                salidas[i].update(resultado)
+    return salidas
+
+
+class _EscritorLote:
+    """Escribe resultados en JSONL o CSV a medida que se calculan"""
+
+    def __init__(self, archivo, formato):
+        self.archivo = archivo
+        self.formato = formato
+        if formato == 'csv':
+            columnas = ('id', 'calculadora') + CAMPOS_RESULTADO + ('error',)
+            self.csv = csv.DictWriter(archivo, columnas, extrasaction='ignore')
+            self.csv.writeheader()
+
+    def escribir(self, resultados):
+        if self.formato == 'jsonl':
+            self.archivo.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in resultados)
+        else:
+            self.csv.writerows(
+                {c: json.dumps(v) if isinstance(v, list) else v for c, v in r.items()} for r in resultados
+            )
+
+
+def procesar_lote(entrada, salida, formato_entrada=None, formato_salida=None, tam_bloque=TAM_BLOQUE):
+    """
+    Procesa un archivo de solicitudes por bloques de ``tam_bloque`` filas.
+
+    En memoria solo hay un bloque a la vez. Devuelve el número de
+    solicitudes procesadas y cuántas terminaron con error.
+    """
+    solicitudes = _leer_solicitudes(entrada, _formato_lote(entrada, formato_entrada))
+    total = errores = 0
+    with open(salida, 'w', newline='', encoding='utf-8') as f:
+        escritor = _EscritorLote(f, _formato_lote(salida, formato_salida))
+        while True:
+            bloque = list(islice(solicitudes, tam_bloque))
+            if not bloque:
+                break
+            resultados = resolver_bloque(bloque, total + 1)
+            escritor.escribir(resultados)
+            total += len(resultados)
+            errores += sum('error' in r for r in resultados)
+    return {'solicitudes': total, 'errores': errores}
+
+
+# ==========================================
+# PUNTO DE ENTRADA
+# ==========================================
+
+def _imprimir(resultados, formato, destino):
+    if formato == 'json':
+        json.dump(resultados if len(resultados) > 1 else resultados[0], destino, ensure_ascii=False, indent=2)
+        destino.write('\n')
+    else:
+        _EscritorLote(destino, formato).escribir(resultados)
+
+
+def main(argv=None):
+    """Punto de entrada de ``python -m muestreo``"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'lote':
+        parser = argparse.ArgumentParser(prog='python -m muestreo lote',
+                                         description='Procesa un archivo de solicitudes (JSONL o CSV)')
+        parser.add_argument('entrada', help='Solicitudes (.jsonl o .csv) con la columna calculadora')
+        parser.add_argument('salida', help='Resultados (.jsonl o .csv)')
+        parser.add_argument('--formato-entrada', default=None)
+        parser.add_argument('--formato-salida', default=None)
+        parser.add_argument('--tam-bloque', type=int, default=TAM_BLOQUE)
+        args = parser.parse_args(argv[1:])
+        resumen = procesar_lote(args.entrada, args.salida, args.formato_entrada, args.formato_salida, args.tam_bloque)
+        print(f"{resumen['solicitudes']:,} solicitudes procesadas ({resumen['errores']:,} con error) → {args.salida}")
+        return 1 if resumen['errores'] else 0
+
+    parser = argparse.ArgumentParser(
+        prog='python -m muestreo',
+        description='Calculadora de tamaño de muestra sin interfaz gráfica',
+        epilog="Para procesar un archivo de solicitudes: python -m muestreo lote entrada salida"
+    )
+    parser.add_argument('calculadora', choices=list(CALCULADORAS))
+    parser.add_argument('parametros', nargs='*', help='Parámetros clave=valor')
+    parser.add_argument('--entrada', help='Archivo JSON con los parámetros (objeto o lista de objetos)')
+    parser.add_argument('--formato', choices=['json', 'jsonl', 'csv'], default='json')
+    args = parser.parse_args(argv)
+
+    if args.entrada:
+        with open(args.entrada, encoding='utf-8') as f:
+            contenido = json.load(f)
+        lista = contenido if isinstance(contenido, list) else [contenido]
+    else:
+        lista = [{}]
+    extra = _parametros_clave_valor(args.parametros)
+    resultados = [resolver({**p, **extra, 'calculadora': args.calculadora}, i + 1) for i, p in enumerate(lista)]
+    _imprimir(resultados, args.formato, sys.stdout)
+    return 1 if any('error' in r for r in resultados) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
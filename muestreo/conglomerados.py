@@ -0,0 +1,293 @@
+"""
+Diseños por conglomerados: tamaño de muestra en una o dos etapas y
+selección con probabilidad proporcional al tamaño (PPS).
+
+Efecto de diseño con conglomerados de tamaño variable (Eldridge et al.):
+
+    DEFF = 1 + ((1 + CV²)·m - 1)·ρ
+
+donde m es el número medio de elementos observados por conglomerado y CV el
+coeficiente de variación de los tamaños.
+
+Uso sin interfaz (selección PPS sistemática leyendo el marco por bloques):
+    python -m muestreo.conglomerados marco.csv muestra.csv --a 30 --tamano viviendas --semilla 1
+"""
+import argparse
+
+import numpy as np
+
+from .seleccion import COLUMNA_POSICION, EscritorBloques, leer_por_bloques, TAM_BLOQUE
+
+METODOS_PPS = ('sistematico', 'sampford')
+COLUMNA_PROBABILIDAD = 'prob_inclusion'
+COLUMNA_CERTEZA = 'certeza'
+
+
+# ==========================================
+# TAMAÑO DE MUESTRA
+# ==========================================
+
+def deff_tamano_variable(m, icc, cv_tamano=0.0):
+    """DEFF = 1 + ((1 + CV²)·m - 1)·ρ (se reduce a 1 + (m-1)ρ si CV = 0)"""
+    m = np.asarray(m, dtype=float)
+    cv = np.asarray(cv_tamano, dtype=float)
+    return 1 + ((1 + cv ** 2) * m - 1) * np.asarray(icc, dtype=float)
+
+
+def m_optimo(icc, costo_conglomerado, costo_elemento):
+    """Elementos por conglomerado de costo mínimo: m = √((c₁/c₂)·(1-ρ)/ρ)"""
+    icc = max(float(icc), 1e-9)
+    return float(np.sqrt((costo_conglomerado / costo_elemento) * (1 - icc) / icc))
+
+
+def diseno_dos_etapas(n_mas, tam_prom, icc, cv_tamano=0.0, m=None, fraccion_submuestreo=None,
+                      costo_conglomerado=None, costo_elemento=None, M_total=None):
+    """
+    Tamaño de un diseño en dos etapas a partir del n de MAS equivalente.
+
+    El número de elementos por conglomerado m se toma de ``m``, de
+    ``fraccion_submuestreo`` (m = f·tamaño promedio), del óptimo de costos
+    (``costo_conglomerado`` c₁ y ``costo_elemento`` c₂) o, si no se indica
+    nada, del censo del conglomerado (una etapa). ``cv_tamano`` solo entra
+    en el DEFF cuando se censa cada conglomerado: con submuestreo todos
+    aportan los mismos m elementos. Devuelve m, DEFF, número de
+    conglomerados ``a``, elementos ``n`` y, con ``M_total``, si el diseño es
+    factible.
+    """
+    tam_prom = float(tam_prom)
+    if m is None:
+        if fraccion_submuestreo is not None:
+            m = fraccion_submuestreo * tam_prom
+        elif costo_conglomerado is not None and costo_elemento is not None:
+            m = m_optimo(icc, costo_conglomerado, costo_elemento)
+        else:
+            m = tam_prom
+    censo = m >= tam_prom
+    m = int(np.clip(np.ceil(m), 1, max(np.floor(tam_prom), 1)))
+
+    deff = float(deff_tamano_variable(m, icc, cv_tamano if censo else 0.0))
+    a = int(np.ceil(float(n_mas) * deff / m))
+    resultado = {'m': m, 'deff': deff, 'a': a, 'n': a * m, 'factible': True}
+    if M_total is not None:
+        resultado['factible'] = a <= M_total
+    if costo_conglomerado is not None and costo_elemento is not None:
+        resultado['costo'] = a * costo_conglomerado + a * m * costo_elemento
+    return resultado
+
+
+def resumen_marco(tamanos):
+    """Número de conglomerados, tamaño total, promedio y CV de los tamaños"""
+    tamanos = np.asarray(tamanos, dtype=float)
+    promedio = tamanos.mean()
+    return {
+        'M_total': int(tamanos.size),
+        'elementos': float(tamanos.sum()),
+        'tam_prom': float(promedio),
+        'cv_tamano': float(tamanos.std() / promedio) if promedio > 0 else 0.0,
+    }
+
+
+# ==========================================
+# PROBABILIDADES DE INCLUSIÓN Y SELECCIÓN PPS
+# ==========================================
+
+def _certeza(tamanos, a):
+    """Marca iterativamente las unidades con π ≥ 1 (se seleccionan con certeza)"""
+    certeza = np.zeros(tamanos.size, dtype=bool)
+    while True:
+        restantes = a - certeza.sum()
+        total = tamanos[~certeza].sum()
+        if restantes <= 0 or total <= 0:
+            return certeza
+        nuevas = ~certeza & (restantes * tamanos >= total)
+        if not nuevas.any():
+            return certeza
+        certeza |= nuevas
+
+
+def probabilidades_inclusion(tamanos, a):
+    """
+    π_i = a·M_i / ΣM, con las unidades grandes (π ≥ 1) fijadas en 1 y el
+    resto re-escalado sobre el tamaño restante.
+    """
+    tamanos = np.asarray(tamanos, dtype=float)
+    if not 0 < a <= tamanos.size:
+        raise ValueError("El número de conglomerados debe estar entre 1 y M")
+    certeza = _certeza(tamanos, a)
+    pi = np.ones(tamanos.size)
+    restantes = a - certeza.sum()
+    if restantes > 0:
+        pi[~certeza] = restantes * tamanos[~certeza] / tamanos[~certeza].sum()
+    return pi
+
+
+def pps_sistematico(tamanos, a, semilla=None):
+    """Índices (base 0) de una muestra PPS sistemática de ``a`` conglomerados"""
+    tamanos = np.asarray(tamanos, dtype=float)
+    pi = probabilidades_inclusion(tamanos, a)
+    certeza = pi >= 1
+    restantes = a - certeza.sum()
+    elegidos = np.flatnonzero(certeza)
+    if restantes > 0:
+        resto = np.flatnonzero(~certeza)
+        acumulado = np.cumsum(tamanos[resto])
+        intervalo = acumulado[-1] / restantes
+        arranque = np.random.default_rng(semilla).random() * intervalo
+        puntos = arranque + intervalo * np.arange(restantes)
+        # Un punto igual al total por redondeo daría un índice fuera del marco
+        indices = np.minimum(np.searchsorted(acumulado, puntos, side='right'), resto.size - 1)
+        elegidos = np.concatenate([elegidos, resto[indices]])
+    return np.sort(elegidos)
+
+
+def pps_sampford(tamanos, a, semilla=None, max_intentos=10_000):
+    """
+    Índices (base 0) de una muestra PPS de Sampford (sin reemplazo, π exactas).
+
+    Se sortea la primera unidad con probabilidad π_i/a y las a-1 restantes
+    con reemplazo proporcional a π_i/(1-π_i); la muestra se acepta si no
+    hay repeticiones.
+    """
+    tamanos = np.asarray(tamanos, dtype=float)
+    pi = probabilidades_inclusion(tamanos, a)
+    certeza = pi >= 1
+    restantes = int(a - certeza.sum())
+    elegidos = np.flatnonzero(certeza)
+    if restantes == 0:
+        return elegidos
+
+    resto = np.flatnonzero(~certeza)
+    pi_resto = pi[resto]
+    p_primera = pi_resto / pi_resto.sum()
+    p_siguientes = pi_resto / (1 - pi_resto)
+    p_siguientes /= p_siguientes.sum()
+    rng = np.random.default_rng(semilla)
+    for _ in range(max_intentos):
+        primera = rng.choice(resto.size, p=p_primera)
+        siguientes = rng.choice(resto.size, size=restantes - 1, p=p_siguientes)
+        muestra = np.concatenate([[primera], siguientes])
+        if np.unique(muestra).size == restantes:
+            return np.sort(np.concatenate([elegidos, resto[muestra]]))
+    raise RuntimeError("Sampford no encontró una muestra sin repeticiones; usa PPS sistemático")
+
+
+def seleccionar_pps(tamanos, a, metodo='sistematico', semilla=None):
+    """Selecciona ``a`` conglomerados y devuelve (índices, π de los seleccionados)"""
+    if metodo not in METODOS_PPS:
+        raise ValueError(f"Método PPS desconocido: {metodo}")
+    elegir = pps_sistematico if metodo == 'sistematico' else pps_sampford
+    indices = elegir(tamanos, a, semilla)
+    return indices, probabilidades_inclusion(tamanos, a)[indices]
+
+
+# ==========================================
+# PPS SISTEMÁTICO SOBRE MARCOS GRANDES
+# ==========================================
+
+def seleccionar_pps_marco(fuente, a, destino, columna_tamano, semilla=None, formato_entrada=None,
+                          formato_salida=None, tam_bloque=TAM_BLOQUE):
+    """
+    PPS sistemático leyendo el marco por bloques (dos pasadas, memoria O(a)).
+
+    1ª pasada: tamaño total y las ``a`` unidades más grandes (las únicas que
+    pueden ser de certeza). 2ª pasada: recorrido sistemático sobre el
+    tamaño acumulado. La salida agrega ``posicion_marco``,
+    ``prob_inclusion`` y ``certeza``.
+    """
+    a = int(a)
+    total = 0.0
+    filas = 0
+    mayores_tam = np.empty(0)
+    mayores_pos = np.empty(0, dtype=np.int64)
+    for bloque in leer_por_bloques(fuente, formato_entrada, tam_bloque):
+        tam = bloque[columna_tamano].to_numpy(dtype=float)
+        total += tam.sum()
+        mayores_tam = np.concatenate([mayores_tam, tam])
+        mayores_pos = np.concatenate([mayores_pos, np.arange(filas, filas + tam.size)])
+        if mayores_tam.size > a:
+            conservar = np.argpartition(-mayores_tam, a - 1)[:a]
+            mayores_tam, mayores_pos = mayores_tam[conservar], mayores_pos[conservar]
+        filas += tam.size
+    if not 0 < a <= filas:
+        raise ValueError("El número de conglomerados debe estar entre 1 y M")
+
+    # Unidades de certeza: iterar solo sobre las a más grandes
+    certeza_pos = set()
+    restantes, total_resto = a, total
+    for tam, pos in sorted(zip(mayores_tam, mayores_pos), reverse=True):
+        if restantes > 0 and restantes * tam >= total_resto:
+            certeza_pos.add(int(pos))
+            restantes -= 1
+            total_resto -= tam
+        else:
+            break
+
+    intervalo = total_resto / restantes if restantes > 0 else np.inf
+    arranque = np.random.default_rng(semilla).random() * intervalo if restantes > 0 else 0.0
+    acumulado_previo = 0.0
+    inicio = 0
+    siguiente = 0  # índice del próximo punto de selección
+    certeza_arr = np.array(sorted(certeza_pos), dtype=np.int64)
+
+    bloques = leer_por_bloques(fuente, formato_entrada, tam_bloque)
+    proximo = next(bloques, None)
+    with EscritorBloques(destino, formato_salida) as escritor:
+        while proximo is not None:
+            # Se lee un bloque por adelantado para saber cuál es el último
+            bloque, proximo = proximo, next(bloques, None)
+            posiciones = np.arange(inicio, inicio + len(bloque))
+            es_certeza = np.isin(posiciones, certeza_arr)
+            tam = np.where(es_certeza, 0.0, bloque[columna_tamano].to_numpy(dtype=float))
+            acumulado = acumulado_previo + np.cumsum(tam)
+
+            # Puntos de selección que caen dentro de este bloque
+            fin_bloque = acumulado[-1] if acumulado.size else acumulado_previo
+            ultimo = int(np.ceil((fin_bloque - arranque) / intervalo)) if restantes > 0 else 0
+            # En el último bloque caen todos los puntos pendientes, aunque por
+            # redondeo su acumulado quede por debajo de total_resto
+            ultimo = restantes if proximo is None else min(max(ultimo, siguiente), restantes)
+            puntos = arranque + intervalo * np.arange(siguiente, ultimo)
+            sistematicos = np.minimum(np.searchsorted(acumulado, puntos, side='right'), len(bloque) - 1)
+            siguiente = ultimo
+
+            mascara = es_certeza.copy()
+            mascara[sistematicos] = True
+            if mascara.any():
+                muestra = bloque[mascara].copy()
+                muestra[COLUMNA_POSICION] = posiciones[mascara] + 1
+                muestra[COLUMNA_CERTEZA] = es_certeza[mascara]
+                muestra[COLUMNA_PROBABILIDAD] = np.where(
+                    es_certeza[mascara], 1.0,
+                    restantes * bloque[columna_tamano].to_numpy(dtype=float)[mascara] / total_resto
+                )
+                escritor.escribir(muestra)
+
+            acumulado_previo = fin_bloque
+            inicio += len(bloque)
+
+    return {'M': filas, 'a': escritor.filas, 'certeza': len(certeza_pos), 'tamano_total': float(total)}
+
+
+def main(argv=None):
+    """Punto de entrada sin interfaz gráfica"""
+    parser = argparse.ArgumentParser(
+        prog='python -m muestreo.conglomerados',
+        description='Selección PPS sistemática de conglomerados desde un marco'
+    )
+    parser.add_argument('marco', help='Marco de conglomerados (.csv o .parquet)')
+    parser.add_argument('salida', help='Archivo de salida (.csv o .parquet)')
+    parser.add_argument('--a', type=int, required=True, help='Número de conglomerados a seleccionar')
+    parser.add_argument('--tamano', required=True, help='Columna con la medida de tamaño')
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--tam-bloque', type=int, default=TAM_BLOQUE)
+    args = parser.parse_args(argv)
+
+    resumen = seleccionar_pps_marco(args.marco, args.a, args.salida, args.tamano, args.semilla,
+                                    tam_bloque=args.tam_bloque)
+    print(f"{resumen['a']:,} de {resumen['M']:,} conglomerados seleccionados "
+          f"({resumen['certeza']:,} de certeza) → {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+"""
+Servicio de valores críticos (cuantiles normal y t-Student).
+
+Evita que el costo fijo de ``scipy.stats`` domine la latencia:
+
+- Los escalares pasan por una caché LRU acotada con clave
+  (distribución, cuantil, gl).
+- Los arreglos se resuelven contra una tabla densa precalculada para la
+  rejilla habitual de α / potencia / gl, y solo las celdas fuera de la
+  rejilla se calculan con ``ppf`` exacto.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.stats import norm, t as t_dist
+
+# Rejilla de la tabla precalculada
+ALFAS = np.array([0.001, 0.005, 0.01, 0.02, 0.025, 0.05, 0.10, 0.15, 0.20])
+POTENCIAS = np.array([0.50, 0.60, 0.70, 0.75, 0.80, 0.85, 0.90, 0.95, 0.975, 0.99])
+GL_MAX = 1000
+
+TAM_CACHE = 4096
+_TOLERANCIA = 1e-12
+
+
+@lru_cache(maxsize=None)
+def _tablas():
+    """Construye (una sola vez, al primer uso) las tablas de cuantiles"""
+    cuantiles = np.unique(np.round(np.concatenate([1 - ALFAS, 1 - ALFAS / 2, POTENCIAS]), 12))
+    gl = np.arange(1, GL_MAX + 1)
+    tabla_normal = norm.ppf(cuantiles)
+    tabla_t = t_dist.ppf(cuantiles[:, None], gl[None, :])
+    return cuantiles, tabla_normal, tabla_t
+
+
+def _indice_cuantil(q):
+    """Índice de q en la rejilla y máscara de coincidencias exactas"""
+    cuantiles = _tablas()[0]
+    idx = np.clip(np.searchsorted(cuantiles, q), 0, cuantiles.size - 1)
+    # searchsorted puede caer justo a la derecha del valor por redondeo
+    idx_izq = np.clip(idx - 1, 0, cuantiles.size - 1)
+    usar_izq = np.abs(cuantiles[idx_izq] - q) < np.abs(cuantiles[idx] - q)
+    idx = np.where(usar_izq, idx_izq, idx)
+    return idx, np.abs(cuantiles[idx] - q) < _TOLERANCIA
+
+
+@lru_cache(maxsize=TAM_CACHE)
+def _ppf_escalar(distribucion, q, gl):
+    """Cuantil exacto con memoización; gl se ignora para la normal"""
+    idx, en_tabla = _indice_cuantil(q)
+    if distribucion == 'normal':
+        if en_tabla:
+            return float(_tablas()[1][idx])
+        return float(norm.ppf(q))
+    if en_tabla and gl == int(gl) and 1 <= gl <= GL_MAX:
+        return float(_tablas()[2][idx, int(gl) - 1])
+    return float(t_dist.ppf(q, gl))
+
+
+def ppf_normal(q):
+    """Cuantil de la normal estándar (escalar o arreglo)"""
+    q = np.asarray(q, dtype=float)
+    if q.ndim == 0:
+        return np.float64(_ppf_escalar('normal', float(q), None))
+
+    idx, en_tabla = _indice_cuantil(q)
+    resultado = np.empty(q.shape)
+    resultado[en_tabla] = _tablas()[1][idx[en_tabla]]
+    resultado[~en_tabla] = norm.ppf(q[~en_tabla])
+    return resultado
+
+
+def ppf_t(q, gl):
+    """Cuantil de la t-Student con gl grados de libertad (escalar o arreglo)"""
+    q, gl = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(gl, dtype=float))
+    if q.ndim == 0:
+        return np.float64(_ppf_escalar('t', float(q), float(gl)))
+
+    idx, en_tabla = _indice_cuantil(q)
+    en_tabla &= (gl == np.floor(gl)) & (gl >= 1) & (gl <= GL_MAX)
+    resultado = np.empty(q.shape)
+    gl_idx = gl[en_tabla].astype(np.int64) - 1
+    resultado[en_tabla] = _tablas()[2][idx[en_tabla], gl_idx]
+    resultado[~en_tabla] = t_dist.ppf(q[~en_tabla], gl[~en_tabla])
+    return resultado
+
+
+def info_cache():
+    """Estadísticas de la caché LRU de escalares (hits, misses, maxsize, currsize)"""
+    return _ppf_escalar.cache_info()
+
+
+def limpiar_cache():
+    """Vacía la caché LRU de escalares"""
+    _ppf_escalar.cache_clear()
@@ -0,0 +1,448 @@
+"""
+Motor de asignación para muestreo estratificado.
+
+Todas las operaciones son vectoriales sobre arreglos con un elemento por
+estrato, por lo que escalan a decenas de miles de estratos.
+
+Tamaño total para estimar la media con error E (D = E² / Z²):
+
+    n = Σ (N_h² σ_h² / w_h) / (N² D + Σ N_h σ_h²)
+
+donde w_h es la fracción de la muestra asignada al estrato h.
+"""
+import numpy as np
+
+from .motor import z_critico
+
+METODOS_ASIGNACION = ("Proporcional", "Óptima de Neyman", "Óptima con costos", "Igual")
+
+
+def pesos_asignacion(N_h, sigma_h, metodo="Proporcional", costo_h=None):
+    """
+    Fracción w_h de la muestra que recibe cada estrato.
+
+    - Proporcional:      w_h ∝ N_h
+    - Óptima de Neyman:  w_h ∝ N_h σ_h
+    - Óptima con costos: w_h ∝ N_h σ_h / √c_h
+    - Igual:             w_h = 1 / L
+    """
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.asarray(sigma_h, dtype=float)
+
+    if metodo == "Proporcional":
+        pesos = N_h
+    elif metodo == "Óptima de Neyman":
+        pesos = N_h * sigma_h
+    elif metodo == "Óptima con costos":
+        costo_h = np.ones_like(N_h) if costo_h is None else np.asarray(costo_h, dtype=float)
+        pesos = N_h * sigma_h / np.sqrt(costo_h)
+    elif metodo == "Igual":
+        pesos = np.ones_like(N_h)
+    else:
+        raise ValueError(f"Método de asignación desconocido: {metodo}")
+
+    total = pesos.sum()
+    if total <= 0:
+        return np.full(N_h.shape, 1 / N_h.size)
+    return pesos / total
+
+
+def n_total_estratificado(N_h, sigma_h, error, confianza=0.95, metodo="Proporcional", costo_h=None):
+    """Tamaño total n que garantiza el error E para la media estratificada"""
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.asarray(sigma_h, dtype=float)
+    w_h = pesos_asignacion(N_h, sigma_h, metodo, costo_h)
+
+    N = N_h.sum()
+    D = (error ** 2) / (z_critico(confianza) ** 2)
+    positivos = w_h > 0
+    numerador = np.sum((N_h[positivos] * sigma_h[positivos]) ** 2 / w_h[positivos])
+    n = numerador / (N ** 2 * D + np.sum(N_h * sigma_h ** 2))
+    return int(np.ceil(n))
+
+
+def redondeo_mayor_resto(cuotas, total=None):
+    """
+    Redondea cuotas reales a enteros que suman exactamente ``total``
+    (método del mayor resto / Hamilton).
+    """
+    cuotas = np.asarray(cuotas, dtype=float)
+    total = int(round(cuotas.sum())) if total is None else int(total)
+    base = np.floor(cuotas).astype(np.int64)
+    faltan = total - int(base.sum())
+    if faltan > 0:
+        restos = cuotas - base
+        # Mayores restos primero; en empate, el estrato de menor índice
+        orden = np.argsort(-restos, kind='stable')[:faltan]
+        base[orden] += 1
+    return base
+
+
+def asignar(n_total, N_h, sigma_h=None, metodo="Proporcional", costo_h=None, n_min=0, n_max=None):
+    """
+    Asigna ``n_total`` unidades entre los estratos con enteros exactos.
+
+    Cada n_h queda en [n_min_h, n_max_h] (n_max por defecto = N_h). Las
+    cuotas que violan un límite se fijan en él y el excedente o faltante se
+    redistribuye entre los estratos libres según sus pesos; al final se
+    aplica el redondeo de mayor resto. Si n_total no es factible se lleva al
+    rango [Σ n_min, Σ n_max].
+    """
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.ones_like(N_h) if sigma_h is None else np.asarray(sigma_h, dtype=float)
+    pesos = pesos_asignacion(N_h, sigma_h, metodo, costo_h)
+
+    minimo = np.broadcast_to(np.asarray(n_min, dtype=float), N_h.shape)
+    maximo = N_h if n_max is None else np.broadcast_to(np.asarray(n_max, dtype=float), N_h.shape)
+    maximo = np.floor(np.minimum(maximo, N_h))
+    minimo = np.ceil(np.minimum(minimo, maximo))
+    n_total = float(np.clip(n_total, minimo.sum(), maximo.sum()))
+
+    cuotas = np.zeros_like(N_h)
+    libre = np.ones(N_h.shape, dtype=bool)
+    for _ in range(N_h.size + 1):
+        restante = n_total - cuotas[~libre].sum()
+        peso_libre = pesos[libre].sum()
+        if peso_libre > 0:
+            cuotas[libre] = restante * pesos[libre] / peso_libre
+        else:
+            cuotas[libre] = restante / max(libre.sum(), 1)
+        sobre = libre & (cuotas > maximo)
+        bajo = libre & (cuotas < minimo)
+        if not (sobre | bajo).any():
+            break
+        # Solo se fija el lado que domina: si el exceso supera al faltante, el
+        # resto de cuotas sube y los estratos sobre su máximo siguen sobre él
+        exceso = np.sum(cuotas[sobre] - maximo[sobre])
+        faltante = np.sum(minimo[bajo] - cuotas[bajo])
+        if exceso > faltante:
+            bajo[:] = False
+        elif faltante > exceso:
+            sobre[:] = False
+        cuotas[sobre] = maximo[sobre]
+        cuotas[bajo] = minimo[bajo]
+        libre &= ~(sobre | bajo)
+
+    return redondeo_mayor_resto(cuotas, n_total)
+
+
+def leer_tabla_estratos(df):
+    """
+    Extrae los arreglos de una tabla de estratos.
+
+    Columnas: ``N_h`` (obligatoria), ``sigma_h`` o ``p_h``, y opcionalmente
+    ``estrato``, ``costo_h``, ``n_min``, ``n_max``.
+    """
+    if 'N_h' not in df.columns:
+        raise ValueError("La tabla de estratos debe tener la columna 'N_h'")
+    if 'sigma_h' in df.columns:
+        sigma_h = df['sigma_h'].to_numpy(dtype=float)
+    elif 'p_h' in df.columns:
+        p_h = df['p_h'].to_numpy(dtype=float)
+        sigma_h = np.sqrt(p_h * (1 - p_h))
+    else:
+        raise ValueError("La tabla de estratos debe tener 'sigma_h' o 'p_h'")
+
+    n = len(df)
+    return {
+        'estrato': df['estrato'].to_numpy() if 'estrato' in df.columns else np.arange(1, n + 1),
+        'N_h': df['N_h'].to_numpy(dtype=float),
+        'sigma_h': sigma_h,
+        'costo_h': df['costo_h'].to_numpy(dtype=float) if 'costo_h' in df.columns else np.ones(n),
+        'n_min': df['n_min'].to_numpy(dtype=float) if 'n_min' in df.columns else None,
+        'n_max': df['n_max'].to_numpy(dtype=float) if 'n_max' in df.columns else None,
+    }
+
+
+# ==========================================
+# ASIGNACIÓN ÓPTIMA CON RESTRICCIÓN DE COSTO O VARIANZA
+# ==========================================
+
+def varianza_media(n_h, N_h, sigma_h):
+    """V(ȳ_st) = Σ W_h² σ_h² / n_h · (1 - n_h/N_h); admite n_h con ejes extra al inicio"""
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.asarray(sigma_h, dtype=float)
+    n_h = np.asarray(n_h, dtype=float)
+    W_h = N_h / N_h.sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        termino = np.where(sigma_h > 0, W_h ** 2 * sigma_h ** 2 * (1 / n_h - 1 / N_h), 0.0)
+    return termino.sum(axis=-1)
+
+
+def _limites(N_h, n_min, n_max):
+    minimo = np.broadcast_to(np.asarray(n_min, dtype=float), N_h.shape)
+    maximo = N_h if n_max is None else np.broadcast_to(np.asarray(n_max, dtype=float), N_h.shape)
+    maximo = np.minimum(maximo, N_h)
+    return np.minimum(minimo, maximo), maximo
+
+
+def _biseccion_lambda(a_h, minimo, maximo, evaluar, objetivos, creciente, iteraciones=60):
+    """
+    Busca, para cada objetivo, λ con evaluar(clip(λ·a_h, mín, máx)) = objetivo.
+
+    ``objetivos`` es un arreglo (K,); la búsqueda se hace en paralelo sobre
+    una matriz (K, L).
+    """
+    objetivos = np.atleast_1d(np.asarray(objetivos, dtype=float))
+    con_peso = a_h > 0
+    lam_max = np.max(maximo[con_peso] / a_h[con_peso]) if con_peso.any() else 1.0
+    lo = np.zeros(objetivos.shape)
+    hi = np.full(objetivos.shape, lam_max)
+    for _ in range(iteraciones):
+        medio = (lo + hi) / 2
+        n_h = np.clip(medio[:, None] * a_h[None, :], minimo, maximo)
+        valor = evaluar(n_h)
+        pasa = valor > objetivos if creciente else valor < objetivos
+        hi = np.where(pasa, medio, hi)
+        lo = np.where(pasa, lo, medio)
+    return np.clip(hi[:, None] * a_h[None, :], minimo, maximo)
+
+
+def _redondear_presupuesto(cuotas, costo_h, disponible, maximo):
+    """Piso de las cuotas y unidades extra por mayor resto mientras alcance el presupuesto"""
+    base = np.floor(cuotas)
+    sobrante = disponible - np.sum(base * costo_h)
+    restos = cuotas - base
+    orden = np.argsort(-restos, kind='stable')
+    orden = orden[(restos[orden] > 0) & (base[orden] < maximo[orden])]
+    cabe = np.cumsum(costo_h[orden]) <= sobrante + 1e-9
+    base[orden[cabe]] += 1
+    return base.astype(np.int64)
+
+
+def asignacion_optima_costos(N_h, sigma_h, costo_h, presupuesto=None, error=None, confianza=0.95,
+                             costo_fijo=0.0, n_min=0, n_max=None):
+    """
+    Asignación óptima n_h ∝ N_h σ_h / √c_h con restricción de costo o de precisión.
+
+    - Con ``presupuesto`` (C): minimiza V(ȳ_st) sujeto a c₀ + Σ c_h n_h ≤ C.
+    - Con ``error`` (E): minimiza el costo sujeto a Z·√V(ȳ_st) ≤ E.
+
+    Los límites por estrato [n_min, n_max] (n_max ≤ N_h) se respetan con la
+    condición de KKT n_h = clip(λ·N_h σ_h/√c_h, mín, máx), y λ se obtiene
+    por bisección. Devuelve un diccionario con ``n_h`` (enteros), ``n``,
+    ``costo``, ``varianza``, ``error`` y ``factible``.
+    """
+    if (presupuesto is None) == (error is None):
+        raise ValueError("Indica exactamente una restricción: presupuesto o error")
+
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.asarray(sigma_h, dtype=float)
+    costo_h = np.broadcast_to(np.asarray(costo_h, dtype=float), N_h.shape)
+    minimo, maximo = _limites(N_h, n_min, n_max)
+    a_h = N_h * sigma_h / np.sqrt(costo_h)
+    z = z_critico(confianza)
+
+    if presupuesto is not None:
+        disponible = float(presupuesto) - costo_fijo
+        factible = disponible >= np.sum(np.ceil(minimo) * costo_h)
+        cuotas = _biseccion_lambda(
+            a_h, minimo, maximo, lambda n: np.sum(n * costo_h, axis=-1), disponible, creciente=True
+        )[0]
+        n_h = _redondear_presupuesto(cuotas, costo_h, disponible, np.floor(maximo))
+        n_h = np.maximum(n_h, np.ceil(minimo).astype(np.int64))
+    else:
+        objetivo = (error / z) ** 2
+        factible = varianza_media(maximo, N_h, sigma_h) <= objetivo
+        cuotas = _biseccion_lambda(
+            a_h, minimo, maximo, lambda n: varianza_media(n, N_h, sigma_h), objetivo, creciente=False
+        )[0]
+        # Redondear hacia arriba conserva la precisión pedida
+        n_h = np.minimum(np.ceil(cuotas - 1e-9), np.floor(maximo)).astype(np.int64)
+
+    varianza = float(varianza_media(n_h, N_h, sigma_h))
+    return {
+        'n_h': n_h,
+        'n': int(n_h.sum()),
+        'costo': float(costo_fijo + np.sum(n_h * costo_h)),
+        'varianza': varianza,
+        'error': float(z * np.sqrt(max(varianza, 0.0))),
+        'factible': bool(factible),
+    }
+
+
+def frontera_costo_varianza(N_h, sigma_h, costo_h, presupuestos=None, puntos=40, confianza=0.95,
+                            costo_fijo=0.0, n_min=0, n_max=None):
+    """
+    Frontera costo–precisión de la asignación óptima con costos.
+
+    Resuelve en paralelo (continuo, sin redondear) para una rejilla de
+    presupuestos, por defecto ``puntos`` valores entre el costo de los
+    mínimos y el de un censo. Devuelve un diccionario de arreglos:
+    ``presupuesto``, ``n``, ``varianza`` y ``error``.
+    """
+    N_h = np.asarray(N_h, dtype=float)
+    sigma_h = np.asarray(sigma_h, dtype=float)
+    costo_h = np.broadcast_to(np.asarray(costo_h, dtype=float), N_h.shape)
+    minimo, maximo = _limites(N_h, n_min, n_max)
+    a_h = N_h * sigma_h / np.sqrt(costo_h)
+
+    if presupuestos is None:
+        c_min = np.sum(np.maximum(minimo, 1) * costo_h)
+        c_max = np.sum(maximo * costo_h)
+        presupuestos = costo_fijo + np.geomspace(c_min, c_max, int(puntos))
+    presupuestos = np.asarray(presupuestos, dtype=float)
+
+    n_h = _biseccion_lambda(
+        a_h, np.maximum(minimo, 1e-9), maximo, lambda n: np.sum(n * costo_h, axis=-1),
+        presupuestos - costo_fijo, creciente=True
+    )
+    varianza = varianza_media(n_h, N_h, sigma_h)
+    return {
+        'presupuesto': presupuestos,
+        'n': n_h.sum(axis=-1),
+        'varianza': varianza,
+        'error': z_critico(confianza) * np.sqrt(np.maximum(varianza, 0.0)),
+    }
+
+
+# ==========================================
+# ASIGNACIÓN MULTIVARIADA (VARIOS INDICADORES)
+# ==========================================
+
+def asignacion_multivariada(N_h, S_hj, costo_h=1.0, error_j=None, cv_j=None, medias_hj=None,
+                            confianza=0.95, n_min=0, n_max=None, tol=1e-4, max_iter=2000):
+    """
+    Asignación de costo mínimo que cumple la precisión de J indicadores a la vez.
+
+    ``S_hj`` es la matriz (L estratos × J indicadores) de desviaciones
+    estándar. La precisión se fija por indicador con ``error_j`` (E absoluto)
+    o con ``cv_j`` (coeficiente de variación, requiere ``medias_hj``).
+
+    Método de Bethel–Chromy: para pesos α_j dados, la asignación de Bethel
+    n_h ∝ √(Σ_j α_j a_hj / c_h) es óptima; los α_j se actualizan con la regla
+    de Chromy α_j ← α_j·g_j² / Σ α_k·g_k², donde g_j es la varianza relativa
+    a su objetivo. Los estratos que superan su máximo (``n_max`` o N_h) se
+    fijan en él y se vuelve a resolver el resto descontando la varianza que
+    aportan. Todo el cálculo es matricial sobre L × J.
+
+    Devuelve ``n_h`` (enteros, redondeados hacia arriba), ``n``, ``costo``,
+    ``error_j`` / ``cv_j`` alcanzados, ``iteraciones``, ``convergio`` y
+    ``factible`` (False si los máximos impiden cumplir algún objetivo).
+    """
+    if (error_j is None) == (cv_j is None):
+        raise ValueError("Indica exactamente un objetivo de precisión: error_j o cv_j")
+
+    N_h = np.asarray(N_h, dtype=float)
+    S_hj = np.asarray(S_hj, dtype=float).reshape(N_h.size, -1)
+    L, J = S_hj.shape
+    costo_h = np.broadcast_to(np.asarray(costo_h, dtype=float), (L,))
+    minimo, maximo = _limites(N_h, n_min, n_max)
+    W_h = N_h / N_h.sum()
+    z = z_critico(confianza)
+
+    medias_j = None
+    if medias_hj is not None:
+        medias_hj = np.asarray(medias_hj, dtype=float)
+        medias_j = medias_hj if medias_hj.ndim == 1 else W_h @ medias_hj.reshape(L, J)
+
+    if error_j is not None:
+        objetivo_j = (np.broadcast_to(np.asarray(error_j, dtype=float), (J,)) / z) ** 2
+    else:
+        if medias_j is None:
+            raise ValueError("El objetivo por CV requiere las medias de cada indicador")
+        objetivo_j = (np.broadcast_to(np.asarray(cv_j, dtype=float), (J,)) * medias_j) ** 2
+
+    WS2 = W_h[:, None] * S_hj ** 2
+    censo = np.zeros(L, dtype=bool)
+    n_h = np.zeros(L)
+    iteraciones = 0
+    convergio = False
+    for _ in range(L + 1):
+        libre = ~censo
+        n_h[censo] = maximo[censo]
+        convergio = False
+        # Varianza que ya aportan los estratos fijos en su máximo
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fija_j = np.where(S_hj[censo] > 0, W_h[censo, None] * WS2[censo]
+                              * (1 / maximo[censo, None] - 1 / N_h[censo, None]), 0.0).sum(axis=0)
+        # Varianza disponible para los libres, tras descontar su FPC
+        disponible = objetivo_j - fija_j + WS2[libre].sum(axis=0) / N_h.sum()
+        activos = (S_hj[libre] > 0).any(axis=0)
+        if not activos.any():
+            n_h[libre] = 0.0
+            convergio = True
+            break
+        if np.any(disponible[activos] <= 0):
+            # Ni censando los estratos libres se alcanza: se llevan a su máximo
+            n_h[libre] = maximo[libre]
+            break
+        a_hj = (W_h[libre, None] ** 2 * S_hj[libre][:, activos] ** 2) / disponible[None, activos]
+        c = costo_h[libre]
+
+        alfa = np.full(a_hj.shape[1], 1 / a_hj.shape[1])
+        for iteraciones in range(1, max_iter + 1):
+            carga = a_hj @ alfa
+            n_libre = np.sqrt(carga / c) * np.sum(np.sqrt(c * carga))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                g = np.where(n_libre[:, None] > 0, a_hj / n_libre[:, None], 0.0).sum(axis=0)
+            if np.max(g) <= 1 + tol:
+                convergio = True
+                break
+            alfa = alfa * g ** 2
+            alfa /= alfa.sum()
+
+        # Escalar para garantizar todas las restricciones
+        n_h[libre] = n_libre * max(np.max(g), 1.0)
+        excede = libre & (n_h > maximo)
+        if not excede.any():
+            break
+        censo |= excede
+
+    n_h = np.clip(np.ceil(n_h - 1e-9), np.ceil(minimo), np.floor(maximo)).astype(np.int64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        varianza_j = np.where(
+            S_hj > 0, W_h[:, None] ** 2 * S_hj ** 2 * (1 / n_h[:, None] - 1 / N_h[:, None]), 0.0
+        ).sum(axis=0)
+    resultado = {
+        'n_h': n_h,
+        'n': int(n_h.sum()),
+        'costo': float(np.sum(n_h * costo_h)),
+        'error_j': z * np.sqrt(np.maximum(varianza_j, 0.0)),
+        'iteraciones': iteraciones,
+        'convergio': convergio,
+        'factible': bool(np.all(varianza_j <= objetivo_j * (1 + tol))),
+    }
+    if medias_j is not None:
+        resultado['cv_j'] = np.sqrt(np.maximum(varianza_j, 0.0)) / medias_j
+    return resultado
+
+
+def leer_tabla_indicadores(df):
+    """
+    Extrae N_h, costos y la matriz de indicadores de una tabla de estratos.
+
+    Cada indicador es una columna ``sigma_<nombre>`` (con ``media_<nombre>``
+    opcional para objetivos por CV) o ``p_<nombre>`` (proporción).
+    """
+    if 'N_h' not in df.columns:
+        raise ValueError("La tabla de estratos debe tener la columna 'N_h'")
+    nombres, sigmas, medias = [], [], []
+    for columna in df.columns:
+        if columna.startswith('sigma_'):
+            nombre = columna[len('sigma_'):]
+            sigmas.append(df[columna].to_numpy(dtype=float))
+            media = f'media_{nombre}'
+            medias.append(df[media].to_numpy(dtype=float) if media in df.columns
+                          else np.full(len(df), np.nan))
+        elif columna.startswith('p_'):
+            nombre = columna[len('p_'):]
+            p = df[columna].to_numpy(dtype=float)
+            sigmas.append(np.sqrt(p * (1 - p)))
+            medias.append(p)
+        else:
+            continue
+        nombres.append(nombre)
+    if not nombres:
+        raise ValueError("No se encontraron indicadores: usa columnas 'sigma_<nombre>' o 'p_<nombre>'")
+
+    n = len(df)
+    return {
+        'estrato': df['estrato'].to_numpy() if 'estrato' in df.columns else np.arange(1, n + 1),
+        'N_h': df['N_h'].to_numpy(dtype=float),
+        'costo_h': df['costo_h'].to_numpy(dtype=float) if 'costo_h' in df.columns else np.ones(n),
+        'indicadores': nombres,
+        'S_hj': np.column_stack(sigmas),
+        'medias_hj': np.column_stack(medias),
+    }
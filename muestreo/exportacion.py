@@ -0,0 +1,222 @@
+"""
+Exportación de resultados a CSV, Parquet y Excel por bloques.
+
+- CSV y Parquet se escriben bloque a bloque (pyarrow si está disponible).
+- Excel usa xlsxwriter en modo ``constant_memory``: cada fila se vuelca al
+  disco al escribirse, así que el libro nunca está completo en memoria.
+  Las tablas que superan el límite de filas de Excel continúan en hojas
+  "Nombre (2)", "Nombre (3)", ...
+- Los informes tienen varias hojas (parámetros, resultados, asignación,
+  curvas, unidades seleccionadas). Cada hoja puede ser un DataFrame, un
+  iterable de DataFrames, un diccionario de parámetros o una función que
+  devuelva cualquiera de ellos (se evalúa solo al exportar).
+- ``diferido`` y ``diferido_excel`` devuelven funciones para
+  ``st.download_button``: el archivo se genera solo al hacer clic, en un
+  archivo temporal que pasa a disco si supera ``MEMORIA_MAXIMA``. Con
+  ``clave`` (los parámetros que determinan el archivo) los bytes se
+  reutilizan desde ``cache_disco``.
+"""
+import os
+import tempfile
+from io import BytesIO
+
+import pandas as pd
+
+from .tiempos import etapa
+
+FORMATOS = ('csv', 'parquet', 'xlsx')
+MIME = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+TAM_BLOQUE = 100_000
+MAX_FILAS_EXCEL = 1_048_575  # filas de datos por hoja (más el encabezado)
+MEMORIA_MAXIMA = 32 * 1024 * 1024
+
+
+def _formato_de(nombre, formato=None):
+    """Deduce el formato a partir de la extensión del archivo"""
+    formato = (formato or os.path.splitext(str(nombre))[1]).lower().lstrip('.')
+    if formato in ('xls', 'excel'):
+        formato = 'xlsx'
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: '{formato}'. Usa uno de {', '.join(FORMATOS)}")
+    return formato
+
+
+def _bloques(datos, tam_bloque=TAM_BLOQUE):
+    """Recorre un DataFrame (en rebanadas) o un iterable de DataFrames"""
+    if callable(datos):
+        datos = datos()
+    if isinstance(datos, dict):
+        datos = pd.DataFrame({'Parámetro': list(datos), 'Valor': [str(v) for v in datos.values()]})
+    if isinstance(datos, pd.DataFrame):
+        if datos.empty:
+            yield datos
+        for inicio in range(0, len(datos), tam_bloque):
+            yield datos.iloc[inicio:inicio + tam_bloque]
+    else:
+        yield from datos
+
+
+# ==========================================
+# CSV Y PARQUET
+# ==========================================
+
+@etapa('exportacion.csv', 'exportacion')
+def escribir_csv(datos, destino, tam_bloque=TAM_BLOQUE):
+    """CSV por bloques; usa el escritor de pyarrow si está disponible (mucho más rápido)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        for i, bloque in enumerate(_bloques(datos, tam_bloque)):
+            bloque.to_csv(destino, index=False, header=i == 0, mode='w' if i == 0 else 'a')
+        return
+
+    escritor = esquema = None
+    try:
+        for bloque in _bloques(datos, tam_bloque):
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                esquema = tabla.schema
+                escritor = pa_csv.CSVWriter(destino, esquema)
+            # Bloques posteriores pueden inferir otro tipo (p. ej. todo nulo)
+            escritor.write_table(tabla if tabla.schema == esquema else tabla.cast(esquema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+@etapa('exportacion.parquet', 'exportacion')
+def escribir_parquet(datos, destino, tam_bloque=TAM_BLOQUE):
+    """Parquet por bloques (un grupo de filas por bloque)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = esquema = None
+    try:
+        for bloque in _bloques(datos, tam_bloque):
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                esquema = tabla.schema
+                escritor = pq.ParquetWriter(destino, esquema)
+            # Bloques posteriores pueden inferir otro tipo (p. ej. todo nulo)
+            escritor.write_table(tabla if tabla.schema == esquema else tabla.cast(esquema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+# ==========================================
+# EXCEL
+# ==========================================
+
+def _columnas_nativas(bloque):
+    """Columnas como listas de tipos de Python (NaN/NA → celda vacía)"""
+    columnas = []
+    for _, serie in bloque.items():
+        if serie.hasnans:
+            serie = serie.astype(object).where(serie.notna(), None)
+        columnas.append(serie.tolist())
+    return columnas
+
+
+@etapa('exportacion.excel', 'exportacion')
+def escribir_excel(hojas, destino, tam_bloque=TAM_BLOQUE):
+    """
+    Escribe un libro con una hoja por entrada de ``hojas`` (nombre → datos)
+    en modo de memoria constante.
+    """
+    import xlsxwriter
+
+    libro = xlsxwriter.Workbook(destino, {'constant_memory': True, 'strings_to_numbers': False})
+    negrita = libro.add_format({'bold': True})
+    try:
+        for nombre, datos in hojas.items():
+            nombre = str(nombre)[:31]
+            hoja, fila, parte, encabezado = None, 0, 1, None
+            for bloque in _bloques(datos, tam_bloque):
+                if encabezado is None:
+                    encabezado = [str(c) for c in bloque.columns]
+                columnas = _columnas_nativas(bloque)
+                for valores in zip(*columnas) if columnas else ():
+                    if hoja is None or fila > MAX_FILAS_EXCEL:
+                        sufijo = f" ({parte})" if parte > 1 else ""
+                        hoja = libro.add_worksheet(nombre[:31 - len(sufijo)] + sufijo)
+                        for j, titulo in enumerate(encabezado):
+                            hoja.set_column(j, j, max(10, min(len(titulo) + 2, 40)))
+                        hoja.write_row(0, 0, encabezado, negrita)
+                        fila, parte = 1, parte + 1
+                    hoja.write_row(fila, 0, valores)
+                    fila += 1
+            if hoja is None:  # tabla vacía: solo el encabezado
+                hoja = libro.add_worksheet(nombre)
+                hoja.write_row(0, 0, encabezado or [], negrita)
+    finally:
+        libro.close()
+
+
+def escribir(datos, destino, formato=None, tam_bloque=TAM_BLOQUE):
+    """Escribe una tabla (o bloques de tabla) en CSV, Parquet o Excel"""
+    formato = _formato_de(getattr(destino, 'name', destino), formato)
+    if formato == 'csv':
+        escribir_csv(datos, destino, tam_bloque)
+    elif formato == 'parquet':
+        escribir_parquet(datos, destino, tam_bloque)
+    else:
+        escribir_excel({'Resultados': datos}, destino, tam_bloque)
+
+
+# ==========================================
+# DESCARGAS DIFERIDAS
+# ==========================================
+
+def archivo_temporal(escribir_en, datos, **kwargs):
+    """
+    Ejecuta ``escribir_en(datos, archivo, ...)`` sobre un archivo temporal y
+    lo devuelve rebobinado. Hasta ``MEMORIA_MAXIMA`` bytes vive en memoria;
+    por encima pasa a disco.
+    """
+    archivo = tempfile.SpooledTemporaryFile(max_size=MEMORIA_MAXIMA)
+    escribir_en(datos, archivo, **kwargs)
+    archivo.seek(0)
+    return archivo
+
+
+def _con_cache(clave, generar):
+    """
+    Envuelve ``generar`` para servir sus bytes desde ``cache_disco`` cuando
+    hay ``clave`` (parámetros que determinan el archivo) y caché configurada.
+    Los archivos mayores que una entrada de la caché no se guardan.
+    """
+    from . import cache_disco
+    cache = cache_disco.cache_disco()
+    if clave is None or cache is None:
+        return generar
+
+    def generar_o_leer():
+        llave = cache_disco.clave('exportacion', clave)
+        encontrado, datos = cache.leer('exportacion', llave)
+        if encontrado:
+            return BytesIO(datos)
+        archivo = generar()
+        if archivo.seek(0, os.SEEK_END) <= cache.max_entrada:
+            archivo.seek(0)
+            cache.guardar('exportacion', llave, archivo.read())
+        archivo.seek(0)
+        return archivo
+    return generar_o_leer
+
+
+def diferido(datos, formato, tam_bloque=TAM_BLOQUE, clave=None):
+    """Función sin argumentos que genera la tabla en ``formato`` al llamarla"""
+    return _con_cache(None if clave is None else [clave, formato],
+                      lambda: archivo_temporal(escribir, datos, formato=formato, tam_bloque=tam_bloque))
+
+
+def diferido_excel(hojas, tam_bloque=TAM_BLOQUE, clave=None):
+    """Función sin argumentos que genera el libro Excel de varias hojas al llamarla"""
+    return _con_cache(None if clave is None else [clave, 'xlsx'],
+                      lambda: archivo_temporal(escribir_excel, hojas, tam_bloque=tam_bloque))
@@ -0,0 +1,276 @@
+"""
+Gráficos de la calculadora con caché de imágenes renderizadas.
+
+Cada gráfico se identifica por sus parámetros; la primera vez se dibuja con
+matplotlib y se guardan los bytes PNG/SVG. Las siguientes peticiones con los
+mismos parámetros devuelven los bytes directamente. La caché vive a nivel de
+módulo, por lo que se comparte entre todas las sesiones del mismo proceso;
+sus fallos se buscan en ``cache_disco`` (otras réplicas y reinicios).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.style
+from matplotlib.figure import Figure
+
+from . import cache_disco, motor
+from .potencia import curva_potencia
+from .tiempos import etapa
+
+matplotlib.style.use('ggplot')
+
+FORMATOS_IMAGEN = ('png', 'svg')
+
+
+class CacheFiguras:
+    """Caché LRU de imágenes acotada por número de entradas y por bytes totales"""
+
+    def __init__(self, max_entradas=512, max_bytes=64 * 1024 * 1024):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._datos = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obtener(self, clave, generar):
+        """Devuelve los bytes de ``clave``; si faltan, los crea con ``generar()``"""
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.hits += 1
+                return self._datos[clave]
+            self.misses += 1
+
+        # Se dibuja fuera del candado para no bloquear otras sesiones; antes se
+        # busca en la caché en disco por si otra réplica ya la dibujó
+        datos = cache_disco.obtener('figura', clave, generar)
+
+        with self._lock:
+            if clave not in self._datos:
+                self._datos[clave] = datos
+                self._bytes += len(datos)
+                self._desalojar()
+        return datos
+
+    def _desalojar(self):
+        while self._datos and (len(self._datos) > self.max_entradas or self._bytes > self.max_bytes):
+            _, datos = self._datos.popitem(last=False)
+            self._bytes -= len(datos)
+
+    def limpiar(self):
+        """Vacía la caché y reinicia los contadores"""
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def estadisticas(self):
+        """Entradas, bytes ocupados, hits, misses y tasa de aciertos"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._datos),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'tasa_aciertos': self.hits / total if total else 0.0,
+            }
+
+
+cache_figuras = CacheFiguras()
+
+
+def _renderizar(fig, formato):
+    """Serializa una figura a bytes"""
+    if formato not in FORMATOS_IMAGEN:
+        raise ValueError(f"Formato de imagen no soportado: {formato}")
+    buffer = BytesIO()
+    fig.savefig(buffer, format=formato, dpi=150, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def _dibujar_efecto_p(z, error, N, p, n_marcado, formato):
+    p_values, n_values = motor.curva_n_proporcion(z, error, N)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(p_values, n_values, 'b-', linewidth=2)
+    ax.axvline(p, color='r', linestyle='--', label=f'p usado: {p:.2f}')
+    ax.axhline(n_marcado, color='r', linestyle='--', alpha=0.5)
+    ax.scatter([p], [n_marcado], color='r', s=100, zorder=5)
+    ax.set_xlabel('Proporción Poblacional (p)', fontsize=12)
+    ax.set_ylabel('Tamaño de Muestra (n)', fontsize=12)
+    ax.set_title('Tamaño de Muestra según Proporción (máximo en p=0.5)', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    return _renderizar(fig, formato)
+
+
+@etapa('grafico.efecto_p', 'grafico')
+def grafico_efecto_p(z, error, N, p, n_marcado, formato='png'):
+    """Gráfico n(p) con el punto usado marcado (bytes PNG/SVG, en caché)"""
+    clave = ('efecto_p', float(z), float(error), float(N), float(p), int(n_marcado), formato)
+    return cache_figuras.obtener(clave, lambda: _dibujar_efecto_p(z, error, N, p, n_marcado, formato))
+
+
+def _dibujar_curva_potencia(delta, sigma, n_por_grupo, alpha, bilateral, metodo, potencia_obj,
+                            puntos, formato):
+    deltas, potencias = curva_potencia(delta * 0.3, delta * 2, sigma, n_por_grupo, alpha,
+                                       bilateral, metodo, puntos)
+
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(deltas, potencias, 'b-', linewidth=2)
+    ax.axvline(delta, color='r', linestyle='--', label=f'Δ especificada: {delta}')
+    ax.axhline(potencia_obj, color='g', linestyle='--', alpha=0.5, label=f'Potencia: {potencia_obj:.0%}')
+    ax.scatter([delta], [potencia_obj], color='r', s=100, zorder=5)
+    ax.set_xlabel('Diferencia entre Medias (Δ)', fontsize=12)
+    ax.set_ylabel('Potencia Estadística (1-β)', fontsize=12)
+    ax.set_title('Curva de Potencia', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    ax.set_ylim([0, 1])
+    return _renderizar(fig, formato)
+
+
+@etapa('grafico.curva_potencia', 'grafico')
+def grafico_curva_potencia(delta, sigma, n_por_grupo, alpha, bilateral, metodo, potencia_obj,
+                           puntos=100, formato='png'):
+    """Curva de potencia frente a Δ (de 0.3Δ a 2Δ), en caché por parámetros"""
+    clave = ('curva_potencia', float(delta), float(sigma), int(n_por_grupo), float(alpha),
+             bool(bilateral), metodo, float(potencia_obj), int(puntos), formato)
+    return cache_figuras.obtener(clave, lambda: _dibujar_curva_potencia(
+        delta, sigma, n_por_grupo, alpha, bilateral, metodo, potencia_obj, puntos, formato
+    ))
+
+
+def _dibujar_potencia_proporciones(p1, p2, n_por_grupo, alpha, bilateral, metodo, potencia_obj, puntos,
+                                   formato):
+    from .proporciones import NOMBRES_METODOS, curva_potencia_n
+
+    n_max = max(2 * n_por_grupo, 10)
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ns, potencias = curva_potencia_n(p1, p2, 2, n_max, alpha, bilateral, metodo, puntos)
+    ax.plot(ns, potencias, 'b-', linewidth=2, label=NOMBRES_METODOS[metodo])
+    if metodo != 'normal':
+        ns_ref, potencias_ref = curva_potencia_n(p1, p2, 2, n_max, alpha, bilateral, 'normal')
+        ax.plot(ns_ref, potencias_ref, 'k--', linewidth=1, alpha=0.5, label=NOMBRES_METODOS['normal'])
+    ax.axvline(n_por_grupo, color='r', linestyle='--', label=f'n por grupo: {n_por_grupo:,}')
+    ax.axhline(potencia_obj, color='g', linestyle='--', alpha=0.5, label=f'Potencia: {potencia_obj:.0%}')
+    ax.scatter([n_por_grupo], [potencia_obj], color='r', s=100, zorder=5)
+    ax.set_xlabel('Tamaño por grupo (n)', fontsize=12)
+    ax.set_ylabel('Potencia Estadística (1-β)', fontsize=12)
+    ax.set_title(f'Curva de Potencia (p₁ = {p1:g}, p₂ = {p2:g})', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend(loc='lower right')
+    ax.set_ylim([0, 1])
+    return _renderizar(fig, formato)
+
+
+@etapa('grafico.potencia_proporciones', 'grafico')
+def grafico_potencia_proporciones(p1, p2, n_por_grupo, alpha, bilateral, metodo, potencia_obj, puntos=40,
+                                  formato='png'):
+    """
+    Potencia frente a n por grupo (de 2 a 2n) con el método elegido y la
+    aproximación normal de referencia; los métodos exactos usan ``puntos`` valores.
+    """
+    clave = ('potencia_proporciones', float(p1), float(p2), int(n_por_grupo), float(alpha), bool(bilateral),
+             metodo, float(potencia_obj), int(puntos), formato)
+    return cache_figuras.obtener(clave, lambda: _dibujar_potencia_proporciones(
+        p1, p2, n_por_grupo, alpha, bilateral, metodo, potencia_obj, puntos, formato
+    ))
+
+
+def _dibujar_frontera(presupuestos, errores, punto, formato):
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.plot(presupuestos, errores, 'b-', linewidth=2)
+    if punto is not None:
+        ax.scatter([punto[0]], [punto[1]], color='r', s=100, zorder=5, label='Diseño elegido')
+        ax.legend()
+    ax.set_xscale('log')
+    ax.set_xlabel('Presupuesto variable (escala log)', fontsize=12)
+    ax.set_ylabel('Error alcanzable (E)', fontsize=12)
+    ax.set_title('Frontera Costo – Precisión (asignación óptima)', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    return _renderizar(fig, formato)
+
+
+@etapa('grafico.frontera', 'grafico')
+def grafico_frontera(presupuestos, errores, punto=None, formato='png'):
+    """Frontera costo–error con el diseño elegido marcado, en caché por contenido"""
+    presupuestos = np.asarray(presupuestos, dtype=float)
+    errores = np.asarray(errores, dtype=float)
+    huella = hashlib.sha1(presupuestos.tobytes() + errores.tobytes()).hexdigest()
+    clave = ('frontera', huella, tuple(map(float, punto)) if punto is not None else None, formato)
+    return cache_figuras.obtener(clave, lambda: _dibujar_frontera(presupuestos, errores, punto, formato))
+
+
+# Rejilla máxima para las curvas de nivel: contour sobre 10⁶ celdas es lento
+# y las líneas no cambian a simple vista con una submuestra
+MAX_CELDAS_CONTORNO = 200
+
+
+def _niveles_redondos(minimo, maximo):
+    """Niveles 1-2-5 × 10^k dentro de [minimo, maximo]"""
+    niveles = [m * 10.0 ** k for k in range(0, 10) for m in (1, 2, 5)]
+    return [v for v in niveles if minimo < v < maximo]
+
+
+def _dibujar_superficie(x, y, Z, punto, etiqueta_x, etiqueta_y, titulo, etiqueta_valor, formato):
+    from matplotlib.colors import LogNorm
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    Z = np.asarray(Z, dtype=float)
+    validos = Z[np.isfinite(Z) & (Z > 0)]
+    minimo, maximo = (validos.min(), validos.max()) if validos.size else (1.0, 10.0)
+    norma = LogNorm(vmin=max(minimo, 1.0), vmax=max(maximo, minimo * 10, 2.0))
+    imagen = ax.imshow(Z, origin='lower', aspect='auto', cmap='viridis', norm=norma,
+                       extent=(x[0], x[-1], y[0], y[-1]), interpolation='nearest')
+    fig.colorbar(imagen, ax=ax, label=etiqueta_valor)
+
+    paso_x = max(len(x) // MAX_CELDAS_CONTORNO, 1)
+    paso_y = max(len(y) // MAX_CELDAS_CONTORNO, 1)
+    niveles = _niveles_redondos(norma.vmin, norma.vmax)
+    if niveles:
+        contornos = ax.contour(x[::paso_x], y[::paso_y], Z[::paso_y, ::paso_x], levels=niveles,
+                               colors='white', linewidths=0.8, alpha=0.8)
+        ax.clabel(contornos, fmt=lambda v: f"{v:,.0f}", fontsize=8)
+
+    if punto is not None:
+        ax.scatter([punto[0]], [punto[1]], color='r', s=120, marker='X', zorder=5,
+                   edgecolors='white', label=f'Diseño actual: {etiqueta_valor} = {punto[2]:,}')
+        ax.legend(loc='upper right')
+    ax.set_xlabel(etiqueta_x, fontsize=12)
+    ax.set_ylabel(etiqueta_y, fontsize=12)
+    ax.set_title(titulo, fontsize=14, fontweight='bold')
+    ax.grid(False)
+    return _renderizar(fig, formato)
+
+
+@etapa('grafico.superficie', 'grafico')
+def grafico_superficie(x, y, Z, punto=None, etiqueta_x='', etiqueta_y='', titulo='', etiqueta_valor='n',
+                       formato='png'):
+    """
+    Mapa de calor (escala log) con curvas de nivel redondas y el punto
+    actual ``(x, y, valor)`` marcado; en caché por contenido.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    Z = np.ascontiguousarray(Z)
+    huella = hashlib.sha1(x.tobytes() + y.tobytes() + Z.tobytes()).hexdigest()
+    clave = ('superficie', huella, tuple(map(float, punto)) if punto is not None else None,
+             etiqueta_x, etiqueta_y, titulo, etiqueta_valor, formato)
+    return cache_figuras.obtener(clave, lambda: _dibujar_superficie(
+        x, y, Z, punto, etiqueta_x, etiqueta_y, titulo, etiqueta_valor, formato
+    ))
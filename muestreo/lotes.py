@@ -0,0 +1,143 @@
+"""
+Procesamiento por lotes de escenarios de tamaño de muestra.
+
+Recibe una tabla de parámetros (una fila por escenario) y calcula n₀, n con
+corrección por población finita y diagnósticos por fila en una sola pasada
+vectorizada, sin bucles por fila.
+
+Columnas de entrada:
+    objetivo   'media' o 'proporcion' (opcional: se infiere de sigma / p)
+    sigma      desviación estándar (objetivo media)
+    p          proporción esperada (objetivo proporción)
+    error      error máximo E
+    confianza  nivel de confianza (0.95) o en porcentaje (95)
+    N          tamaño de población (0 o vacío = infinita)
+
+Uso sin interfaz:
+    python -m muestreo.lotes escenarios.csv resultados.parquet
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import exportacion, motor
+
+COLUMNAS_RESULTADO = ['z', 'n0', 'n', 'fraccion_muestreo', 'reduccion_fpc', 'aplica_fpc', 'valido']
+FORMATOS = ('csv', 'parquet', 'xlsx')
+
+
+def _formato_de(nombre, formato=None):
+    """Deduce el formato a partir de la extensión del archivo"""
+    if formato:
+        formato = formato.lower().lstrip('.')
+    else:
+        formato = os.path.splitext(str(nombre))[1].lower().lstrip('.')
+    if formato in ('xls', 'excel'):
+        formato = 'xlsx'
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: '{formato}'. Usa uno de {', '.join(FORMATOS)}")
+    return formato
+
+
+def leer_parametros(fuente, formato=None):
+    """Lee la tabla de parámetros desde una ruta o un archivo abierto (CSV/Parquet/Excel)"""
+    formato = _formato_de(getattr(fuente, 'name', fuente), formato)
+    if formato == 'csv':
+        return pd.read_csv(fuente)
+    if formato == 'parquet':
+        return pd.read_parquet(fuente)
+    return pd.read_excel(fuente)
+
+
+def _columna(df, nombre):
+    """Devuelve la columna como arreglo float (NaN si no existe)"""
+    if nombre in df.columns:
+        return pd.to_numeric(df[nombre], errors='coerce').to_numpy(dtype=float)
+    return np.full(len(df), np.nan)
+
+
+def calcular_lote(df):
+    """
+    Calcula el tamaño de muestra para cada fila de ``df``.
+
+    Devuelve una copia de ``df`` con las columnas de ``COLUMNAS_RESULTADO``.
+    Las filas con parámetros inválidos quedan con ``valido = False`` y n vacío.
+    """
+    sigma = _columna(df, 'sigma')
+    p = _columna(df, 'p')
+    error = _columna(df, 'error')
+    confianza = _columna(df, 'confianza')
+    N = np.nan_to_num(_columna(df, 'N'), nan=0.0)
+
+    # Confianza expresada en porcentaje (95 → 0.95)
+    confianza = np.where(confianza > 1, confianza / 100, confianza)
+
+    # Sin objetivo explícito, las filas sin sigma se tratan como proporción
+    es_proporcion = np.isnan(sigma)
+    if 'objetivo' in df.columns:
+        objetivo = df['objetivo'].fillna('').astype(str).str.strip().str.lower()
+        indicado = (objetivo != '').to_numpy()
+        es_proporcion = np.where(indicado, objetivo.str.startswith('p').to_numpy(), es_proporcion)
+
+    varianza = np.where(es_proporcion, p * (1 - p), sigma ** 2)
+
+    valido = (
+        (error > 0) & (confianza > 0) & (confianza < 1) & (N >= 0) &
+        np.where(es_proporcion, (p > 0) & (p < 1), sigma > 0)
+    )
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = motor.z_critico(np.where(valido, confianza, 0.5))
+        n0 = motor.n0_media(z, np.sqrt(varianza), error)
+        n_ajustado = motor.ajuste_fpc(n0, N)
+        n = np.ceil(n_ajustado)
+        aplica_fpc = N > 0
+        fraccion = np.where(aplica_fpc, n / np.where(aplica_fpc, N, 1.0), np.nan)
+        reduccion = np.where(n0 > 0, (n0 - n_ajustado) / n0, 0.0)
+
+    resultado = df.copy()
+    resultado['z'] = np.where(valido, z, np.nan)
+    resultado['n0'] = np.where(valido, n0, np.nan)
+    resultado['n'] = pd.array(np.where(valido, n, np.nan), dtype='Int64')
+    resultado['fraccion_muestreo'] = np.where(valido, fraccion, np.nan)
+    resultado['reduccion_fpc'] = np.where(valido, reduccion, np.nan)
+    resultado['aplica_fpc'] = aplica_fpc
+    resultado['valido'] = valido
+    return resultado
+
+
+def escribir_resultados(df, destino, formato=None, tam_bloque=100_000):
+    """
+    Escribe los resultados en ``destino`` (ruta o buffer binario).
+
+    Se escribe por bloques de ``tam_bloque`` filas en los tres formatos
+    (ver ``exportacion``); Excel en modo de memoria constante.
+    """
+    exportacion.escribir(df, destino, _formato_de(getattr(destino, 'name', destino), formato), tam_bloque)
+
+
+def main(argv=None):
+    """Punto de entrada sin interfaz gráfica"""
+    parser = argparse.ArgumentParser(
+        prog='python -m muestreo.lotes',
+        description='Calcula tamaños de muestra para una tabla de escenarios'
+    )
+    parser.add_argument('entrada', help='Archivo de parámetros (.csv, .parquet, .xlsx)')
+    parser.add_argument('salida', help='Archivo de resultados (.csv, .parquet, .xlsx)')
+    parser.add_argument('--formato-entrada', default=None)
+    parser.add_argument('--formato-salida', default=None)
+    args = parser.parse_args(argv)
+
+    df = leer_parametros(args.entrada, args.formato_entrada)
+    resultado = calcular_lote(df)
+    escribir_resultados(resultado, args.salida, args.formato_salida)
+
+    invalidas = int((~resultado['valido']).sum())
+    print(f"{len(resultado):,} escenarios procesados ({invalidas:,} inválidos) → {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,216 @@
+"""
+Motor de cálculo de tamaños de muestra.
+
+Funciones puras (sin Streamlit) que aceptan escalares o arreglos de NumPy en
+cualquier parámetro y devuelven arreglos con la forma resultante del
+broadcasting. Una sola llamada puede evaluar millones de escenarios.
+"""
+import numpy as np
+
+from .criticos import ppf_normal
+from .potencia import potencia_dif_medias
+
+MAX_DUPLICACIONES = 40  # n_dif_medias_t: tope de la búsqueda de la cota superior
+
+
+# ==========================================
+# VALORES CRÍTICOS
+# ==========================================
+
+def z_critico(confianza):
+    """Z_{α/2} para un nivel de confianza (bilateral)"""
+    confianza = np.asarray(confianza, dtype=float)
+    return ppf_normal(1 - (1 - confianza) / 2)
+
+
+def z_alfa(alpha, bilateral=True):
+    """Z_{α/2} (bilateral) o Z_α (unilateral) para un nivel de significancia"""
+    alpha = np.asarray(alpha, dtype=float)
+    return ppf_normal(np.where(bilateral, 1 - alpha / 2, 1 - alpha))
+
+
+def z_beta(potencia):
+    """Z_β asociado a la potencia (1-β)"""
+    potencia = np.asarray(potencia, dtype=float)
+    return ppf_normal(potencia)
+
+
+# ==========================================
+# ESTIMACIÓN DE MEDIAS Y PROPORCIONES
+# ==========================================
+
+def n0_media(z, sigma, error):
+    """n₀ = (Z² × σ²) / E²"""
+    z, sigma, error = (np.asarray(x, dtype=float) for x in (z, sigma, error))
+    return (z ** 2 * sigma ** 2) / (error ** 2)
+
+
+def n0_proporcion(z, p, error):
+    """n₀ = (Z² × p × (1-p)) / E²"""
+    z, p, error = (np.asarray(x, dtype=float) for x in (z, p, error))
+    return (z ** 2 * p * (1 - p)) / (error ** 2)
+
+
+def ajuste_fpc(n0, N):
+    """
+    Corrección por población finita: n = n₀ / (1 + (n₀-1)/N).
+
+    Las filas con N <= 0 o N infinito se consideran población infinita y
+    conservan n₀.
+    """
+    n0 = np.asarray(n0, dtype=float)
+    N = np.asarray(N, dtype=float)
+    finita = np.isfinite(N) & (N > 0)
+    N_seguro = np.where(finita, N, 1.0)
+    return np.where(finita, n0 / (1 + (n0 - 1) / N_seguro), n0)
+
+
+def redondear_n(n):
+    """Redondea hacia arriba a un entero (int64)"""
+    return np.ceil(np.asarray(n, dtype=float)).astype(np.int64)
+
+
+def n_media(sigma, error, confianza=0.95, N=0):
+    """Tamaño de muestra para estimar una media, con FPC si N > 0"""
+    n0 = n0_media(z_critico(confianza), sigma, error)
+    return redondear_n(ajuste_fpc(n0, N))
+
+
+def n_proporcion(p, error, confianza=0.95, N=0):
+    """Tamaño de muestra para estimar una proporción, con FPC si N > 0"""
+    n0 = n0_proporcion(z_critico(confianza), p, error)
+    return redondear_n(ajuste_fpc(n0, N))
+
+
+def curva_n_proporcion(z, error, N=0, puntos=100, p_min=0.01, p_max=0.99):
+    """
+    Curva n(p) para estimar una proporción: devuelve ``(p, n)``.
+
+    n₀ se redondea antes de aplicar la FPC, como en la página de proporciones.
+    """
+    p = np.linspace(p_min, p_max, int(puntos))
+    n0 = redondear_n(n0_proporcion(z, p, error))
+    return p, redondear_n(ajuste_fpc(n0, N))
+
+
+# ==========================================
+# COMPARACIÓN DE DOS GRUPOS
+# ==========================================
+
+def n_dif_medias_z(delta, sigma, alpha=0.05, potencia=0.80, bilateral=True):
+    """n por grupo = 2 × [(Z_{α/2} + Z_β) × σ / Δ]² (aproximación normal)"""
+    delta = np.asarray(delta, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    return redondear_n(2 * ((z_alfa(alpha, bilateral) + z_beta(potencia)) * sigma / delta) ** 2)
+
+
+def n_dif_medias_t(delta, sigma, alpha=0.05, potencia=0.80, bilateral=True):
+    """
+    Mínimo n entero por grupo cuya potencia exacta (t no central, gl = 2n - 2)
+    alcanza la potencia objetivo.
+
+    Búsqueda entera acotada y vectorizada: se mantiene por fila un intervalo
+    [lo, hi] con potencia(lo) < objetivo <= potencia(hi) y se biseca hasta
+    que hi = lo + 1. La potencia es monótona en n, así que hi es el mínimo.
+
+    Se resuelve con |Δ|: en una prueba unilateral la hipótesis alternativa
+    se toma en la dirección de Δ, como en ``n_dif_medias_z``. Lanza
+    ValueError si Δ o σ no son finitos, Δ = 0, σ <= 0, la potencia no está
+    en (0, 1) o no se alcanza en ``MAX_DUPLICACIONES`` duplicaciones de n.
+    """
+    delta, sigma, alpha, potencia, bilateral = np.broadcast_arrays(
+        np.abs(np.asarray(delta, dtype=float)), np.asarray(sigma, dtype=float),
+        np.asarray(alpha, dtype=float), np.asarray(potencia, dtype=float),
+        np.asarray(bilateral, dtype=bool)
+    )
+    if not (np.isfinite(delta).all() and np.isfinite(sigma).all()):
+        raise ValueError("Δ y σ deben ser finitos")
+    if (delta == 0).any() or (sigma <= 0).any():
+        raise ValueError("Δ debe ser distinto de cero y σ mayor que cero")
+    if ((potencia <= 0) | (potencia >= 1)).any():
+        raise ValueError("La potencia debe estar entre 0 y 1")
+    forma = delta.shape
+    delta, sigma, alpha, potencia, bilateral = (
+        x.ravel() for x in (delta, sigma, alpha, potencia, bilateral)
+    )
+
+    def alcanza(n, filas):
+        # n = 1 no tiene grados de libertad: nunca alcanza la potencia
+        pot = potencia_dif_medias(delta[filas], sigma[filas], np.maximum(n, 2),
+                                  alpha[filas], bilateral[filas], metodo='t')
+        return (n >= 2) & (pot >= potencia[filas])
+
+    todas = np.arange(delta.size)
+
+    # Cota inferior: la aproximación normal da n algo menor que el exacto
+    n_z = n_dif_medias_z(delta, sigma, alpha, potencia, bilateral)
+    lo = np.maximum(n_z - 1, 1)
+    lo = np.where(alcanza(lo, todas), 1, lo)
+
+    # Cota superior: duplicar hasta alcanzar la potencia
+    hi = np.maximum(n_z + 2, lo + 1)
+    pendiente = ~alcanza(hi, todas)
+    for _ in range(MAX_DUPLICACIONES):
+        if not pendiente.any():
+            break
+        filas = todas[pendiente]
+        lo[filas] = hi[filas]
+        hi[filas] = 2 * hi[filas]
+        pendiente[filas] = ~alcanza(hi[filas], filas)
+    if pendiente.any():
+        raise ValueError("La potencia objetivo no se alcanza con ningún tamaño de muestra razonable")
+
+    # Bisección entera
+    abierto = hi - lo > 1
+    while abierto.any():
+        filas = todas[abierto]
+        medio = (lo[filas] + hi[filas]) // 2
+        ok = alcanza(medio, filas)
+        hi[filas] = np.where(ok, medio, hi[filas])
+        lo[filas] = np.where(ok, lo[filas], medio)
+        abierto = hi - lo > 1
+
+    return hi.reshape(forma)[()]
+
+
+def n_dif_proporciones(p1, p2, alpha=0.05, potencia=0.80, bilateral=True):
+    """
+    n por grupo = [Z_{α/2}√(2p̄(1-p̄)) + Z_β√(p₁(1-p₁) + p₂(1-p₂))]² / (p₁ - p₂)²
+
+    (Z_α en lugar de Z_{α/2} si la prueba es unilateral)
+    """
+    p1 = np.asarray(p1, dtype=float)
+    p2 = np.asarray(p2, dtype=float)
+    dif = np.abs(p1 - p2)
+    p_prom = (p1 + p2) / 2
+    numerador = (z_alfa(alpha, bilateral) * np.sqrt(2 * p_prom * (1 - p_prom)) +
+                 z_beta(potencia) * np.sqrt(p1 * (1 - p1) + p2 * (1 - p2)))
+    return redondear_n((numerador / dif) ** 2)
+
+
+def d_cohen(delta, sigma):
+    """d = Δ / σ"""
+    return np.asarray(delta, dtype=float) / np.asarray(sigma, dtype=float)
+
+
+# ==========================================
+# CONGLOMERADOS Y SISTEMÁTICO
+# ==========================================
+
+def deff_conglomerados(tam_prom, icc):
+    """DEFF = 1 + (m - 1) × ρ"""
+    return 1 + (np.asarray(tam_prom, dtype=float) - 1) * np.asarray(icc, dtype=float)
+
+
+def n_conglomerados(n_mas, tam_prom, icc):
+    """Número de conglomerados m = ⌈n_MAS × DEFF / tamaño promedio⌉"""
+    n_complex = np.asarray(n_mas, dtype=float) * deff_conglomerados(tam_prom, icc)
+    return redondear_n(n_complex / np.asarray(tam_prom, dtype=float))
+
+
+def intervalo_sistematico(N, n):
+    """k = ⌊N / n⌋ (0 cuando n <= 0)"""
+    N = np.asarray(N, dtype=float)
+    n = np.asarray(n, dtype=float)
+    n_seguro = np.where(n > 0, n, 1.0)
+    return np.where(n > 0, np.floor(N / n_seguro), 0).astype(np.int64)
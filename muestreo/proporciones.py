@@ -0,0 +1,325 @@
+"""
+Motor de potencia para comparar dos proporciones (n por grupo, asignación 1:1).
+
+Métodos:
+    normal     aproximación normal con varianza combinada bajo H0
+    fleiss     la anterior con corrección por continuidad (Fleiss, Levin y Paik)
+    arcoseno   transformación 2·arcsen√p (h de Cohen)
+    fisher     prueba exacta condicional de Fisher
+    barnard    prueba exacta incondicional de Barnard (Z con varianza combinada)
+
+La potencia exacta se obtiene enumerando la rejilla de resultados (x₁, x₂)
+con arreglos, sin bucles por celda. Para cada total s = x₁ + x₂ la región de
+rechazo de ambas pruebas son dos colas en x₁ (x₁ <= inferior[s] o
+x₁ >= superior[s]), y la potencia es la suma de P(x₁)·P(x₂) sobre la región,
+con cada binomial recortada a ±10 desviaciones (la masa que queda fuera es
+despreciable). Las pruebas unilaterales contrastan en la dirección de p₁ - p₂.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import gammaln
+from scipy.stats import norm
+
+from . import motor
+
+METODOS_PROPORCIONES = ('normal', 'fleiss', 'arcoseno', 'fisher', 'barnard')
+METODOS_EXACTOS = ('fisher', 'barnard')
+NOMBRES_METODOS = {
+    'normal': 'Normal (varianza combinada)',
+    'fleiss': 'Normal con corrección de Fleiss',
+    'arcoseno': 'Arcoseno (h de Cohen)',
+    'fisher': 'Exacta de Fisher',
+    'barnard': 'Exacta de Barnard',
+}
+DESVIACIONES = 10
+PUNTOS_NUISANCE = 128
+MAX_N_EXACTO = 20_000
+MAX_PUNTOS_CURVA = 200
+
+
+def _validar_metodo(metodo):
+    if metodo not in METODOS_PROPORCIONES:
+        raise ValueError(f"Método desconocido: {metodo}. Usa uno de {', '.join(METODOS_PROPORCIONES)}")
+
+
+def _validar_exacto(alpha):
+    # Los cortes exactos se buscan en la mitad superior de cada total (α < ½)
+    if np.any((alpha <= 0) | (alpha >= 0.5)):
+        raise ValueError("Con métodos exactos α debe estar entre 0 y 0.5")
+
+
+# ==========================================
+# APROXIMACIONES CERRADAS
+# ==========================================
+
+def _n_aproximado(p1, p2, alpha, potencia, bilateral, metodo):
+    p1 = np.asarray(p1, dtype=float)
+    p2 = np.asarray(p2, dtype=float)
+    if metodo == 'arcoseno':
+        h = 2 * np.arcsin(np.sqrt(p1)) - 2 * np.arcsin(np.sqrt(p2))
+        return motor.redondear_n(2 * ((motor.z_alfa(alpha, bilateral) + motor.z_beta(potencia)) / h) ** 2)
+    if metodo == 'normal':
+        return motor.n_dif_proporciones(p1, p2, alpha, potencia, bilateral)
+    # Fleiss: √n'(|Δ| - 1/n') = √n|Δ|  ⇒  n' = n/4 · (1 + √(1 + 4/(n|Δ|)))²
+    dif = np.abs(p1 - p2)
+    p_prom = (p1 + p2) / 2
+    n = ((motor.z_alfa(alpha, bilateral) * np.sqrt(2 * p_prom * (1 - p_prom)) +
+          motor.z_beta(potencia) * np.sqrt(p1 * (1 - p1) + p2 * (1 - p2))) / dif) ** 2
+    return motor.redondear_n(n / 4 * (1 + np.sqrt(1 + 4 / (n * dif))) ** 2)
+
+
+def _potencia_aproximada(p1, p2, n, alpha, bilateral, metodo):
+    p1, p2, n, alpha, bilateral = np.broadcast_arrays(
+        np.asarray(p1, dtype=float), np.asarray(p2, dtype=float), np.asarray(n, dtype=float),
+        np.asarray(alpha, dtype=float), np.asarray(bilateral, dtype=bool)
+    )
+    z_a = motor.z_alfa(alpha, bilateral)
+    if metodo == 'arcoseno':
+        ncp = np.abs(2 * np.arcsin(np.sqrt(p1)) - 2 * np.arcsin(np.sqrt(p2))) * np.sqrt(n / 2)
+        superior = norm.sf(z_a - ncp)
+        inferior = norm.cdf(-z_a - ncp)
+    else:
+        # Se rechaza si |p̂₁ - p̂₂| - cc >= Z·ee₀, con cc = 1/n en Fleiss
+        dif = np.abs(p1 - p2)
+        p_prom = (p1 + p2) / 2
+        ee0 = np.sqrt(2 * p_prom * (1 - p_prom) / n)
+        ee1 = np.sqrt((p1 * (1 - p1) + p2 * (1 - p2)) / n)
+        cc = 1 / n if metodo == 'fleiss' else 0.0
+        superior = norm.cdf((dif - z_a * ee0 - cc) / ee1)
+        inferior = norm.cdf((-dif - z_a * ee0 - cc) / ee1)
+    return np.where(bilateral, superior + inferior, superior)[()]
+
+
+# ==========================================
+# ENUMERACIÓN EXACTA
+# ==========================================
+
+_log_factorial = gammaln(np.arange(2 * MAX_N_EXACTO + 2) + 1.0)
+
+
+def _log_comb(n, k):
+    """log C(n, k) por consulta a la tabla de log-factoriales"""
+    return _log_factorial[n] - _log_factorial[k] - _log_factorial[n - k]
+
+
+def _binomial(n, p):
+    """Valores x y P(X = x) de Bin(n, p) en la ventana de ±10 desviaciones"""
+    de = np.sqrt(n * p * (1 - p))
+    lo = max(int(np.floor(n * p - DESVIACIONES * de)) - 1, 0)
+    hi = min(int(np.ceil(n * p + DESVIACIONES * de)) + 1, n)
+    x = np.arange(lo, hi + 1)
+    return x, np.exp(_log_comb(n, x) + x * np.log(p) + (n - x) * np.log1p(-p))
+
+
+def _cola_nula(n, s):
+    """
+    P(X₁ >= x | S = s) bajo H0 para x = ⌈s/2⌉ + j, j = 0..filas-1.
+
+    Con n₁ = n₂ la hipergeométrica es simétrica alrededor de s/2, así que
+    basta la mitad superior: P(X₁ <= x | s) = P(X₁ >= s - x | s). Cada fila
+    de la matriz es un total de ``s``; la ventana cubre 10 desviaciones (más
+    allá la probabilidad es despreciable) y termina en una columna de ceros.
+    """
+    filas = min(int(np.ceil(DESVIACIONES * np.sqrt(n / 8))) + 2, n + 1)
+    base = (s + 1) // 2
+    lf = _log_factorial
+    log_inicio = (2 * lf[n] - lf[2 * n] + lf[s] + lf[2 * n - s]
+                  - lf[base] - lf[n - base] - lf[s - base] - lf[n - s + base])
+    x = (base[:, None] + np.arange(filas - 1)[None, :]).astype(float)
+    # Pasada la cota min(n, s) el cociente f(x+1)/f(x) se anula y las celdas quedan en 0
+    cociente = (np.maximum(n - x, 0) * np.maximum(s[:, None] - x, 0)) / ((x + 1) * (n - s[:, None] + x + 1))
+    f = np.empty((s.size, filas + 1))
+    f[:, 0] = np.exp(log_inicio)
+    np.cumprod(cociente, axis=1, out=f[:, 1:filas])
+    f[:, 1:filas] *= f[:, :1]
+    f[:, filas] = 0.0
+    return base, np.cumsum(f[:, ::-1], axis=1)[:, ::-1]
+
+
+def _region_fisher(n, alpha, bilateral, s):
+    """
+    Cortes (inferior, superior) de la prueba de Fisher para cada total de ``s``.
+
+    Por la simetría, el p-valor bilateral (masa de los resultados no más
+    probables que el observado) es el doble de la cola y la región inferior
+    es el espejo x₁ <= s - superior.
+    """
+    base, cola = _cola_nula(n, s)
+    # La última columna (cola 0) marca "sin rechazo dentro de la ventana"
+    superior = base + np.argmax(cola <= (alpha / 2 if bilateral else alpha), axis=1)
+    return (s - superior if bilateral else np.full(s.size, -1)), superior
+
+
+def _nuisance():
+    """Rejilla de π en (0, ½], más densa cerca de 0 (con n₁ = n₂ el tamaño es simétrico en π)"""
+    return 0.5 - 0.5 * np.cos(np.linspace(0, np.pi / 2, PUNTOS_NUISANCE + 1)[1:])
+
+
+@lru_cache(maxsize=256)
+def _region_barnard(n, alpha, bilateral):
+    """
+    Cortes de la prueba de Barnard para todos los totales s = 0..2n.
+
+    Se rechaza si Z >= z* (o |Z| >= z*), con z* el menor valor cuyo tamaño
+    máximo sobre la proporción común π no supera α. Para cada π el tamaño es
+    Σₛ P(S = s | π)·P(rechazo | s), y P(rechazo | s) es una cola de la
+    hipergeométrica, así que todas las π se evalúan en un solo producto
+    matriz-vector.
+    """
+    todos = np.arange(2 * n + 1)
+    # Z = (2x₁ - s) / √(s(2n - s)/(2n)); con s = 0 o s = 2n no se rechaza nunca
+    escala_todos = np.sqrt(todos * (2 * n - todos) / (2 * n))
+
+    def cortes(z, s=todos, escala=escala_todos):
+        definida = escala > 0
+        superior = np.where(definida, np.ceil((s + z * escala) / 2 - 1e-9), n + 1).astype(np.int64)
+        if not bilateral:
+            return np.full(s.size, -1), superior
+        inferior = np.where(definida, np.floor((s - z * escala) / 2 + 1e-9), -1).astype(np.int64)
+        return inferior, superior
+
+    # Con π <= ½ los totales por encima de n + 10 desviaciones no pesan
+    s = todos[:min(n + int(np.ceil(DESVIACIONES * np.sqrt(n / 2))) + 2, 2 * n) + 1]
+    escala = escala_todos[:s.size]
+    base, cola = _cola_nula(n, s)
+    ultima = cola.shape[1] - 1
+    filas_s = np.arange(s.size)
+
+    pi = _nuisance()
+    pesos = np.exp(_log_comb(2 * n, s)[None, :] + s * np.log(pi)[:, None] + (2 * n - s) * np.log1p(-pi)[:, None])
+
+    def tamano(z):
+        # Con z >= 0 ambos cortes caen en la mitad superior (la inferior por simetría)
+        inferior, superior = cortes(z, s, escala)
+        rechazo = cola[filas_s, np.minimum(superior - base, ultima)]
+        if bilateral:
+            rechazo = rechazo + cola[filas_s, np.minimum(s - inferior - base, ultima)]
+        return (pesos @ rechazo).max()
+
+    # El tamaño decrece con z: bisección hasta una resolución menor que el
+    # espaciado entre valores posibles de Z
+    z_a = float(motor.z_alfa(alpha, bilateral))
+    lo, hi = 0.0, z_a + 2.0
+    if tamano(z_a) <= alpha:
+        hi = z_a
+    else:
+        lo = z_a
+    while hi - lo > 1e-7:
+        medio = (lo + hi) / 2
+        if tamano(medio) <= alpha:
+            hi = medio
+        else:
+            lo = medio
+    return cortes(hi)
+
+
+def _potencia_exacta(p1, p2, n, alpha, bilateral, metodo):
+    if p1 < p2:  # la unilateral contrasta en la dirección de p₁ - p₂
+        p1, p2 = p2, p1
+    x1, b1 = _binomial(n, p1)
+    x2, b2 = _binomial(n, p2)
+    total = x1[:, None] + x2[None, :]
+    if metodo == 'fisher':
+        s0 = x1[0] + x2[0]
+        inferior, superior = _region_fisher(n, alpha, bilateral, np.arange(s0, x1[-1] + x2[-1] + 1))
+        total = total - s0
+    else:
+        inferior, superior = _region_barnard(n, float(alpha), bool(bilateral))
+    rechaza = (x1[:, None] >= superior[total]) | (x1[:, None] <= inferior[total])
+    return float(b1 @ np.where(rechaza, b2[None, :], 0.0).sum(axis=1))
+
+
+def _n_exacto(p1, p2, alpha, potencia, bilateral, metodo):
+    """
+    n por grupo con potencia exacta >= objetivo: se parte de la aproximación
+    más cercana (Fleiss para Fisher, normal para Barnard), se abre un
+    intervalo con pasos crecientes y se biseca.
+
+    Por la discreción de las pruebas exactas la potencia oscila con n
+    (dientes de sierra); el n devuelto alcanza el objetivo, pero algún n
+    algo menor fuera del intervalo también podría hacerlo.
+    """
+    def alcanza(n):
+        return _potencia_exacta(p1, p2, n, alpha, bilateral, metodo) >= potencia
+
+    inicial = int(_n_aproximado(p1, p2, alpha, potencia, bilateral, 'fleiss' if metodo == 'fisher' else 'normal'))
+    inicial = min(max(inicial, 2), MAX_N_EXACTO)
+    paso = max(inicial // 100, 1)
+    if alcanza(inicial):
+        hi = inicial
+        lo = max(hi - paso, 1)
+        while lo > 1 and alcanza(lo):  # con n = 1 no se asume potencia suficiente
+            hi, paso = lo, paso * 2
+            lo = max(hi - paso, 1)
+    else:
+        lo = inicial
+        hi = min(lo + paso, MAX_N_EXACTO)
+        while not alcanza(hi):
+            if hi >= MAX_N_EXACTO:
+                raise ValueError(f"El n exacto supera {MAX_N_EXACTO:,} por grupo; usa un método aproximado")
+            lo, paso = hi, paso * 2
+            hi = min(lo + paso, MAX_N_EXACTO)
+    while hi - lo > 1:
+        medio = (lo + hi) // 2
+        if alcanza(medio):
+            hi = medio
+        else:
+            lo = medio
+    return hi
+
+
+# ==========================================
+# API PÚBLICA
+# ==========================================
+
+def potencia_dif_proporciones(p1, p2, n_por_grupo, alpha=0.05, bilateral=True, metodo='normal'):
+    """
+    Potencia (1-β) de la comparación de dos proporciones con n por grupo.
+
+    Los métodos aproximados admiten arreglos en todos los parámetros; los
+    exactos evalúan cada combinación por enumeración.
+    """
+    _validar_metodo(metodo)
+    if metodo not in METODOS_EXACTOS:
+        return _potencia_aproximada(p1, p2, n_por_grupo, alpha, bilateral, metodo)
+    p1, p2, n, alpha, bilateral = np.broadcast_arrays(
+        np.asarray(p1, dtype=float), np.asarray(p2, dtype=float), np.asarray(n_por_grupo, dtype=np.int64),
+        np.asarray(alpha, dtype=float), np.asarray(bilateral, dtype=bool)
+    )
+    _validar_exacto(alpha)
+    if (n > MAX_N_EXACTO).any():
+        raise ValueError(f"La potencia exacta admite hasta {MAX_N_EXACTO:,} por grupo")
+    salida = np.array([
+        _potencia_exacta(*valores, metodo)
+        for valores in zip(p1.ravel(), p2.ravel(), n.ravel().tolist(), alpha.ravel(), bilateral.ravel())
+    ])
+    return salida.reshape(p1.shape)[()]
+
+
+def n_dif_proporciones(p1, p2, alpha=0.05, potencia=0.80, bilateral=True, metodo='normal'):
+    """n por grupo para detectar p₁ ≠ p₂ (o p₁ > p₂ / p₁ < p₂ si es unilateral)"""
+    _validar_metodo(metodo)
+    if metodo not in METODOS_EXACTOS:
+        return _n_aproximado(p1, p2, alpha, potencia, bilateral, metodo)
+    p1, p2, alpha, potencia, bilateral = np.broadcast_arrays(
+        np.asarray(p1, dtype=float), np.asarray(p2, dtype=float), np.asarray(alpha, dtype=float),
+        np.asarray(potencia, dtype=float), np.asarray(bilateral, dtype=bool)
+    )
+    _validar_exacto(alpha)
+    salida = np.array([
+        _n_exacto(*valores, metodo)
+        for valores in zip(p1.ravel(), p2.ravel(), alpha.ravel(), potencia.ravel(), bilateral.ravel())
+    ], dtype=np.int64)
+    return salida.reshape(p1.shape)[()]
+
+
+def curva_potencia_n(p1, p2, n_min, n_max, alpha=0.05, bilateral=True, metodo='normal', puntos=MAX_PUNTOS_CURVA):
+    """
+    Curva de potencia frente a n por grupo. Con métodos exactos se evalúan a
+    lo sumo ``puntos`` valores enteros equiespaciados.
+    """
+    ns = np.arange(max(int(n_min), 2), int(n_max) + 1)
+    if metodo in METODOS_EXACTOS and ns.size > puntos:
+        ns = np.unique(np.linspace(ns[0], ns[-1], puntos).round().astype(np.int64))
+    return ns, potencia_dif_proporciones(p1, p2, ns, alpha, bilateral, metodo)
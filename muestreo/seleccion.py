@@ -0,0 +1,275 @@
+"""
+Selección de unidades desde marcos muestrales grandes.
+
+El marco (CSV o Parquet, potencialmente cientos de millones de filas) se lee
+por bloques y nunca se carga completo en memoria:
+
+- Si se conoce N, cada bloque recibe un número de elegidos con la
+  distribución hipergeométrica (lo que falta por sortear entre lo que falta
+  por leer), se sortean dentro del bloque y se escriben al archivo de salida
+  a medida que pasan (selección secuencial, memoria del orden del bloque).
+- Si N es desconocido, se usa muestreo de reservorio: cada registro recibe
+  una clave uniforme y se conservan los n de menor clave (memoria O(n)).
+
+Ambos métodos producen una muestra aleatoria simple exacta y reproducible con
+la semilla indicada. La salida agrega la columna ``posicion_marco`` (1 a N).
+
+Uso sin interfaz:
+    python -m muestreo.seleccion marco.csv muestra.csv --n 400 --semilla 42
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMATOS_MARCO = ('csv', 'parquet')
+TAM_BLOQUE = 1_000_000
+COLUMNA_POSICION = 'posicion_marco'
+MAX_N_SECUENCIAL = 10**9  # numpy acota los parámetros de la hipergeométrica
+
+
+def _formato_de(nombre, formato=None):
+    """Deduce el formato del marco a partir de la extensión"""
+    formato = (formato or os.path.splitext(str(nombre))[1]).lower().lstrip('.')
+    if formato not in FORMATOS_MARCO:
+        raise ValueError(f"Formato no soportado: '{formato}'. Usa uno de {', '.join(FORMATOS_MARCO)}")
+    return formato
+
+
+def leer_por_bloques(fuente, formato=None, tam_bloque=TAM_BLOQUE):
+    """Itera el marco muestral en DataFrames de a lo sumo ``tam_bloque`` filas"""
+    formato = _formato_de(getattr(fuente, 'name', fuente), formato)
+    if formato == 'csv':
+        yield from pd.read_csv(fuente, chunksize=tam_bloque)
+    else:
+        import pyarrow.parquet as pq
+        for lote in pq.ParquetFile(fuente).iter_batches(batch_size=tam_bloque):
+            yield lote.to_pandas()
+
+
+class EscritorBloques:
+    """Escribe DataFrames sucesivos en un único archivo CSV o Parquet"""
+
+    def __init__(self, destino, formato=None):
+        self.destino = destino
+        self.formato = _formato_de(getattr(destino, 'name', destino), formato)
+        self.filas = 0
+        self._escritor = None
+        self._esquema = None
+
+    def escribir(self, df):
+        if self.formato == 'csv':
+            df.to_csv(self.destino, index=False, header=self._escritor is None,
+                      mode='w' if self._escritor is None else 'a')
+            self._escritor = True
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabla = pa.Table.from_pandas(df, schema=self._esquema, preserve_index=False)
+            if self._escritor is None:
+                self._esquema = tabla.schema
+                self._escritor = pq.ParquetWriter(self.destino, self._esquema)
+            self._escritor.write_table(tabla)
+        self.filas += len(df)
+
+    def cerrar(self):
+        if self.formato == 'parquet' and self._escritor is not None:
+            self._escritor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def _seleccion_secuencial(bloques, n, N, rng, escritor):
+    """Reparte n entre los bloques (hipergeométrica) y escribe los registros elegidos al pasar"""
+    inicio, faltan = 0, n
+    for bloque in bloques:
+        fin = inicio + len(bloque)
+        por_leer = max(N - inicio, 0)
+        tam = min(len(bloque), por_leer)
+        if faltan and tam:
+            k = faltan if tam == por_leer else int(rng.hypergeometric(tam, por_leer - tam, faltan))
+            if k:
+                elegidos = np.sort(rng.choice(tam, size=k, replace=False))
+                muestra = bloque.iloc[elegidos].copy()
+                muestra[COLUMNA_POSICION] = inicio + elegidos + 1
+                escritor.escribir(muestra)
+                faltan -= k
+        inicio = fin
+    if inicio != N:
+        raise ValueError(f"El marco tiene {inicio:,} registros, pero se indicó N = {N:,}")
+    return inicio
+
+
+def _seleccion_reservorio(bloques, n, rng, escritor):
+    """Conserva los n registros con menor clave uniforme (reservorio por bloques)"""
+    reserva = None
+    claves = np.empty(0)
+    inicio = 0
+    for bloque in bloques:
+        u = rng.random(len(bloque))
+        posiciones = np.arange(inicio, inicio + len(bloque)) + 1
+        inicio += len(bloque)
+
+        # Con la reserva llena, solo compiten los registros bajo la peor clave actual
+        if claves.size == n:
+            candidatos = u < claves.max()
+            if not candidatos.any():
+                continue
+            bloque, u, posiciones = bloque[candidatos], u[candidatos], posiciones[candidatos]
+
+        bloque = bloque.assign(**{COLUMNA_POSICION: posiciones})
+        reserva = bloque if reserva is None else pd.concat([reserva, bloque], ignore_index=True)
+        claves = np.concatenate([claves, u])
+        if claves.size > n:
+            conservar = np.argpartition(claves, n - 1)[:n]
+            reserva = reserva.iloc[conservar].reset_index(drop=True)
+            claves = claves[conservar]
+
+    if reserva is not None:
+        escritor.escribir(reserva.sort_values(COLUMNA_POSICION, kind='stable'))
+    return inicio
+
+
+def seleccionar_mas(fuente, n, destino, semilla=None, N=None, formato_entrada=None,
+                    formato_salida=None, tam_bloque=TAM_BLOQUE):
+    """
+    Selecciona una muestra aleatoria simple de tamaño ``n`` del marco ``fuente``.
+
+    Si se indica ``N`` (número de registros del marco, menor que
+    ``MAX_N_SECUENCIAL``) se usa selección secuencial y la salida se escribe
+    en streaming; si no, muestreo de reservorio. Devuelve un resumen con N, n seleccionados y el método.
+    """
+    n = int(n)
+    if n < 1:
+        raise ValueError("El tamaño de muestra debe ser mayor a 0.")
+    rng = np.random.default_rng(semilla)
+    bloques = leer_por_bloques(fuente, formato_entrada, tam_bloque)
+
+    with EscritorBloques(destino, formato_salida) as escritor:
+        if N is not None and n < N < MAX_N_SECUENCIAL:
+            metodo = 'secuencial'
+            total = _seleccion_secuencial(bloques, n, int(N), rng, escritor)
+        else:
+            metodo = 'reservorio'
+            total = _seleccion_reservorio(bloques, n, rng, escritor)
+
+    return {'N': total, 'n': escritor.filas, 'metodo': metodo, 'semilla': semilla}
+
+
+# ==========================================
+# SELECCIÓN SISTEMÁTICA
+# ==========================================
+
+METODOS_SISTEMATICO = ('lineal', 'fraccional', 'circular')
+FORMATOS_POSICIONES = ('csv', 'npy')
+
+
+class SeleccionSistematica:
+    """
+    Posiciones (1 a N) de una muestra sistemática, generadas por bloques.
+
+    Métodos:
+        lineal      k = ⌊N/n⌋, arranque r en 1..k, posiciones r, r+k, ... ≤ N
+        fraccional  k = N/n sin truncar, r ~ U(0, k], posiciones ⌈r + i·k⌉
+                    (siempre n unidades distintas)
+        circular    k = ⌊N/n⌋, arranque r en 1..N, posiciones ((r-1+i·k) mod N) + 1
+
+    Nunca se materializa la lista completa: ``bloques()`` produce arreglos
+    ``int64`` de a lo sumo ``tam_bloque`` posiciones, por lo que N puede
+    estar en los miles de millones.
+    """
+
+    def __init__(self, N, n, metodo='lineal', semilla=None, inicio=None):
+        if metodo not in METODOS_SISTEMATICO:
+            raise ValueError(f"Método sistemático desconocido: {metodo}")
+        self.N = int(N)
+        self.n = int(n)
+        self.metodo = metodo
+        if self.n < 1 or self.N < self.n:
+            raise ValueError("Se requiere 0 < n <= N.")
+
+        rng = np.random.default_rng(semilla)
+        if metodo == 'fraccional':
+            self.k = self.N / self.n
+            self.inicio = float(inicio) if inicio is not None else float((1 - rng.random()) * self.k)
+            self.n_efectivo = self.n
+        else:
+            self.k = self.N // self.n
+            limite = self.k if metodo == 'lineal' else self.N
+            self.inicio = int(inicio) if inicio is not None else int(rng.integers(1, limite + 1))
+            if metodo == 'lineal':
+                self.n_efectivo = min(self.n, (self.N - self.inicio) // self.k + 1)
+            else:
+                self.n_efectivo = self.n
+
+    def bloques(self, tam_bloque=TAM_BLOQUE):
+        """Itera las posiciones seleccionadas en orden de selección"""
+        for i0 in range(0, self.n_efectivo, tam_bloque):
+            i = np.arange(i0, min(i0 + tam_bloque, self.n_efectivo), dtype=np.int64)
+            if self.metodo == 'lineal':
+                yield self.inicio + i * self.k
+            elif self.metodo == 'fraccional':
+                yield np.ceil(self.inicio + i * self.k).astype(np.int64)
+            else:
+                yield (self.inicio - 1 + i * self.k) % self.N + 1
+
+    def primeras(self, cantidad=20):
+        """Primeras posiciones de la selección (para mostrar)"""
+        return next(self.bloques(cantidad), np.empty(0, dtype=np.int64))
+
+    def escribir(self, destino, formato='csv', tam_bloque=TAM_BLOQUE):
+        """
+        Escribe las posiciones en ``destino`` (ruta o buffer binario).
+
+        ``csv`` produce una columna ``posicion``; ``npy`` un arreglo int64
+        legible con ``np.load`` (o ``np.load(..., mmap_mode='r')``).
+        """
+        if formato not in FORMATOS_POSICIONES:
+            raise ValueError(f"Formato no soportado: '{formato}'. Usa uno de {', '.join(FORMATOS_POSICIONES)}")
+        propio = isinstance(destino, (str, os.PathLike))
+        f = open(destino, 'wb') if propio else destino
+        try:
+            if formato == 'csv':
+                f.write(b'posicion\n')
+                for bloque in self.bloques(tam_bloque):
+                    f.write(('\n'.join(map(str, bloque.tolist())) + '\n').encode('ascii'))
+            else:
+                np.lib.format.write_array_header_1_0(
+                    f, {'descr': '<i8', 'fortran_order': False, 'shape': (self.n_efectivo,)}
+                )
+                for bloque in self.bloques(tam_bloque):
+                    f.write(bloque.astype('<i8').tobytes())
+        finally:
+            if propio:
+                f.close()
+
+
+def main(argv=None):
+    """Punto de entrada sin interfaz gráfica"""
+    parser = argparse.ArgumentParser(
+        prog='python -m muestreo.seleccion',
+        description='Selecciona una muestra aleatoria simple desde un marco muestral'
+    )
+    parser.add_argument('marco', help='Marco muestral (.csv o .parquet)')
+    parser.add_argument('salida', help='Archivo de salida (.csv o .parquet)')
+    parser.add_argument('--n', type=int, required=True, help='Tamaño de muestra')
+    parser.add_argument('--semilla', type=int, default=None)
+    parser.add_argument('--N', type=int, default=None,
+                        help='Registros del marco, si se conocen (activa selección secuencial)')
+    parser.add_argument('--tam-bloque', type=int, default=TAM_BLOQUE)
+    args = parser.parse_args(argv)
+
+    resumen = seleccionar_mas(args.marco, args.n, args.salida, args.semilla, args.N,
+                              tam_bloque=args.tam_bloque)
+    print(f"{resumen['n']:,} de {resumen['N']:,} registros seleccionados "
+          f"({resumen['metodo']}) → {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,272 @@
+"""
+Servicio HTTP local y asíncrono para las calculadoras (Starlette + uvicorn).
+
+Las solicitudes concurrentes se acumulan durante una ventana corta y se
+resuelven juntas con ``api.calcular_varias`` (una llamada vectorizada por
+calculadora). Las respuestas se guardan en una caché LRU por parámetros y
+las solicitudes idénticas en curso comparten el mismo cálculo, salvo las
+aleatorias (``api.memorizable``: sistemático sin semilla). Con
+``MUESTREO_CACHE_DISCO`` los fallos de la LRU se buscan antes en la caché en
+disco que comparten todas las réplicas.
+
+Rutas:
+    GET  /salud                      estado del servicio
+    GET  /calculadoras               calculadoras disponibles
+    POST /calcular/{calculadora}     parámetros en JSON → resultado en JSON
+    POST /lote                       lista de {"calculadora": ..., parámetros} → lista de resultados
+    GET  /metricas                   solicitudes, lotes y aciertos de caché
+    GET  /metrics                    tiempos por etapa en formato de texto de Prometheus
+
+Uso:
+    python -m muestreo.servicio --puerto 8000
+"""
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from . import cache_disco, tiempos
+from .api import CALCULADORAS, calcular_varias, memorizable
+
+VENTANA_LOTE = 0.002  # segundos que se espera para juntar solicitudes
+MAX_LOTE = 1_024
+TAM_CACHE = 65_536
+
+
+class CacheRespuestas:
+    """Caché LRU de resultados por (calculadora, parámetros)"""
+
+    def __init__(self, max_entradas=TAM_CACHE):
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        resultado = self._datos.get(clave)
+        if resultado is None:
+            self.fallos += 1
+            return None
+        self._datos.move_to_end(clave)
+        self.aciertos += 1
+        return resultado
+
+    def guardar(self, clave, resultado):
+        self._datos[clave] = resultado
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_entradas:
+            self._datos.popitem(last=False)
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {'entradas': len(self._datos), 'aciertos': self.aciertos, 'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0}
+
+
+class AgrupadorLotes:
+    """
+    Junta las solicitudes que llegan dentro de ``ventana`` segundos (hasta
+    ``max_lote``) y las calcula en un hilo aparte, agrupadas por calculadora,
+    para no bloquear el bucle de eventos.
+    """
+
+    def __init__(self, ventana=VENTANA_LOTE, max_lote=MAX_LOTE, tam_cache=TAM_CACHE):
+        self.ventana = ventana
+        self.max_lote = max_lote
+        self.cache = CacheRespuestas(tam_cache)
+        self._cola = None
+        self._en_curso = {}
+        self._tarea = None
+        self.solicitudes = 0
+        self.lotes = 0
+
+    @staticmethod
+    def clave(calculadora, parametros):
+        return calculadora, json.dumps(parametros, sort_keys=True, separators=(',', ':'))
+
+    async def iniciar(self):
+        self._cola = asyncio.Queue()
+        self._tarea = asyncio.create_task(self._procesar())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+
+    async def calcular(self, calculadora, parametros):
+        """Resultado de una solicitud: de la caché, de un cálculo en curso o de un nuevo lote"""
+        self.solicitudes += 1
+        if not memorizable(calculadora, parametros):
+            # Aleatoria: ni se busca en la caché ni comparte el cálculo con otra igual
+            futuro = asyncio.get_running_loop().create_future()
+            self._cola.put_nowait((None, calculadora, parametros, futuro))
+            return await futuro
+        clave = self.clave(calculadora, parametros)
+        resultado = self.cache.obtener(clave)
+        if resultado is not None:
+            return resultado
+        futuro = self._en_curso.get(clave)
+        if futuro is None:
+            futuro = asyncio.get_running_loop().create_future()
+            self._en_curso[clave] = futuro
+            self._cola.put_nowait((clave, calculadora, parametros, futuro))
+        return await asyncio.shield(futuro)
+
+    async def _procesar(self):
+        bucle = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self._cola.get()]
+            limite = bucle.time() + self.ventana
+            while len(pendientes) < self.max_lote:
+                espera = limite - bucle.time()
+                if espera <= 0:
+                    break
+                try:
+                    pendientes.append(await asyncio.wait_for(self._cola.get(), espera))
+                except asyncio.TimeoutError:
+                    break
+            self.lotes += 1
+            try:
+                resultados = await bucle.run_in_executor(None, self._resolver, pendientes)
+            except Exception as e:  # no debería ocurrir: calcular_varias devuelve los errores
+                resultados = [e] * len(pendientes)
+            for (clave, _, _, futuro), resultado in zip(pendientes, resultados):
+                if clave is not None:
+                    self._en_curso.pop(clave, None)
+                if isinstance(resultado, Exception):
+                    futuro.set_exception(resultado)
+                else:
+                    if clave is not None:
+                        self.cache.guardar(clave, resultado)
+                    futuro.set_result(resultado)
+
+    @staticmethod
+    def _resolver(pendientes):
+        cache = cache_disco.cache_disco()
+        grupos = {}
+        resultados = [None] * len(pendientes)
+        llaves = [None] * len(pendientes)
+        for i, (_, calculadora, parametros, _) in enumerate(pendientes):
+            # Lo que otra réplica (o este proceso antes de reiniciar) ya calculó sale del disco
+            if cache is not None and memorizable(calculadora, parametros):
+                llaves[i] = cache_disco.clave(f'api.{calculadora}', parametros)
+                encontrado, resultados[i] = cache.leer(f'api.{calculadora}', llaves[i])
+                if encontrado:
+                    continue
+            grupos.setdefault(calculadora, []).append((i, parametros))
+        for calculadora, miembros in grupos.items():
+            with tiempos.etapa(f'servicio.{calculadora}'):
+                calculados = calcular_varias(calculadora, [p for _, p in miembros])
+            for (i, _), resultado in zip(miembros, calculados):
+                resultados[i] = resultado
+                if llaves[i] is not None and not isinstance(resultado, Exception):
+                    cache.guardar(f'api.{calculadora}', llaves[i], resultado)
+        return resultados
+
+    def estadisticas(self):
+        cache = cache_disco.cache_disco()
+        return {'solicitudes': self.solicitudes, 'lotes': self.lotes,
+                'en_curso': len(self._en_curso), 'cache': self.cache.estadisticas(),
+                'cache_disco': cache.estadisticas() if cache is not None else None}
+
+
+# ==========================================
+# APLICACIÓN
+# ==========================================
+
+def crear_app(ventana=VENTANA_LOTE, max_lote=MAX_LOTE, tam_cache=TAM_CACHE):
+    """Crea la aplicación ASGI con su propio agrupador de lotes y caché"""
+    agrupador = AgrupadorLotes(ventana, max_lote, tam_cache)
+
+    async def _json(request):
+        try:
+            return await request.json()
+        except ValueError:
+            return None
+
+    async def salud(request):
+        return JSONResponse({'estado': 'ok'})
+
+    async def calculadoras(request):
+        return JSONResponse(list(CALCULADORAS))
+
+    async def metricas(request):
+        return JSONResponse(agrupador.estadisticas())
+
+    async def prometheus(request):
+        return PlainTextResponse(tiempos.registro.prometheus(), media_type='text/plain; version=0.0.4')
+
+    async def calcular(request):
+        calculadora = request.path_params['calculadora']
+        if calculadora not in CALCULADORAS:
+            return JSONResponse({'error': f"Calculadora desconocida: '{calculadora}'"}, status_code=404)
+        parametros = await _json(request)
+        if not isinstance(parametros, dict):
+            return JSONResponse({'error': 'El cuerpo debe ser un objeto JSON'}, status_code=400)
+        try:
+            return JSONResponse(await agrupador.calcular(calculadora, parametros))
+        except Exception as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+    async def lote(request):
+        solicitudes = await _json(request)
+        if not isinstance(solicitudes, list) or not all(isinstance(s, dict) for s in solicitudes):
+            return JSONResponse({'error': 'El cuerpo debe ser una lista de objetos JSON'}, status_code=400)
+
+        async def uno(solicitud):
+            parametros = dict(solicitud)
+            calculadora = parametros.pop('calculadora', None)
+            if not isinstance(calculadora, str):
+                return {'error': 'Falta el nombre de la calculadora'}
+            try:
+                return await agrupador.calcular(calculadora, parametros)
+            except Exception as e:
+                return {'error': str(e)}
+
+        return JSONResponse(list(await asyncio.gather(*(uno(s) for s in solicitudes))))
+
+    @asynccontextmanager
+    async def ciclo_de_vida(app):
+        await agrupador.iniciar()
+        yield
+        await agrupador.detener()
+
+    app = Starlette(
+        routes=[
+            Route('/salud', salud),
+            Route('/calculadoras', calculadoras),
+            Route('/metricas', metricas),
+            Route('/metrics', prometheus),
+            Route('/calcular/{calculadora}', calcular, methods=['POST']),
+            Route('/lote', lote, methods=['POST']),
+        ],
+        lifespan=ciclo_de_vida,
+    )
+    app.state.agrupador = agrupador
+    return app
+
+
+def main(argv=None):
+    """Punto de entrada sin interfaz gráfica"""
+    parser = argparse.ArgumentParser(prog='python -m muestreo.servicio',
+                                     description='Servicio HTTP local de tamaño de muestra')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--ventana-ms', type=float, default=VENTANA_LOTE * 1000,
+                        help='Tiempo máximo para juntar solicitudes en un lote')
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE)
+    parser.add_argument('--tam-cache', type=int, default=TAM_CACHE)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run(crear_app(args.ventana_ms / 1000, args.max_lote, args.tam_cache),
+                host=args.host, port=args.puerto, log_level='warning')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
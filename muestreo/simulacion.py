@@ -0,0 +1,335 @@
+"""
+Validación de diseños por simulación Monte Carlo.
+
+Se extraen repetidamente muestras de una población (sintética o cargada) y
+se reporta la cobertura empírica del intervalo de confianza, el margen de
+error observado, el efecto de diseño empírico y la potencia.
+
+Las réplicas se procesan en lotes vectorizados con NumPy y los lotes se
+reparten en un pool de procesos. Cada lote recibe su propia semilla
+(``SeedSequence.spawn``), por lo que el resultado depende solo de la
+semilla y no del número de procesos.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .criticos import ppf_normal, ppf_t
+
+DISENOS_SIMULACION = ('mas', 'estratificado', 'conglomerados', 'sistematico', 'dos_medias')
+TAM_LOTE = 1_000
+MAX_ELEMENTOS = 20_000_000  # tope de números aleatorios por sub-bloque
+
+
+# ==========================================
+# POBLACIONES SINTÉTICAS
+# ==========================================
+
+def poblacion_normal(N, media=0.0, sigma=1.0, semilla=None):
+    """N valores normales"""
+    return np.random.default_rng(semilla).normal(media, sigma, int(N))
+
+
+def poblacion_bernoulli(N, p=0.5, semilla=None):
+    """N valores 0/1 con proporción p"""
+    return (np.random.default_rng(semilla).random(int(N)) < p).astype(float)
+
+
+def poblacion_estratos(N_h, medias_h, sigma_h, semilla=None):
+    """Valores normales por estrato; devuelve (valores, estrato)"""
+    rng = np.random.default_rng(semilla)
+    N_h = np.asarray(N_h, dtype=np.int64)
+    grupos = np.repeat(np.arange(N_h.size), N_h)
+    medias_h = np.broadcast_to(np.asarray(medias_h, dtype=float), N_h.shape)
+    sigma_h = np.broadcast_to(np.asarray(sigma_h, dtype=float), N_h.shape)
+    valores = rng.normal(np.repeat(medias_h, N_h), np.repeat(sigma_h, N_h))
+    return valores, grupos
+
+
+def poblacion_conglomerados(M, tam_prom, icc, media=0.0, sigma=1.0, cv_tamano=0.0, proporcion=None, semilla=None):
+    """
+    Conglomerados con correlación intraclase ``icc``; devuelve (valores, conglomerado).
+
+    Con ``proporcion`` los valores son 0/1 y la probabilidad de cada
+    conglomerado sigue una Beta con α+β = (1-ρ)/ρ (ICC = ρ). Con ``cv_tamano``
+    los tamaños siguen una gamma con ese coeficiente de variación.
+    """
+    rng = np.random.default_rng(semilla)
+    M = int(M)
+    if cv_tamano > 0:
+        forma = 1 / cv_tamano ** 2
+        tamanos = np.maximum(np.rint(rng.gamma(forma, tam_prom / forma, M)), 1).astype(np.int64)
+    else:
+        tamanos = np.full(M, int(round(tam_prom)), dtype=np.int64)
+    grupos = np.repeat(np.arange(M), tamanos)
+
+    if proporcion is not None:
+        icc = min(max(icc, 1e-9), 1 - 1e-9)
+        suma = (1 - icc) / icc
+        p_i = rng.beta(proporcion * suma, (1 - proporcion) * suma, M)
+        valores = (rng.random(grupos.size) < p_i[grupos]).astype(float)
+    else:
+        u_i = rng.normal(0, sigma * np.sqrt(icc), M)
+        valores = media + u_i[grupos] + rng.normal(0, sigma * np.sqrt(1 - icc), grupos.size)
+    return valores, grupos
+
+
+def poblacion_periodica(N, periodo, amplitud, media=0.0, sigma=1.0, semilla=None):
+    """Lista ordenada con una componente periódica: μ + A·sen(2πt/P) + ε"""
+    t = np.arange(int(N))
+    ruido = np.random.default_rng(semilla).normal(0, sigma, t.size)
+    return media + amplitud * np.sin(2 * np.pi * t / periodo) + ruido
+
+
+def preparar_poblacion(diseno, valores=None, grupos=None):
+    """
+    Estructura la población para ``simular``.
+
+    ``grupos`` es el estrato (diseño estratificado) o el conglomerado
+    (diseño por conglomerados) de cada valor; en el estratificado, ``estratos``
+    guarda la etiqueta de cada estrato en el orden de ``limites``. El diseño
+    ``dos_medias`` usa poblaciones normales infinitas y no requiere valores.
+    """
+    if diseno not in DISENOS_SIMULACION:
+        raise ValueError(f"Diseño desconocido: {diseno}")
+    if diseno == 'dos_medias':
+        return {}
+    valores = np.asarray(valores, dtype=float)
+    if diseno in ('mas', 'sistematico'):
+        return {'y': valores}
+
+    etiquetas, codigos = np.unique(np.asarray(grupos), return_inverse=True)
+    orden = np.argsort(codigos, kind='stable')
+    tamanos = np.bincount(codigos)
+    if diseno == 'estratificado':
+        return {'y': valores[orden], 'limites': np.concatenate([[0], np.cumsum(tamanos)]), 'estratos': etiquetas}
+
+    # Conglomerados: matriz (M, tamaño máximo) rellenada con NaN
+    Y = np.full((tamanos.size, tamanos.max()), np.nan)
+    posicion = np.arange(valores.size) - np.repeat(np.cumsum(tamanos) - tamanos, tamanos)
+    Y[codigos[orden], posicion] = valores[orden]
+    return {'Y': Y, 'tamanos': tamanos}
+
+
+# ==========================================
+# RÉPLICAS VECTORIZADAS
+# ==========================================
+
+def _sin_reemplazo(rng, N, n, r):
+    """Matriz (r, n) de índices distintos en [0, N) por fila (MAS por fila)"""
+    if n <= N // 4:
+        # Se sortea con reemplazo y se re-sortean solo los repetidos; el
+        # procedimiento es simétrico en las etiquetas, así que es MAS exacto
+        indices = rng.integers(0, N, (r, n))
+        while True:
+            indices.sort(axis=1)
+            repetidos = np.zeros(indices.shape, dtype=bool)
+            repetidos[:, 1:] = indices[:, 1:] == indices[:, :-1]
+            cantidad = int(repetidos.sum())
+            if cantidad == 0:
+                return indices
+            indices[repetidos] = rng.integers(0, N, cantidad)
+
+    filas = max(1, MAX_ELEMENTOS // N)
+    partes = []
+    for inicio in range(0, r, filas):
+        claves = rng.random((min(filas, r - inicio), N))
+        partes.append(np.argpartition(claves, n - 1, axis=1)[:, :n] if n < N else np.argsort(claves, axis=1))
+    return np.concatenate(partes)
+
+
+def _media_ee(muestra, N):
+    """Media muestral por fila y su error estándar con corrección por población finita"""
+    n = muestra.shape[1]
+    s2 = muestra.var(axis=1, ddof=1)
+    return muestra.mean(axis=1), np.sqrt((1 - n / N) * s2 / n)
+
+
+def _replicas_mas(rng, poblacion, r, n):
+    y = poblacion['y']
+    return _media_ee(y[_sin_reemplazo(rng, y.size, int(n), r)], y.size)
+
+
+def _replicas_estratificado(rng, poblacion, r, n_h):
+    y, limites = poblacion['y'], poblacion['limites']
+    N = limites[-1]
+    estimacion = np.zeros(r)
+    varianza = np.zeros(r)
+    for h, nh in enumerate(np.asarray(n_h, dtype=np.int64)):
+        N_h = limites[h + 1] - limites[h]
+        media_h, ee_h = _media_ee(y[limites[h] + _sin_reemplazo(rng, N_h, int(nh), r)], N_h)
+        estimacion += (N_h / N) * media_h
+        varianza += (N_h / N) ** 2 * ee_h ** 2
+    return estimacion, np.sqrt(varianza)
+
+
+def _replicas_conglomerados(rng, poblacion, r, a, m=None):
+    """Conglomerados por MAS y, si ``m`` es menor que el tamaño, MAS de m elementos en cada uno"""
+    Y, tamanos = poblacion['Y'], poblacion['tamanos']
+    M, maximo = Y.shape
+    a = int(a)
+    elegidos = _sin_reemplazo(rng, M, a, r)
+    if m is None or m >= maximo:
+        medias = np.nanmean(Y, axis=1)[elegidos]
+    else:
+        m = int(m)
+        medias = np.empty((r, a))
+        filas = max(1, MAX_ELEMENTOS // (a * maximo))
+        relleno = np.isnan(Y)
+        for inicio in range(0, r, filas):
+            bloque = elegidos[inicio:inicio + filas]
+            claves = rng.random(bloque.shape + (maximo,))
+            claves[relleno[bloque]] = np.inf  # las posiciones vacías nunca se eligen
+            posiciones = np.argpartition(claves, m - 1, axis=2)[..., :m]
+            medias[inicio:inicio + filas] = np.nanmean(Y[bloque[..., None], posiciones], axis=2)
+
+    # Estimador de razón y varianza de conglomerados últimos
+    M_i = tamanos[elegidos].astype(float)
+    estimacion = (M_i * medias).sum(axis=1) / M_i.sum(axis=1)
+    z = M_i * (medias - estimacion[:, None]) / M_i.mean(axis=1, keepdims=True)
+    return estimacion, np.sqrt((1 - a / M) * z.var(axis=1, ddof=1) / a)
+
+
+def _replicas_sistematico(rng, poblacion, r, n, metodo='lineal'):
+    """Sistemático lineal, fraccional o circular (ver ``SeleccionSistematica``); varianza como si fuera MAS"""
+    y = poblacion['y']
+    N, n = y.size, int(n)
+    if metodo == 'fraccional':
+        k = N / n
+        inicio = rng.random(r) * k
+        indices = np.ceil(inicio[:, None] + k * np.arange(n)).astype(np.int64) - 1
+        indices = np.clip(indices, 0, N - 1)
+    elif metodo == 'circular':
+        k = N // n
+        indices = (rng.integers(0, N, r)[:, None] + k * np.arange(n)) % N
+    else:
+        k = N // n
+        indices = rng.integers(0, k, r)[:, None] + k * np.arange(n)
+    return _media_ee(y[indices], N)
+
+
+def _replicas_dos_medias(rng, poblacion, r, delta, sigma, n):
+    """Diferencia de medias entre dos grupos normales de tamaño n; ee combinado"""
+    n = int(n)
+    x1 = rng.normal(0.0, sigma, (r, n))
+    x2 = rng.normal(delta, sigma, (r, n))
+    s2 = (x1.var(axis=1, ddof=1) + x2.var(axis=1, ddof=1)) / 2
+    return x2.mean(axis=1) - x1.mean(axis=1), np.sqrt(2 * s2 / n)
+
+
+_REPLICAS = {
+    'mas': _replicas_mas,
+    'estratificado': _replicas_estratificado,
+    'conglomerados': _replicas_conglomerados,
+    'sistematico': _replicas_sistematico,
+    'dos_medias': _replicas_dos_medias,
+}
+
+
+# ==========================================
+# EJECUCIÓN EN PARALELO
+# ==========================================
+
+_POBLACION = None  # población del proceso de trabajo (se envía una sola vez)
+
+
+def _inicializar(poblacion):
+    global _POBLACION
+    _POBLACION = poblacion
+
+
+def _ejecutar_lote(tarea):
+    diseno, parametros, semilla, r = tarea
+    return _REPLICAS[diseno](np.random.default_rng(semilla), _POBLACION, r, **parametros)
+
+
+def _verdadero(diseno, poblacion, parametros):
+    """Parámetro poblacional que se estima"""
+    if diseno == 'dos_medias':
+        return float(parametros['delta'])
+    if diseno == 'conglomerados':
+        return float(np.nanmean(poblacion['Y']))
+    return float(poblacion['y'].mean())
+
+
+def _ee_mas(diseno, poblacion, parametros):
+    """Error estándar de un MAS del mismo tamaño total (referencia del DEFF)"""
+    if diseno == 'dos_medias':
+        return None
+    if diseno == 'conglomerados':
+        valores = poblacion['Y'][~np.isnan(poblacion['Y'])]
+        m = parametros.get('m') or poblacion['tamanos'].mean()
+        n = parametros['a'] * min(m, poblacion['tamanos'].mean())
+    else:
+        valores = poblacion['y']
+        n = np.sum(parametros['n_h']) if diseno == 'estratificado' else parametros['n']
+    N = valores.size
+    return float(np.sqrt((1 - n / N) * valores.var(ddof=1) / n))
+
+
+def simular(diseno, poblacion, parametros, replicas=10_000, confianza=0.95, semilla=None,
+            procesos=None, valor_nulo=None, bilateral=True, tam_lote=TAM_LOTE):
+    """
+    Simula ``replicas`` muestras del diseño y resume su desempeño.
+
+    ``parametros`` según el diseño: ``mas`` {n}, ``estratificado`` {n_h},
+    ``conglomerados`` {a, m}, ``sistematico`` {n, metodo},
+    ``dos_medias`` {delta, sigma, n}. La potencia es la proporción de
+    intervalos que excluyen ``valor_nulo`` (0 por defecto en ``dos_medias``);
+    con ``bilateral=False`` se usa la cota inferior unilateral.
+    """
+    if diseno not in DISENOS_SIMULACION:
+        raise ValueError(f"Diseño desconocido: {diseno}")
+    inicio_reloj = time.perf_counter()
+    replicas = int(replicas)
+    tamanos_lote = [min(tam_lote, replicas - i) for i in range(0, replicas, tam_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos_lote))
+    tareas = [(diseno, parametros, s, r) for s, r in zip(semillas, tamanos_lote)]
+
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos > 1:
+        with ProcessPoolExecutor(procesos, initializer=_inicializar, initargs=(poblacion,)) as pool:
+            resultados = list(pool.map(_ejecutar_lote, tareas))
+    else:
+        _inicializar(poblacion)
+        resultados = [_ejecutar_lote(t) for t in tareas]
+    estimacion = np.concatenate([e for e, _ in resultados])
+    ee = np.concatenate([s for _, s in resultados])
+
+    q = (1 + confianza) / 2 if bilateral else confianza
+    if diseno == 'dos_medias':
+        critico = float(ppf_t(q, 2 * int(parametros['n']) - 2))
+        valor_nulo = 0.0 if valor_nulo is None else valor_nulo
+    else:
+        critico = float(ppf_normal(q))
+    verdadero = _verdadero(diseno, poblacion, parametros)
+    margen = critico * ee
+    desvio = estimacion - verdadero
+    if bilateral:
+        desvio = np.abs(desvio)
+
+    resumen = {
+        'replicas': replicas,
+        'verdadero': verdadero,
+        'sesgo': float(estimacion.mean() - verdadero),
+        'ee_empirico': float(estimacion.std(ddof=1)),
+        'ee_medio': float(ee.mean()),
+        'cobertura': float(np.mean(desvio <= margen)),
+        'cobertura_nominal': confianza,
+        'margen_medio': float(margen.mean()),
+        'error_empirico': float(np.quantile(desvio, confianza)),
+        'potencia': None,
+        'deff_empirico': None,
+        'procesos': procesos,
+        'segundos': None,
+    }
+    ee_mas = _ee_mas(diseno, poblacion, parametros)
+    if ee_mas:
+        resumen['deff_empirico'] = (resumen['ee_empirico'] / ee_mas) ** 2
+    if valor_nulo is not None:
+        distancia = estimacion - valor_nulo
+        resumen['potencia'] = float(np.mean((np.abs(distancia) if bilateral else distancia) > margen))
+    resumen['segundos'] = time.perf_counter() - inicio_reloj
+    return resumen
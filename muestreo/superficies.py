@@ -0,0 +1,96 @@
+"""
+Superficies de sensibilidad: tamaño de muestra sobre una rejilla 2-D.
+
+Cada función recibe los dos ejes como arreglos 1-D (``x`` horizontal, ``y``
+vertical) y devuelve una matriz de forma ``(len(y), len(x))`` calculada en
+una sola operación vectorizada (``y[:, None]`` contra ``x[None, :]``). Los
+valores críticos se calculan una vez por eje y no por celda, así que una
+rejilla de 1000 × 1000 se resuelve en unas decenas de milisegundos.
+
+Superficies:
+    media          E × confianza        (σ y N fijos)
+    proporcion     E × confianza        (p y N fijos)
+    proporcion_p   p × E                (confianza y N fijos)
+    dif_medias     Δ × potencia         (σ, α y tipo de prueba fijos)
+    conglomerados  m × ICC → número de conglomerados a (n MAS y CV fijos)
+"""
+import numpy as np
+
+from . import motor
+from .conglomerados import deff_tamano_variable
+
+SUPERFICIES = ('media', 'proporcion', 'proporcion_p', 'dif_medias', 'conglomerados')
+MAX_PUNTOS = 2000
+
+
+def eje(minimo, maximo, puntos):
+    """Eje equiespaciado de ``puntos`` valores entre ``minimo`` y ``maximo``"""
+    puntos = int(puntos)
+    if not 2 <= puntos <= MAX_PUNTOS:
+        raise ValueError(f"La resolución debe estar entre 2 y {MAX_PUNTOS} puntos por eje")
+    if not minimo < maximo:
+        raise ValueError("El mínimo del eje debe ser menor que el máximo")
+    return np.linspace(minimo, maximo, puntos)
+
+
+def superficie_media(errores, confianzas, sigma, N=0):
+    """n para estimar una media, sobre E (x) × confianza (y)"""
+    z = motor.z_critico(confianzas)[:, None]
+    return motor.redondear_n(motor.ajuste_fpc(motor.n0_media(z, sigma, np.asarray(errores)[None, :]), N))
+
+
+def superficie_proporcion(errores, confianzas, p, N=0):
+    """n para estimar una proporción, sobre E (x) × confianza (y)"""
+    z = motor.z_critico(confianzas)[:, None]
+    return motor.redondear_n(motor.ajuste_fpc(motor.n0_proporcion(z, p, np.asarray(errores)[None, :]), N))
+
+
+def superficie_proporcion_p(ps, errores, confianza, N=0):
+    """
+    n para estimar una proporción, sobre p (x) × E (y). Como en
+    ``curva_n_proporcion``, n₀ se redondea antes de aplicar la FPC.
+    """
+    z = motor.z_critico(confianza)
+    n0 = motor.redondear_n(motor.n0_proporcion(z, np.asarray(ps)[None, :], np.asarray(errores)[:, None]))
+    return motor.redondear_n(motor.ajuste_fpc(n0, N))
+
+
+def superficie_dif_medias(deltas, potencias, sigma, alpha=0.05, bilateral=True, metodo='normal'):
+    """
+    n por grupo para comparar dos medias, sobre Δ (x) × potencia (y).
+
+    Con ``metodo='t'`` se suma la corrección de Guenther (Z_α²/4) a la
+    aproximación normal en lugar de hacer una búsqueda entera por celda. Es
+    una aproximación: puede diferir en algunas unidades del mínimo exacto
+    con t no central (``motor.n_dif_medias_t``). Como la página, n >= 3.
+    """
+    z_a = motor.z_alfa(alpha, bilateral)
+    z_b = motor.z_beta(potencias)[:, None]
+    n = 2 * ((z_a + z_b) * sigma / np.asarray(deltas, dtype=float)[None, :]) ** 2
+    if metodo == 't':
+        n = n + z_a ** 2 / 4
+    return np.maximum(motor.redondear_n(n), 3)
+
+
+def superficie_conglomerados(tamanos, iccs, n_mas, cv_tamano=0.0):
+    """
+    Número de conglomerados a = ⌈n_MAS × DEFF / m⌉ sobre m elementos por
+    conglomerado (x) × ICC (y), con el DEFF de tamaños variables.
+    """
+    m = np.asarray(tamanos, dtype=float)[None, :]
+    deff = deff_tamano_variable(m, np.asarray(iccs, dtype=float)[:, None], cv_tamano)
+    return motor.redondear_n(float(n_mas) * deff / m)
+
+
+def calcular(superficie, x, y, **fijos):
+    """Despacha por nombre: ``calcular('media', errores, confianzas, sigma=20, N=5000)``"""
+    funciones = {
+        'media': superficie_media,
+        'proporcion': superficie_proporcion,
+        'proporcion_p': superficie_proporcion_p,
+        'dif_medias': superficie_dif_medias,
+        'conglomerados': superficie_conglomerados,
+    }
+    if superficie not in funciones:
+        raise ValueError(f"Superficie desconocida: {superficie}. Usa una de {', '.join(SUPERFICIES)}")
+    return funciones[superficie](x, y, **fijos)
@@ -0,0 +1,225 @@
+"""
+Tablas precalculadas de tamaño de muestra para estimar una proporción (MAS).
+
+Como las tablas de Krejcie y Morgan, pero en una rejilla fina:
+
+    confianza  0.90, 0.95, 0.99
+    p          0.01 … 0.99 (paso 0.01)
+    E          0.001 … 0.200 (paso 0.001)
+    N          infinita y 10 … 10⁹ en escala logarítmica
+               (1, 1.2, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 6, 7, 7.5, 8, 9 por década)
+
+La tabla es un .npy int32 de forma (confianza, p, E, N) con el mismo n que
+``motor.n_proporcion`` (FPC sobre n₀ sin redondear). Se abre con
+``np.load(mmap_mode='r')``: el sistema operativo comparte las páginas entre
+procesos y solo lee del disco las que se consultan.
+
+La búsqueda es O(1): cada índice sale de una operación aritmética (p, E),
+un diccionario (confianza, N) y una comparación exacta con el valor de la
+rejilla, sin interpolar. Fuera de la rejilla ``n_proporcion`` calcula con el
+motor. La tabla sirve a los cálculos escalares (páginas de la app); para
+miles de filas la fórmula vectorizada de ``motor`` es más rápida que leer
+celdas dispersas de la tabla, así que ``lotes`` sigue calculando. Las tablas guardan la huella de ``motor.py`` y ``criticos.py``: si
+cambian, se ignoran hasta reconstruirlas.
+
+Uso:
+    python -m muestreo.tablas construir [--directorio DIR]
+    python -m muestreo.tablas info [--directorio DIR]
+
+El directorio por defecto es ``MUESTREO_TABLAS`` o ``~/.cache/muestreo/tablas``.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from . import motor
+
+CONFIANZAS = (0.90, 0.95, 0.99)
+PROPORCIONES = np.arange(1, 100) / 100
+ERRORES = np.arange(1, 201) / 1000
+MANTISAS = (1, 1.2, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5, 6, 7, 7.5, 8, 9)
+POBLACIONES = np.array([0] + sorted({int(round(m * 10 ** d)) for d in range(1, 9) for m in MANTISAS} | {10 ** 9}),
+                       dtype=np.int64)  # 0 = población infinita
+
+ARCHIVO_TABLA = 'proporcion.npy'
+ARCHIVO_META = 'tablas.json'
+VERSION = 1
+
+_INDICE_CONFIANZA = {c: i for i, c in enumerate(CONFIANZAS)}
+_INDICE_POBLACION = {int(N): i for i, N in enumerate(POBLACIONES)}
+
+
+def directorio_por_defecto():
+    """``MUESTREO_TABLAS`` o ``~/.cache/muestreo/tablas``"""
+    return Path(os.environ.get('MUESTREO_TABLAS') or Path.home() / '.cache' / 'muestreo' / 'tablas')
+
+
+def huella_motor():
+    """Hash de las fuentes que determinan los valores de la tabla"""
+    h = hashlib.sha256()
+    for nombre in ('motor.py', 'criticos.py'):
+        h.update((Path(__file__).parent / nombre).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def _rejilla():
+    return {
+        'confianzas': list(CONFIANZAS),
+        'proporciones': PROPORCIONES.tolist(),
+        'errores': ERRORES.tolist(),
+        'poblaciones': POBLACIONES.tolist(),
+    }
+
+
+# ==========================================
+# CONSTRUCCIÓN
+# ==========================================
+
+def construir(directorio=None):
+    """Calcula la tabla completa y la escribe (de forma atómica) en ``directorio``; devuelve la ruta"""
+    directorio = Path(directorio or directorio_por_defecto())
+    directorio.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+
+    tabla = np.empty((len(CONFIANZAS), len(PROPORCIONES), len(ERRORES), len(POBLACIONES)), dtype=np.int32)
+    p, error, N = PROPORCIONES[:, None, None], ERRORES[None, :, None], POBLACIONES[None, None, :]
+    for i, confianza in enumerate(CONFIANZAS):
+        # Misma secuencia de operaciones que motor.n_proporcion, celda a celda
+        tabla[i] = motor.n_proporcion(p, error, confianza, N)
+
+    temporal = directorio / f'.{ARCHIVO_TABLA}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        np.save(archivo, tabla)
+    os.replace(temporal, directorio / ARCHIVO_TABLA)
+
+    meta = {'version': VERSION, 'huella_motor': huella_motor(), 'forma': list(tabla.shape),
+            'z': [float(motor.z_critico(c)) for c in CONFIANZAS], 'segundos': time.perf_counter() - inicio,
+            **_rejilla()}
+    temporal = directorio / f'.{ARCHIVO_META}.{os.getpid()}.tmp'
+    temporal.write_text(json.dumps(meta, indent=1))
+    os.replace(temporal, directorio / ARCHIVO_META)
+    return directorio / ARCHIVO_TABLA
+
+
+# ==========================================
+# CONSULTA
+# ==========================================
+
+class TablaProporciones:
+    """Tabla de n (confianza × p × E × N) abierta como memoria mapeada"""
+
+    def __init__(self, directorio=None):
+        self.directorio = Path(directorio or directorio_por_defecto())
+        meta = json.loads((self.directorio / ARCHIVO_META).read_text())
+        if meta.get('version') != VERSION or {k: meta.get(k) for k in _rejilla()} != _rejilla():
+            raise ValueError("La tabla se construyó con otra rejilla: vuelve a ejecutar 'construir'")
+        if meta.get('huella_motor') != huella_motor():
+            raise ValueError("El motor cambió desde que se construyó la tabla: vuelve a ejecutar 'construir'")
+        self.meta = meta
+        self.n = np.load(self.directorio / ARCHIVO_TABLA, mmap_mode='r')
+        self.aciertos = 0
+        self.fallos = 0
+
+    def indices(self, p, error, confianza, N=0):
+        """Índices de la celda o None si algún parámetro no está exactamente en la rejilla"""
+        try:
+            i_c = _INDICE_CONFIANZA.get(float(confianza))
+            i_p = int(round(float(p) * 100)) - 1
+            i_e = int(round(float(error) * 1000)) - 1
+            N = float(N)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        # N <= 0 o infinito es población infinita, como en motor.ajuste_fpc
+        i_n = 0 if (N <= 0 or N == np.inf) else _INDICE_POBLACION.get(int(N)) if N.is_integer() else None
+        if (i_c is None or i_n is None or not 0 <= i_p < len(PROPORCIONES) or not 0 <= i_e < len(ERRORES)
+                or PROPORCIONES[i_p] != p or ERRORES[i_e] != error):
+            return None
+        return i_c, i_p, i_e, i_n
+
+    def buscar(self, p, error, confianza=0.95, N=0):
+        """n de la tabla, o None fuera de la rejilla"""
+        celda = self.indices(p, error, confianza, N)
+        if celda is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return int(self.n[celda])
+
+    def estadisticas(self):
+        total = self.aciertos + self.fallos
+        return {'celdas': int(self.n.size), 'bytes': int(self.n.nbytes), 'aciertos': self.aciertos,
+                'fallos': self.fallos, 'tasa_aciertos': self.aciertos / total if total else 0.0}
+
+
+_tabla = None
+_cargada = False
+_lock = threading.Lock()
+
+
+def tabla_proporciones():
+    """La tabla del directorio por defecto (se abre una vez por proceso), o None si falta o está desactualizada"""
+    global _tabla, _cargada
+    if not _cargada:
+        with _lock:
+            if not _cargada:
+                try:
+                    _tabla = TablaProporciones()
+                except (OSError, ValueError):
+                    _tabla = None
+                _cargada = True
+    return _tabla
+
+
+def n_proporcion(p, error, confianza=0.95, N=0):
+    """Como ``motor.n_proporcion`` para un escenario: de la tabla si está en la rejilla, si no se calcula"""
+    tabla = tabla_proporciones()
+    if tabla is not None:
+        n = tabla.buscar(p, error, confianza, N)
+        if n is not None:
+            return n
+    return int(motor.n_proporcion(p, error, confianza, N))
+
+
+# ==========================================
+# LÍNEA DE COMANDOS
+# ==========================================
+
+def main(argv=None):
+    """Punto de entrada sin interfaz gráfica"""
+    parser = argparse.ArgumentParser(
+        prog='python -m muestreo.tablas',
+        description='Construye o describe las tablas precalculadas de tamaño de muestra'
+    )
+    parser.add_argument('accion', choices=['construir', 'info'])
+    parser.add_argument('--directorio', help='Directorio de las tablas (por defecto MUESTREO_TABLAS o ~/.cache/muestreo/tablas)')
+    args = parser.parse_args(argv)
+
+    if args.accion == 'construir':
+        ruta = construir(args.directorio)
+        meta = json.loads((ruta.parent / ARCHIVO_META).read_text())
+        print(f"{ruta}: {np.prod(meta['forma']):,} celdas {tuple(meta['forma'])}, "
+              f"{ruta.stat().st_size / 2**20:.1f} MB en {meta['segundos']:.1f} s")
+        return 0
+
+    try:
+        tabla = TablaProporciones(args.directorio)
+    except (OSError, ValueError) as e:
+        print(f"Tabla no disponible: {e}")
+        return 1
+    print(f"{tabla.directorio / ARCHIVO_TABLA}: {tabla.n.size:,} celdas {tabla.n.shape}, {tabla.n.nbytes / 2**20:.1f} MB")
+    print("Extracto (p = 0.5, E = 0.05):")
+    print(f"{'N':>14} " + ' '.join(f'{c:>7.0%}' for c in CONFIANZAS))
+    for N in (0, 100, 500, 1000, 5000, 10000, 100000, 1000000):
+        fila = ' '.join(f'{tabla.buscar(0.5, 0.05, c, N):>7,}' for c in CONFIANZAS)
+        print(f"{'∞' if N == 0 else f'{N:,}':>14} {fila}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,272 @@
+"""
+Tiempos por etapa (cálculo, gráfico, exportación) y métricas de Prometheus.
+
+``etapa(nombre, tipo)`` mide un bloque con ``perf_counter`` (también sirve
+como decorador) y lo registra en dos lugares:
+
+- el acumulado del proceso (``registro``): conteo, suma e histograma por
+  etapa, exportable en el formato de texto de Prometheus;
+- la ejecución en curso, si se abrió una con ``iniciar_ejecucion`` (una por
+  rerun de Streamlit), para el panel de depuración de la app.
+
+Exportación de métricas (solo biblioteca estándar):
+    escribir_prometheus(ruta)     archivo para el textfile collector de node_exporter
+    servir_prometheus(puerto)     endpoint HTTP local GET /metrics en un hilo aparte
+
+Variables de entorno que usa la app:
+    MUESTREO_METRICAS_ARCHIVO   ruta del archivo Prometheus (se reescribe en cada rerun)
+    MUESTREO_METRICAS_PUERTO    puerto del endpoint /metrics
+    MUESTREO_TIEMPOS_JSONL      registro JSON por línea de cada rerun
+"""
+import contextvars
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+TIPOS = ('calculo', 'grafico', 'exportacion', 'datos')
+LIMITES_HISTOGRAMA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Histograma:
+    __slots__ = ('conteo', 'suma', 'cubetas')
+
+    def __init__(self):
+        self.conteo = 0
+        self.suma = 0.0
+        self.cubetas = [0] * len(LIMITES_HISTOGRAMA)
+
+    def observar(self, segundos):
+        self.conteo += 1
+        self.suma += segundos
+        for i, limite in enumerate(LIMITES_HISTOGRAMA):
+            if segundos <= limite:
+                self.cubetas[i] += 1
+
+
+class RegistroTiempos:
+    """Histogramas acumulados por etapa y por página desde que arrancó el proceso"""
+
+    def __init__(self):
+        self._etapas = {}
+        self._ejecuciones = {}
+        self._lock = threading.Lock()
+
+    def observar(self, nombre, tipo, segundos):
+        with self._lock:
+            self._etapas.setdefault((nombre, tipo), _Histograma()).observar(segundos)
+
+    def observar_ejecucion(self, pagina, segundos):
+        with self._lock:
+            self._ejecuciones.setdefault(pagina, _Histograma()).observar(segundos)
+
+    def resumen(self):
+        """Conteo, total y promedio (segundos) por etapa"""
+        with self._lock:
+            return [
+                {'etapa': nombre, 'tipo': tipo, 'conteo': h.conteo, 'total': h.suma, 'promedio': h.suma / h.conteo}
+                for (nombre, tipo), h in sorted(self._etapas.items())
+            ]
+
+    def limpiar(self):
+        with self._lock:
+            self._etapas.clear()
+            self._ejecuciones.clear()
+
+    def prometheus(self):
+        """Métricas en el formato de exposición de texto de Prometheus (0.0.4)"""
+        with self._lock:
+            lineas = [
+                '# HELP muestreo_etapa_segundos Duración de las etapas de cálculo, gráfico, exportación y datos.',
+                '# TYPE muestreo_etapa_segundos histogram',
+            ]
+            for (nombre, tipo), h in sorted(self._etapas.items()):
+                lineas += _lineas_histograma('muestreo_etapa_segundos', {'etapa': nombre, 'tipo': tipo}, h)
+            lineas += [
+                '# HELP muestreo_ejecucion_segundos Duración de cada rerun completo de la app, por página.',
+                '# TYPE muestreo_ejecucion_segundos histogram',
+            ]
+            for pagina, h in sorted(self._ejecuciones.items()):
+                lineas += _lineas_histograma('muestreo_ejecucion_segundos', {'pagina': pagina}, h)
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiquetas(etiquetas):
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{clave}="{escapar(valor)}"' for clave, valor in etiquetas.items())
+
+
+def _lineas_histograma(metrica, etiquetas, h):
+    texto = _etiquetas(etiquetas)
+    lineas = [f'{metrica}_bucket{{{texto},le="{limite:g}"}} {conteo}'
+              for limite, conteo in zip(LIMITES_HISTOGRAMA, h.cubetas)]
+    lineas.append(f'{metrica}_bucket{{{texto},le="+Inf"}} {h.conteo}')
+    lineas.append(f'{metrica}_sum{{{texto}}} {h.suma:.9g}')
+    lineas.append(f'{metrica}_count{{{texto}}} {h.conteo}')
+    return lineas
+
+
+registro = RegistroTiempos()
+
+
+# ==========================================
+# EJECUCIONES (UNA POR RERUN)
+# ==========================================
+
+class Ejecucion:
+    """Etapas medidas durante un rerun, en orden, con su nivel de anidamiento"""
+
+    def __init__(self, pagina=''):
+        self.pagina = pagina
+        self.etapas = []
+        self.inicio = time.perf_counter()
+        self.segundos = None
+        self._nivel = 0
+
+    def cerrar(self):
+        """Fija la duración total y la registra en el acumulado por página"""
+        if self.segundos is None:
+            self.segundos = time.perf_counter() - self.inicio
+            registro.observar_ejecucion(self.pagina, self.segundos)
+        return self.segundos
+
+    def total_etapas(self):
+        """Segundos de las etapas de primer nivel (las anidadas ya están incluidas)"""
+        return sum(e['segundos'] for e in self.etapas if e['nivel'] == 0)
+
+    def como_dict(self):
+        return {'pagina': self.pagina, 'segundos': self.segundos, 'etapas': self.etapas}
+
+
+_ejecucion = contextvars.ContextVar('ejecucion_tiempos', default=None)
+
+
+def iniciar_ejecucion(pagina=''):
+    """Abre la ejecución de este hilo (el rerun de Streamlit) y la devuelve"""
+    ejecucion = Ejecucion(pagina)
+    _ejecucion.set(ejecucion)
+    return ejecucion
+
+
+def ejecucion_actual():
+    return _ejecucion.get()
+
+
+class etapa:
+    """
+    Mide un bloque o una función:
+
+        with etapa('proporcion.calculo'):
+            ...
+
+        @etapa('grafico.efecto_p', 'grafico')
+        def grafico_efecto_p(...): ...
+    """
+
+    __slots__ = ('nombre', 'tipo', '_inicio', '_ejecucion', '_indice')
+
+    def __init__(self, nombre, tipo='calculo'):
+        self.nombre = nombre
+        self.tipo = tipo
+
+    def __enter__(self):
+        self._ejecucion = _ejecucion.get()
+        if self._ejecucion is not None:
+            # Se reserva el lugar para que las etapas queden en orden de inicio
+            self._indice = len(self._ejecucion.etapas)
+            self._ejecucion.etapas.append(None)
+            self._ejecucion._nivel += 1
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self._inicio
+        registro.observar(self.nombre, self.tipo, segundos)
+        if self._ejecucion is not None:
+            self._ejecucion._nivel -= 1
+            self._ejecucion.etapas[self._indice] = {
+                'etapa': self.nombre, 'tipo': self.tipo, 'segundos': segundos, 'nivel': self._ejecucion._nivel,
+            }
+        return False
+
+    def __call__(self, funcion):
+        nombre, tipo = self.nombre, self.tipo
+
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            with etapa(nombre, tipo):
+                return funcion(*args, **kwargs)
+        return medida
+
+
+# ==========================================
+# EXPORTACIÓN
+# ==========================================
+
+def escribir_prometheus(ruta):
+    """Escribe las métricas de forma atómica (archivo temporal + rename)"""
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix='.metricas-', suffix='.prom')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+            f.write(registro.prometheus())
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def registrar_jsonl(ruta, ejecucion):
+    """Agrega una línea JSON con las etapas de ``ejecucion``"""
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'fecha': time.time(), **ejecucion.como_dict()}, ensure_ascii=False) + '\n')
+
+
+_servidor = None
+_lock_servidor = threading.Lock()
+
+
+def servir_prometheus(puerto, host='127.0.0.1'):
+    """
+    Atiende GET /metrics en un hilo de fondo. Idempotente: solo se levanta un
+    servidor por proceso (todas las sesiones de Streamlit lo comparten).
+    """
+    global _servidor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            cuerpo = registro.prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock_servidor:
+        if _servidor is None:
+            _servidor = ThreadingHTTPServer((host, int(puerto)), Manejador)
+            threading.Thread(target=_servidor.serve_forever, name='metricas-prometheus', daemon=True).start()
+    return _servidor
+
+
+def exportar_segun_entorno(ejecucion=None):
+    """Exporta métricas según las variables ``MUESTREO_METRICAS_*`` / ``MUESTREO_TIEMPOS_JSONL``"""
+    puerto = os.environ.get('MUESTREO_METRICAS_PUERTO')
+    if puerto:
+        servir_prometheus(puerto)
+    ruta = os.environ.get('MUESTREO_METRICAS_ARCHIVO')
+    if ruta:
+        escribir_prometheus(ruta)
+    ruta_jsonl = os.environ.get('MUESTREO_TIEMPOS_JSONL')
+    if ruta_jsonl and ejecucion is not None:
+        registrar_jsonl(ruta_jsonl, ejecucion)
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from muestreo import cache_disco, tablas  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def sin_cache_ni_tablas(monkeypatch, tmp_path):
+    """Cada prueba calcula: ni la caché en disco ni las tablas del usuario intervienen"""
+    cache_disco.configurar(None)
+    monkeypatch.setenv('MUESTREO_TABLAS', str(tmp_path / 'sin_tablas'))
+    monkeypatch.setattr(tablas, '_tabla', None)
+    monkeypatch.setattr(tablas, '_cargada', False)
+    yield
+    cache_disco.configurar(None)
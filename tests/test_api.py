@@ -0,0 +1,126 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from muestreo import api, cli
+
+
+def test_calcular_proporcion():
+    assert api.calcular('proporcion', error=0.05, N=5000)['n'] == 357
+    r = api.calcular('mas', error=0.05)
+    assert r['n'] == 385 and not r['aplica_fpc']
+
+
+def test_calcular_dif_medias():
+    assert api.calcular('dif_medias', delta=5, sigma=10) == {'n_por_grupo': 64, 'n_total': 128, 'd_cohen': 0.5}
+    assert api.calcular('dif_medias', delta=-5, sigma=10, bilateral=False)['n_por_grupo'] == 51
+
+
+def test_calcular_dif_proporciones_por_metodo():
+    lista = [{'p1': 0.3, 'p2': 0.45, 'metodo': m} for m in ('normal', 'fleiss', 'arcoseno', 'fisher')]
+    salidas = api.calcular_varias('dif_proporciones', lista + [{'p1': 0.3, 'p2': 0.45, 'metodo': 'bayes'}])
+    assert [s['n_por_grupo'] for s in salidas[:2]] == [163, 176]
+    assert salidas[:4] == [api.calcular('dif_proporciones', **p) for p in lista]
+    assert isinstance(salidas[4], ValueError)
+    salidas = api.calcular_varias('dif_proporciones', [{'p1': 0.3, 'p2': 0.45, 'alpha': 0},
+                                                       {'p1': 0.3, 'p2': 0.45, 'potencia': 1.2}])
+    assert all(isinstance(s, ValueError) for s in salidas)
+
+
+def test_calcular_estratificado():
+    r = api.calcular('estratificado', N_h=[3000, 2000, 1000], sigma_h=[5, 10, 20], error=0.5, metodo='neyman')
+    assert sum(r['n_h']) == r['n']
+    r = api.calcular('estratificado', N_h=[3000, 2000, 1000], sigma_h=[5, 10, 20], costo_h=[1, 2, 4],
+                     metodo='costos', presupuesto=1000)
+    assert r['factible'] and r['costo'] <= 1000
+
+
+def test_calcular_sistematico_con_semilla_es_reproducible():
+    a = api.calcular('sistematico', N=100_000, n=100, semilla=4)
+    assert a == api.calcular('sistematico', N=100_000, n=100, semilla=4)
+    assert a['k'] == 1000 and a['posiciones'][1] - a['posiciones'][0] == 1000
+
+
+@pytest.mark.parametrize('calculadora, parametros', [
+    ('proporcion', {'error': 0.05, 'p': 1.5}),
+    ('media', {'sigma': -1, 'error': 2}),
+    ('dif_medias', {'delta': 0, 'sigma': 10}),
+    ('dif_medias', {'delta': float('nan'), 'sigma': 10}),
+    ('dif_medias', {'delta': 5, 'sigma': 10, 'potencia': 1.0}),
+    ('dif_medias', {'delta': 5, 'sigma': 10, 'distribucion': 'cauchy'}),
+    ('dif_proporciones', {'p1': 0.3, 'p2': 0.3}),
+    ('estratificado', {'N_h': [10, 20], 'sigma_h': [1, 2], 'metodo': 'azar', 'error': 1}),
+    ('media', {'sigma': 5, 'error': 1, 'desconocido': 1}),
+    ('inexistente', {}),
+    ('media', {'sigma': 10, 'error': 1, 'confianza': 0}),
+    ('media', {'sigma': 10, 'error': 1, 'confianza': 100}),
+    ('media', {'sigma': 10, 'error': 1, 'N': -1}),
+    ('proporcion', {'error': 0.05, 'confianza': float('nan')}),
+    ('mas', {'error': 0.05, 'N': -100}),
+    ('dif_proporciones', {'p1': 0.3, 'p2': 0.45, 'alpha': 0}),
+    ('estratificado', {'N_h': [10, -20], 'sigma_h': [1, 2], 'error': 1}),
+    ('estratificado', {'N_h': [10, 20], 'sigma_h': [1, 2], 'error': 1, 'confianza': 1}),
+    ('conglomerados', {'error': 0.05, 'tam_prom': 20, 'icc': 0.05, 'confianza': -0.95}),
+    ('conglomerados', {'error': 0.05, 'tam_prom': 20, 'icc': 1.5}),
+    ('conglomerados', {'error': 0.05, 'tam_prom': 20, 'icc': 0.05, 'M_total': -1}),
+])
+def test_parametros_invalidos(calculadora, parametros):
+    with pytest.raises(ValueError):
+        api.calcular(calculadora, **parametros)
+
+
+def test_confianza_en_porcentaje():
+    assert api.calcular('media', sigma=10, error=1, confianza=95) == api.calcular('media', sigma=10, error=1)
+    assert api.calcular('conglomerados', error=0.05, tam_prom=20, icc=0.05, confianza=95)['a'] == 38
+    salidas = api.calcular_varias('proporcion', [{'error': 0.05, 'confianza': 95}, {'error': 0.05, 'confianza': 1.0},
+                                                 {'error': 0.05, 'N': -1}, {'error': 0.05}])
+    assert salidas[0] == salidas[3] == api.calcular('proporcion', error=0.05)
+    assert all(isinstance(s, ValueError) for s in salidas[1:3])
+
+
+def test_calcular_varias_igual_que_fila_por_fila():
+    rng = np.random.default_rng(3)
+    lista = [{'delta': float(d), 'sigma': 10.0, 'bilateral': bool(b), 'distribucion': t}
+             for d, b, t in zip(rng.uniform(-8, 8, 30), rng.integers(0, 2, 30), rng.choice(['t', 'normal'], 30))]
+    assert api.calcular_varias('dif_medias', lista) == [api.calcular('dif_medias', **p) for p in lista]
+    lista = [{'error': float(e), 'p': float(p), 'N': int(N)}
+             for e, p, N in zip(rng.uniform(0.01, 0.1, 30), rng.uniform(0.05, 0.95, 30), rng.integers(0, 10**5, 30))]
+    assert api.calcular_varias('proporcion', lista) == [api.calcular('proporcion', **p) for p in lista]
+
+
+def test_calcular_varias_devuelve_filas_de_error():
+    salidas = api.calcular_varias('dif_medias', [
+        {'delta': -5, 'sigma': 10, 'bilateral': False},
+        {'delta': float('nan'), 'sigma': 10},
+        {'delta': 5, 'sigma': 10, 'potencia': 1.0},
+        {'delta': 5},
+        {'delta': 5, 'sigma': 10, 'potencia': 1.0, 'distribucion': 'normal'},
+        {'delta': float('nan'), 'sigma': 10, 'distribucion': 'normal'},
+        {'delta': 5, 'sigma': 10},
+    ])
+    assert salidas[0]['n_por_grupo'] == 51 and salidas[6]['n_por_grupo'] == 64
+    assert all(isinstance(s, ValueError) for s in salidas[1:6])
+
+
+def test_cli_lote(tmp_path):
+    entrada = tmp_path / 'solicitudes.jsonl'
+    entrada.write_text('\n'.join(json.dumps(s) for s in [
+        {'calculadora': 'proporcion', 'error': 0.05, 'N': 5000},
+        {'calculadora': 'dif_medias', 'delta': -5, 'sigma': 10, 'bilateral': False},
+        {'calculadora': 'dif_medias', 'delta': 0, 'sigma': 10},
+        {'calculadora': 'nada'},
+    ]))
+    assert cli.main(['lote', str(entrada), str(tmp_path / 'r.csv'), '--tam-bloque', '2']) == 1
+    resultados = pd.read_csv(tmp_path / 'r.csv')
+    assert resultados['id'].tolist() == [1, 2, 3, 4]
+    assert resultados.loc[0, 'n'] == 357 and resultados.loc[1, 'n_por_grupo'] == 51
+    assert resultados['error'].isna().tolist() == [True, True, False, False]
+
+
+def test_cli_clave_valor(capsys):
+    assert cli.main(['dif_medias', 'delta=5', 'sigma=10']) == 0
+    assert json.loads(capsys.readouterr().out)['n_por_grupo'] == 64
+    assert cli.main(['proporcion', 'error=0.05', 'p=2']) == 1
+    assert 'error' in json.loads(capsys.readouterr().out)
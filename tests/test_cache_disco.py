@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from muestreo import api, cache_disco
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return cache_disco.CacheDisco(tmp_path / 'cache.sqlite')
+
+
+def test_clave_canonica():
+    assert cache_disco.clave('x', {'a': 1, 'b': [1, 2]}) == cache_disco.clave('x', {'b': [1, 2], 'a': 1})
+    assert cache_disco.clave('x', {'a': 1}) != cache_disco.clave('y', {'a': 1})
+    assert cache_disco.clave('x', np.arange(3)) == cache_disco.clave('x', np.arange(3))
+    assert cache_disco.clave('x', np.arange(3)) != cache_disco.clave('x', np.arange(3.0))
+    with pytest.raises(TypeError):
+        cache_disco.clave('x', object())
+
+
+def test_obtener_guarda_y_reutiliza(cache):
+    llamadas = []
+
+    def generar():
+        llamadas.append(1)
+        return {'n': np.int64(385), 'curva': np.linspace(0, 1, 5)}
+
+    primero = cache.obtener('e', ['p', 0.5], generar)
+    segundo = cache.obtener('e', ['p', 0.5], generar)
+    assert len(llamadas) == 1
+    assert segundo['n'] == 385 and np.array_equal(primero['curva'], segundo['curva'])
+    estadisticas = cache.estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos'], estadisticas['entradas']) == (1, 1, 1)
+
+
+def test_compartida_entre_instancias(tmp_path):
+    cache_disco.CacheDisco(tmp_path / 'c.sqlite').obtener('e', 1, lambda: 'valor')
+    assert cache_disco.CacheDisco(tmp_path / 'c.sqlite').leer('e', cache_disco.clave('e', 1)) == (True, 'valor')
+
+
+def test_caducidad(tmp_path, monkeypatch):
+    cache = cache_disco.CacheDisco(tmp_path / 'c.sqlite', ttl=10)
+    cache.obtener('e', 1, lambda: 'viejo')
+    ahora = cache_disco.time.time()
+    monkeypatch.setattr(cache_disco.time, 'time', lambda: ahora + 11)
+    assert cache.leer('e', cache_disco.clave('e', 1)) == (False, None)
+
+
+def test_tamano_maximo(tmp_path):
+    cache = cache_disco.CacheDisco(tmp_path / 'c.sqlite', max_bytes=64 * 1024)
+    assert not cache.guardar('e', 'grande', b'x' * (9 * 1024))  # más de 1/8 del máximo
+    for i in range(40):
+        cache.guardar('e', f'k{i}', b'x' * 4000)
+    cache.mantener()
+    assert cache.estadisticas()['bytes'] <= 64 * 1024
+
+
+def test_api_usa_la_cache_del_proceso(tmp_path):
+    cache = cache_disco.configurar(tmp_path / 'proceso.sqlite')
+    api.calcular('proporcion', error=0.05, N=5000)
+    api.calcular('proporcion', error=0.05, N=5000)
+    # El sistemático sin semilla nunca pasa por la caché
+    api.calcular('sistematico', N=1000, n=10)
+    estadisticas = cache.estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos'], estadisticas['entradas']) == (1, 1, 1)
@@ -0,0 +1,31 @@
+import pytest
+
+from muestreo import conglomerados, motor
+
+
+def test_una_etapa_igual_al_deff_clasico():
+    r = conglomerados.diseno_dos_etapas(385, 20, 0.05)
+    assert r['m'] == 20
+    assert r['deff'] == pytest.approx(1.95)
+    assert r['a'] == motor.n_conglomerados(385, 20, 0.05) == 38
+
+
+def test_m_optimo_de_costos():
+    # m = √((100 / 4) · 0.95 / 0.05) = 21.8
+    assert conglomerados.m_optimo(0.05, 100, 4) == pytest.approx(21.79, abs=0.01)
+    r = conglomerados.diseno_dos_etapas(385, 50, 0.05, costo_conglomerado=100, costo_elemento=4, M_total=30)
+    assert r['m'] == 22
+    assert r['costo'] == r['a'] * 100 + r['n'] * 4
+    assert not r['factible']
+
+
+def test_cv_del_tamano_solo_en_una_etapa():
+    # Una etapa: DEFF = 1 + ((1 + 0.5²) · 20 - 1) · 0.05 = 2.2
+    assert conglomerados.diseno_dos_etapas(385, 20, 0.05, cv_tamano=0.5)['deff'] == pytest.approx(2.2)
+    # Dos etapas con m fijo: cada conglomerado aporta m elementos y el CV no interviene
+    sub = conglomerados.diseno_dos_etapas(385, 20, 0.05, cv_tamano=0.5, fraccion_submuestreo=0.5)
+    assert sub['m'] == 10
+    assert sub['deff'] == pytest.approx(1.45)
+    assert sub == conglomerados.diseno_dos_etapas(385, 20, 0.05, fraccion_submuestreo=0.5)
+    costos = conglomerados.diseno_dos_etapas(385, 50, 0.05, cv_tamano=0.5, costo_conglomerado=100, costo_elemento=4)
+    assert costos['deff'] == pytest.approx(1 + 21 * 0.05)
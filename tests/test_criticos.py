@@ -0,0 +1,25 @@
+import numpy as np
+from scipy.stats import norm, t as t_dist
+
+from muestreo import criticos
+
+
+def test_ppf_normal_igual_a_scipy():
+    q = np.array([0.975, 0.8, 0.9123, 0.5])
+    assert np.allclose(criticos.ppf_normal(q), norm.ppf(q))
+    assert criticos.ppf_normal(0.975) == norm.ppf(0.975)
+
+
+def test_ppf_t_dentro_y_fuera_de_la_tabla():
+    q = np.array([0.975, 0.975, 0.95, 0.9123])
+    gl = np.array([10, 2.5, 5000, 30])
+    assert np.allclose(criticos.ppf_t(q, gl), t_dist.ppf(q, gl))
+    assert criticos.ppf_t(0.975, 10) == t_dist.ppf(0.975, 10)
+
+
+def test_cache_de_escalares():
+    criticos.limpiar_cache()
+    criticos.ppf_normal(0.95)
+    criticos.ppf_normal(0.95)
+    info = criticos.info_cache()
+    assert (info.hits, info.misses) == (1, 1)
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from muestreo import estratificado
+
+N_H = np.array([3000, 2000, 1000])
+SIGMA_H = np.array([5, 10, 20])
+COSTO_H = np.array([1, 2, 4])
+
+
+def test_redondeo_mayor_resto_suma_exacta():
+    cuotas = np.array([10.4, 20.35, 30.25])
+    assert estratificado.redondeo_mayor_resto(cuotas, 61).tolist() == [11, 20, 30]
+    assert estratificado.redondeo_mayor_resto(cuotas, 61).sum() == 61
+
+
+@pytest.mark.parametrize('metodo', estratificado.METODOS_ASIGNACION)
+@pytest.mark.parametrize('n', [7, 150, 1234])
+def test_asignar_suma_n_y_respeta_limites(metodo, n):
+    n_h = estratificado.asignar(n, N_H, SIGMA_H, metodo, COSTO_H, n_min=2, n_max=600)
+    assert n_h.sum() == min(max(n, 6), 1800)
+    assert np.all(n_h >= 2) and np.all(n_h <= np.minimum(600, N_H))
+
+
+def test_asignar_con_limites_en_ambos_sentidos():
+    # Neyman pide ≈ (1, 59): el primero sube a su mínimo y el segundo baja a su máximo
+    n_h = estratificado.asignar(60, [500, 500], [1, 50], "Óptima de Neyman", n_min=[2, 5], n_max=[1000, 8])
+    assert n_h.tolist() == [52, 8]
+
+
+@pytest.mark.parametrize('semilla', range(20))
+def test_asignar_es_la_cuota_proporcional_recortada(semilla):
+    # La asignación con límites es clip(λ·w_h, mín, máx) con Σ = n (λ por bisección)
+    rng = np.random.default_rng(semilla)
+    N_h, sigma_h = rng.integers(50, 2000, 6).astype(float), rng.uniform(1, 50, 6)
+    n_min, n_max = rng.integers(0, 30, 6), np.minimum(rng.integers(30, 400, 6), N_h)
+    n = int(rng.integers(n_min.sum(), n_max.sum()))
+    n_h = estratificado.asignar(n, N_h, sigma_h, "Óptima de Neyman", n_min=n_min, n_max=n_max)
+    w_h = N_h * sigma_h
+    lo, hi = 0.0, (n_max / w_h).max()
+    for _ in range(100):
+        lam = (lo + hi) / 2
+        lo, hi = (lam, hi) if np.clip(lam * w_h, n_min, n_max).sum() < n else (lo, lam)
+    assert n_h.sum() == n
+    assert np.all(np.abs(n_h - np.clip(hi * w_h, n_min, n_max)) < 1)
+
+
+def test_neyman_proporcional_a_N_sigma():
+    n_h = estratificado.asignar(600, N_H, SIGMA_H, "Óptima de Neyman")
+    # N_h σ_h = 15000, 20000, 20000 ⇒ 600 · (3/11, 4/11, 4/11)
+    assert n_h.tolist() == [164, 218, 218]
+
+
+def test_proporcional():
+    assert estratificado.asignar(600, N_H, metodo="Proporcional").tolist() == [300, 200, 100]
+
+
+def test_n_total_neyman_cumple_el_error():
+    n = estratificado.n_total_estratificado(N_H, SIGMA_H, 0.5, 0.95, "Óptima de Neyman")
+    n_h = estratificado.asignar(n, N_H, SIGMA_H, "Óptima de Neyman")
+    error = 1.96 * np.sqrt(estratificado.varianza_media(n_h, N_H, SIGMA_H))
+    assert error <= 0.5 + 1e-3
+
+
+def test_optima_costos_con_presupuesto():
+    r = estratificado.asignacion_optima_costos(N_H, SIGMA_H, COSTO_H, presupuesto=1000, n_min=2)
+    assert r['factible']
+    assert r['costo'] <= 1000
+    # No cabe otra unidad del estrato más barato
+    assert r['costo'] + COSTO_H.min() > 1000
+    # n_h ∝ N_h σ_h / √c_h = 15000, 14142, 10000
+    proporciones = r['n_h'] / r['n_h'].sum()
+    assert np.allclose(proporciones, np.array([15000, 14142.1, 10000]) / 39142.1, atol=0.01)
+
+
+def test_optima_costos_con_error():
+    r = estratificado.asignacion_optima_costos(N_H, SIGMA_H, COSTO_H, error=0.5)
+    assert r['factible'] and r['error'] <= 0.5
+    # Quitar una unidad a cualquier estrato ya no cumple el error
+    for h in range(3):
+        menos = r['n_h'].copy()
+        menos[h] -= 1
+        assert 1.96 * np.sqrt(estratificado.varianza_media(menos, N_H, SIGMA_H)) > 0.5 - 1e-3
+
+
+def test_optima_costos_no_factible():
+    r = estratificado.asignacion_optima_costos(N_H, SIGMA_H, COSTO_H, error=0.01, n_max=50)
+    assert not r['factible']
+    assert np.all(r['n_h'] <= 50)
+
+
+S_HJ = np.array([[10, 1], [20, 2], [40, 3], [80, 9.]])
+N_HJ = np.array([5000, 3000, 1500, 500.])
+C_HJ = np.array([1, 2, 1, 4.])
+
+
+@pytest.mark.parametrize('n_max', [None, 450, [5000, 3000, 300, 100]])
+def test_multivariada_cumple_todos_los_objetivos(n_max):
+    r = estratificado.asignacion_multivariada(N_HJ, S_HJ, C_HJ, error_j=[1.0, 0.1], n_max=n_max)
+    assert r['factible'] and r['convergio']
+    assert np.all(r['error_j'] <= [1.0, 0.1])
+    assert np.all(r['n_h'] <= (N_HJ if n_max is None else np.minimum(n_max, N_HJ)))
+
+
+def test_multivariada_con_un_indicador_es_la_optima_con_costos():
+    r = estratificado.asignacion_multivariada(N_HJ, S_HJ[:, :1], C_HJ, error_j=1.0)
+    optimo = estratificado.asignacion_optima_costos(N_HJ, S_HJ[:, 0], C_HJ, error=1.0)
+    assert np.abs(r['n_h'] - optimo['n_h']).max() <= 1
+
+
+def test_multivariada_no_factible_con_maximos():
+    r = estratificado.asignacion_multivariada(N_HJ, S_HJ, C_HJ, error_j=[1.0, 0.1], n_max=60)
+    assert not r['factible']
+    assert r['n_h'].tolist() == [60, 60, 60, 60]
+
+
+def test_multivariada_por_cv():
+    medias = np.array([100.0, 10.0])
+    r = estratificado.asignacion_multivariada(N_HJ, S_HJ, C_HJ, cv_j=[0.01, 0.02], medias_hj=medias)
+    assert r['factible'] and np.all(r['cv_j'] <= [0.01, 0.02])
@@ -0,0 +1,43 @@
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from muestreo import exportacion
+
+TABLA = pd.DataFrame({'id': np.arange(10), 'n': np.arange(10) * 1.5, 'nombre': list('abcdefghij')})
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet'])
+def test_por_bloques_igual_que_completo(tmp_path, formato):
+    destino = tmp_path / f'r.{formato}'
+    exportacion.escribir(TABLA, destino, tam_bloque=3)
+    leido = pd.read_csv(destino) if formato == 'csv' else pd.read_parquet(destino)
+    pd.testing.assert_frame_equal(leido, TABLA)
+
+
+def test_bloques_desde_un_generador(tmp_path):
+    exportacion.escribir((TABLA.iloc[i:i + 4] for i in range(0, 10, 4)), tmp_path / 'r.csv')
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'r.csv'), TABLA)
+
+
+def test_excel_continua_en_otra_hoja(tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacion, 'MAX_FILAS_EXCEL', 4)
+    hojas = {'Parámetros': {'error': 0.05}, 'Resultados': TABLA, 'Vacía': lambda: TABLA.iloc[:0]}
+    exportacion.escribir_excel(hojas, tmp_path / 'r.xlsx', tam_bloque=3)
+    with zipfile.ZipFile(tmp_path / 'r.xlsx') as libro:
+        nombres = re.findall(r'<sheet name="([^"]+)"', libro.read('xl/workbook.xml').decode())
+    assert nombres == ['Parámetros', 'Resultados', 'Resultados (2)', 'Resultados (3)', 'Vacía']
+
+
+def test_diferido_genera_al_llamar():
+    descarga = exportacion.diferido(TABLA, 'csv')
+    with descarga() as archivo:
+        pd.testing.assert_frame_equal(pd.read_csv(archivo), TABLA)
+
+
+def test_formato_no_soportado(tmp_path):
+    with pytest.raises(ValueError):
+        exportacion.escribir(TABLA, tmp_path / 'r.json')
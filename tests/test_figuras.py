@@ -0,0 +1,35 @@
+import pytest
+
+from muestreo import figuras
+
+
+def test_cache_reutiliza_los_bytes():
+    cache = figuras.CacheFiguras()
+    llamadas = []
+    generar = lambda: llamadas.append(1) or b'imagen'
+    assert cache.obtener('a', generar) == cache.obtener('a', generar) == b'imagen'
+    assert len(llamadas) == 1
+    assert cache.estadisticas()['hits'] == 1
+
+
+def test_cache_desaloja_por_entradas_y_bytes():
+    cache = figuras.CacheFiguras(max_entradas=2, max_bytes=10)
+    for clave in 'abc':
+        cache.obtener(clave, lambda: b'1234')
+    assert cache.estadisticas()['entradas'] == 2
+    cache.obtener('grande', lambda: b'x' * 9)
+    assert cache.estadisticas()['bytes'] <= 10
+
+
+def test_grafico_efecto_p_en_cache():
+    figuras.cache_figuras.limpiar()
+    png = figuras.grafico_efecto_p(1.96, 0.05, 0, 0.5, 385)
+    assert png.startswith(b'\x89PNG')
+    assert figuras.grafico_efecto_p(1.96, 0.05, 0, 0.5, 385) is png
+    svg = figuras.grafico_curva_potencia(5, 10, 64, 0.05, True, 't', 0.8, formato='svg')
+    assert b'<svg' in svg
+
+
+def test_formato_no_soportado():
+    with pytest.raises(ValueError):
+        figuras.grafico_efecto_p(1.96, 0.05, 0, 0.5, 385, formato='gif')
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from muestreo import lotes
+
+ESCENARIOS = pd.DataFrame({
+    'objetivo': ['proporcion', 'media', 'proporcion', None, 'media'],
+    'p': [0.5, np.nan, 1.2, 0.5, np.nan],
+    'sigma': [np.nan, 20, np.nan, np.nan, 20],
+    'error': [0.05, 2, 0.05, 0.05, 2],
+    'confianza': [95, 0.95, 0.95, 0.95, 0],
+    'N': [1000, 2000, 0, np.nan, 0],
+})
+
+
+def test_calcular_lote():
+    resultado = lotes.calcular_lote(ESCENARIOS)
+    assert resultado['valido'].tolist() == [True, True, False, True, False]
+    assert resultado['n'].iloc[[0, 1, 3]].tolist() == [278, 323, 385]
+    assert resultado['aplica_fpc'].tolist() == [True, True, False, False, False]
+    assert resultado['n'].isna().tolist() == [False, False, True, False, True]
+    assert resultado.loc[0, 'fraccion_muestreo'] == 0.278
+
+
+def test_escribir_y_leer_csv(tmp_path):
+    resultado = lotes.calcular_lote(ESCENARIOS)
+    lotes.escribir_resultados(resultado, tmp_path / 'r.csv', tam_bloque=2)
+    leido = lotes.leer_parametros(tmp_path / 'r.csv')
+    assert leido['n'].tolist()[:2] == [278, 323]
+    assert len(leido) == len(ESCENARIOS)
+
+
+def test_main(tmp_path):
+    ESCENARIOS.to_csv(tmp_path / 'e.csv', index=False)
+    assert lotes.main([str(tmp_path / 'e.csv'), str(tmp_path / 'r.parquet')]) == 0
+    assert pd.read_parquet(tmp_path / 'r.parquet')['valido'].sum() == 3
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from muestreo import motor, potencia
+
+
+# Krejcie y Morgan (1970): p = 0.5, E = 0.05, 95 %
+@pytest.mark.parametrize('N, n', [(100, 80), (500, 218), (1000, 278), (10_000, 370), (1_000_000, 384), (0, 385)])
+def test_n_proporcion_krejcie_morgan(N, n):
+    assert motor.n_proporcion(0.5, 0.05, 0.95, N) == n
+
+
+def test_n_media_cochran():
+    # (1.96 · 20 / 2)² = 384.1 → 385; con N = 2000: 384.1 / (1 + 383.1 / 2000) = 322.4 → 323
+    assert motor.n_media(20, 2, 0.95) == 385
+    assert motor.n_media(20, 2, 0.95, 2000) == 323
+
+
+def test_fpc_trata_n_no_positivo_o_infinito_como_poblacion_infinita():
+    n0 = np.array([400.0, 400.0, 400.0])
+    assert np.array_equal(motor.ajuste_fpc(n0, [0, -5, np.inf]), n0)
+
+
+def test_vectorizado_igual_a_escalar():
+    rng = np.random.default_rng(1)
+    p, error, N = rng.uniform(0.05, 0.95, 50), rng.uniform(0.01, 0.1, 50), rng.integers(100, 10**6, 50)
+    vector = motor.n_proporcion(p, error, 0.95, N)
+    assert vector.tolist() == [int(motor.n_proporcion(pi, ei, 0.95, Ni)) for pi, ei, Ni in zip(p, error, N)]
+
+
+# Cohen (1988) y G*Power: n por grupo con t no central
+@pytest.mark.parametrize('d, bilateral, n', [(0.2, True, 394), (0.5, True, 64), (0.8, True, 26), (0.5, False, 51)])
+def test_n_dif_medias_t_tablas_de_cohen(d, bilateral, n):
+    assert motor.n_dif_medias_t(d * 10, 10, 0.05, 0.80, bilateral) == n
+
+
+def test_n_dif_medias_t_es_el_minimo_que_alcanza_la_potencia():
+    deltas = np.array([0.7, 2.0, 5.0, 11.0])
+    n = motor.n_dif_medias_t(deltas, 10, 0.05, 0.9)
+    assert np.all(potencia.potencia_dif_medias(deltas, 10, n, 0.05, True, 't') >= 0.9)
+    assert np.all(potencia.potencia_dif_medias(deltas, 10, n - 1, 0.05, True, 't') < 0.9)
+    assert np.all(n >= motor.n_dif_medias_z(deltas, 10, 0.05, 0.9))
+
+
+def test_n_dif_medias_t_unilateral_con_delta_negativo():
+    assert motor.n_dif_medias_t(-5, 10, 0.05, 0.8, False) == motor.n_dif_medias_t(5, 10, 0.05, 0.8, False)
+
+
+@pytest.mark.parametrize('args', [(np.nan, 10), (np.inf, 10), (0, 10), (5, 0), (5, -1), (5, 10, 0.05, 1.0)])
+def test_n_dif_medias_t_rechaza_parametros_invalidos(args):
+    with pytest.raises(ValueError):
+        motor.n_dif_medias_t(*args)
+
+
+def test_n_dif_medias_t_acota_la_busqueda(monkeypatch):
+    monkeypatch.setattr(motor, 'MAX_DUPLICACIONES', 0)
+    with pytest.raises(ValueError):
+        motor.n_dif_medias_t(0.5, 10, 0.001, 0.99)
+
+
+def test_n_dif_medias_z():
+    # 2 · ((1.96 + 0.8416) · 10 / 5)² = 62.8 → 63
+    assert motor.n_dif_medias_z(5, 10) == 63
+    assert motor.d_cohen(5, 10) == 0.5
+
+
+def test_n_conglomerados_y_sistematico():
+    # DEFF = 1 + (20 - 1) · 0.05 = 1.95 ⇒ ⌈385 · 1.95 / 20⌉ = 38
+    assert motor.deff_conglomerados(20, 0.05) == pytest.approx(1.95)
+    assert motor.n_conglomerados(385, 20, 0.05) == 38
+    assert motor.intervalo_sistematico([1000, 1000], [40, 0]).tolist() == [25, 0]
+
+
+def test_curva_n_proporcion_igual_a_n_proporcion():
+    p, n = motor.curva_n_proporcion(1.96, 0.05, 2000, puntos=25)
+    # n₀ se redondea antes de la FPC, como en la página de proporciones
+    n0 = motor.n_proporcion(p, 0.05, 0.95)
+    assert np.array_equal(n, motor.redondear_n(motor.ajuste_fpc(n0, 2000)))
+    assert n.max() == n[12]
@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+import pytest
+
+import muestreo
+from conftest import RAIZ
+
+
+def test_importar_el_paquete_no_carga_scipy():
+    codigo = 'import sys, muestreo; print("scipy" in sys.modules)'
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True, check=True)
+    assert salida.stdout.strip() == 'False'
+
+
+def test_funciones_del_motor_al_primer_acceso():
+    assert muestreo.n_media(20, 2, 0.95) == 385
+    with pytest.raises(AttributeError):
+        muestreo.no_existe
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from muestreo import motor, potencia
+
+
+def test_potencia_normal_en_el_n_de_motor():
+    # n_dif_medias_z(5, 10) = 63 es el menor n con potencia ≥ 0.8
+    assert potencia.potencia_dif_medias(5, 10, 63) >= 0.8
+    assert potencia.potencia_dif_medias(5, 10, 62) < 0.8
+    assert motor.n_dif_medias_z(5, 10) == 63
+
+
+def test_potencia_t_menor_que_normal():
+    n = np.arange(5, 80)
+    normal = potencia.potencia_dif_medias(5, 10, n)
+    exacta = potencia.potencia_dif_medias(5, 10, n, metodo='t')
+    assert np.all(exacta < normal)
+
+
+def test_curva_igual_a_escalares():
+    deltas, curva = potencia.curva_potencia(0, 10, 10, 30, puntos=11, metodo='t')
+    escalares = [potencia.potencia_dif_medias(d, 10, 30, metodo='t') for d in deltas]
+    assert np.allclose(curva, escalares)
+    # Con Δ = 0 la potencia bilateral es el nivel α
+    assert curva[0] == pytest.approx(0.05)
+
+
+def test_metodo_desconocido():
+    with pytest.raises(ValueError):
+        potencia.potencia_dif_medias(5, 10, 30, metodo='exacto')
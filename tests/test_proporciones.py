@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from muestreo import motor, proporciones
+
+
+def test_normal_formula_de_varianza_combinada():
+    # [1.96·√(2·0.375·0.625) + 0.8416·√(0.3·0.7 + 0.45·0.55)]² / 0.15² = 162.4 → 163
+    assert proporciones.n_dif_proporciones(0.3, 0.45) == 163
+    assert proporciones.n_dif_proporciones(0.3, 0.45) == motor.n_dif_proporciones(0.3, 0.45)
+
+
+def test_fleiss_agrega_la_correccion_por_continuidad():
+    # n' = n/4 · (1 + √(1 + 4/(n·0.15)))² con n = 162.4: 175.4 → 176
+    n = motor.n_dif_proporciones(0.3, 0.45)
+    assert proporciones.n_dif_proporciones(0.3, 0.45, metodo='fleiss') == 176
+    assert proporciones.n_dif_proporciones(0.3, 0.45, metodo='fleiss') > n
+
+
+def test_arcoseno_tabla_de_cohen():
+    # Cohen (1988): h = 0.5, α = 0.05 bilateral, potencia 0.8 ⇒ 63 por grupo
+    p2 = np.sin((np.pi / 2 - 0.5) / 2) ** 2  # 2·arcsen√0.5 - 2·arcsen√p₂ = 0.5
+    assert proporciones.n_dif_proporciones(0.5, p2, metodo='arcoseno') == 63
+
+
+@pytest.mark.parametrize('metodo', ['normal', 'fleiss', 'arcoseno'])
+def test_aproximados_son_el_minimo_que_alcanza_su_potencia(metodo):
+    n = proporciones.n_dif_proporciones(0.2, 0.35, 0.05, 0.8, True, metodo)
+    assert proporciones.potencia_dif_proporciones(0.2, 0.35, n, 0.05, True, metodo) >= 0.8
+    assert proporciones.potencia_dif_proporciones(0.2, 0.35, n - 1, 0.05, True, metodo) < 0.8
+
+
+@pytest.mark.parametrize('metodo', ['fisher', 'barnard'])
+def test_exactos_alcanzan_la_potencia(metodo):
+    n = proporciones.n_dif_proporciones(0.2, 0.5, 0.05, 0.8, True, metodo)
+    assert proporciones.potencia_dif_proporciones(0.2, 0.5, n, 0.05, True, metodo) >= 0.8
+    assert proporciones.potencia_dif_proporciones(0.2, 0.5, n - 1, 0.05, True, metodo) < 0.8
+
+
+def test_fisher_es_mas_conservadora_que_barnard_y_la_normal():
+    normal = proporciones.n_dif_proporciones(0.2, 0.5)
+    fisher = proporciones.n_dif_proporciones(0.2, 0.5, metodo='fisher')
+    barnard = proporciones.n_dif_proporciones(0.2, 0.5, metodo='barnard')
+    assert fisher >= barnard
+    assert fisher > normal
+
+
+@pytest.mark.parametrize('metodo', ['fisher', 'barnard'])
+def test_exactos_respetan_el_nivel(metodo):
+    # Con p₁ = p₂ la potencia es el tamaño de la prueba: no supera α
+    assert proporciones.potencia_dif_proporciones(0.3, 0.3, 40, 0.05, True, metodo) <= 0.05 + 1e-12
+
+
+def test_metodo_desconocido():
+    with pytest.raises(ValueError):
+        proporciones.n_dif_proporciones(0.3, 0.45, metodo='wald')
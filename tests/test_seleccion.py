@@ -0,0 +1,178 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from muestreo import conglomerados, seleccion
+
+TAMANOS = np.random.default_rng(0).gamma(0.5, 100, 2000) + 1
+
+
+# ==========================================
+# PPS
+# ==========================================
+
+@pytest.mark.parametrize('a', [1, 10, 150, 600])
+def test_probabilidades_de_inclusion(a):
+    pi = conglomerados.probabilidades_inclusion(TAMANOS, a)
+    assert pi.sum() == pytest.approx(a)
+    assert np.all((pi > 0) & (pi <= 1))
+    libres = pi < 1
+    # Fuera de las unidades de certeza, π ∝ tamaño
+    assert np.allclose(pi[libres] / TAMANOS[libres], pi[libres][0] / TAMANOS[libres][0])
+
+
+def test_probabilidades_con_certeza():
+    pi = conglomerados.probabilidades_inclusion([100, 1, 1, 1, 1], 2)
+    assert pi.tolist() == [1.0, 0.25, 0.25, 0.25, 0.25]
+
+
+@pytest.mark.parametrize('metodo', conglomerados.METODOS_PPS)
+def test_pps_tamano_distintos_y_reproducible(metodo):
+    indices, pi = conglomerados.seleccionar_pps(TAMANOS, 40, metodo, semilla=7)
+    otra, _ = conglomerados.seleccionar_pps(TAMANOS, 40, metodo, semilla=7)
+    assert indices.size == np.unique(indices).size == 40
+    assert np.array_equal(indices, otra)
+    assert np.all(pi <= 1)
+
+
+@pytest.mark.parametrize('metodo', conglomerados.METODOS_PPS)
+def test_pps_frecuencias_de_inclusion(metodo):
+    tamanos = np.array([1, 2, 3, 4, 5, 6, 9.0])
+    pi = conglomerados.probabilidades_inclusion(tamanos, 3)
+    cuenta = np.zeros(tamanos.size)
+    repeticiones = 4000
+    for semilla in range(repeticiones):
+        cuenta[conglomerados.pps_sistematico(tamanos, 3, semilla) if metodo == 'sistematico'
+               else conglomerados.pps_sampford(tamanos, 3, semilla)] += 1
+    assert np.allclose(cuenta / repeticiones, pi, atol=0.03)
+
+
+def test_pps_sistematico_punto_en_el_total(monkeypatch):
+    # Un arranque en el límite superior no debe salirse del marco
+    class Generador:
+        def random(self):
+            return np.nextafter(1.0, 0)
+    monkeypatch.setattr(conglomerados.np.random, 'default_rng', lambda semilla=None: Generador())
+    tamanos = np.array([0.1, 0.2, 0.3, 0.7, 0.1, 0.3] * 5)
+    indices = conglomerados.pps_sistematico(tamanos, 7)
+    assert indices.size == 7 and indices.max() < tamanos.size
+
+
+@pytest.mark.parametrize('tam_bloque', [3, 128, 5000])
+def test_pps_marco_por_bloques_igual_que_en_memoria(tmp_path, tam_bloque):
+    marco = tmp_path / 'marco.csv'
+    pd.DataFrame({'id': np.arange(TAMANOS.size), 'tamano': TAMANOS}).to_csv(marco, index=False)
+    resumen = conglomerados.seleccionar_pps_marco(marco, 150, tmp_path / 'muestra.csv', 'tamano',
+                                                  semilla=3, tam_bloque=tam_bloque)
+    muestra = pd.read_csv(tmp_path / 'muestra.csv')
+    assert resumen['a'] == 150
+    assert muestra['id'].tolist() == conglomerados.pps_sistematico(TAMANOS, 150, semilla=3).tolist()
+    assert np.allclose(muestra['prob_inclusion'], conglomerados.probabilidades_inclusion(TAMANOS, 150)[muestra['id']])
+
+
+def test_pps_marco_no_pierde_el_ultimo_punto(tmp_path, monkeypatch):
+    class Generador:
+        def random(self):
+            return np.nextafter(1.0, 0)
+    monkeypatch.setattr(conglomerados.np.random, 'default_rng', lambda semilla=None: Generador())
+    marco = tmp_path / 'marco.csv'
+    pd.DataFrame({'tamano': [0.1, 0.2, 0.3, 0.7, 0.1, 0.3] * 5}).to_csv(marco, index=False)
+    for tam_bloque in (4, 7, 30):
+        assert conglomerados.seleccionar_pps_marco(marco, 7, tmp_path / 'm.csv', 'tamano', tam_bloque=tam_bloque)['a'] == 7
+
+
+# ==========================================
+# SISTEMÁTICA Y MAS
+# ==========================================
+
+@pytest.mark.parametrize('metodo', seleccion.METODOS_SISTEMATICO)
+def test_sistematica_posiciones_validas_y_reproducibles(metodo):
+    s = seleccion.SeleccionSistematica(10_007, 100, metodo, semilla=5)
+    posiciones = np.concatenate(list(s.bloques(7)))
+    assert posiciones.size == s.n_efectivo
+    assert np.unique(posiciones).size == posiciones.size
+    assert posiciones.min() >= 1 and posiciones.max() <= 10_007
+    otra = seleccion.SeleccionSistematica(10_007, 100, metodo, semilla=5)
+    assert np.array_equal(posiciones, np.concatenate(list(otra.bloques())))
+
+
+def test_sistematica_fraccional_siempre_n():
+    for semilla in range(50):
+        assert seleccion.SeleccionSistematica(1_050, 100, 'fraccional', semilla=semilla).n_efectivo == 100
+
+
+def test_sistematica_lineal_intervalo_y_arranque():
+    s = seleccion.SeleccionSistematica(1000, 40, 'lineal', inicio=3)
+    assert s.k == 25
+    assert s.primeras(4).tolist() == [3, 28, 53, 78]
+
+
+def test_sistematica_npy(tmp_path):
+    s = seleccion.SeleccionSistematica(5000, 300, 'circular', semilla=2)
+    s.escribir(tmp_path / 'pos.npy', 'npy', tam_bloque=64)
+    assert np.array_equal(np.load(tmp_path / 'pos.npy'), np.concatenate(list(s.bloques())))
+
+
+@pytest.mark.parametrize('N', [None, 1000])
+def test_mas_del_marco(tmp_path, N):
+    marco = tmp_path / 'marco.csv'
+    pd.DataFrame({'id': np.arange(1000)}).to_csv(marco, index=False)
+    resumen = seleccion.seleccionar_mas(marco, 60, tmp_path / 'a.csv', semilla=11, N=N, tam_bloque=97)
+    seleccion.seleccionar_mas(marco, 60, tmp_path / 'b.csv', semilla=11, N=N, tam_bloque=97)
+    a, b = pd.read_csv(tmp_path / 'a.csv'), pd.read_csv(tmp_path / 'b.csv')
+    assert resumen['n'] == 60 and a['id'].nunique() == 60
+    assert a['id'].tolist() == b['id'].tolist()
+
+
+def test_mas_n_distinto_del_marco(tmp_path):
+    marco = tmp_path / 'marco.csv'
+    pd.DataFrame({'id': np.arange(100)}).to_csv(marco, index=False)
+    with pytest.raises(ValueError):
+        seleccion.seleccionar_mas(marco, 10, tmp_path / 'a.csv', semilla=1, N=120)
+
+
+class _Contador:
+    """Escritor que solo acumula las posiciones elegidas"""
+
+    def __init__(self):
+        self.posiciones = []
+
+    def escribir(self, df):
+        self.posiciones.append(df[seleccion.COLUMNA_POSICION].to_numpy())
+
+
+def _bloques(N, tam_bloque):
+    bloque = pd.DataFrame({'x': np.zeros(tam_bloque, dtype=np.int8)})
+    for inicio in range(0, N, tam_bloque):
+        yield bloque.iloc[:min(tam_bloque, N - inicio)]
+
+
+def test_mas_secuencial_frecuencias_de_inclusion():
+    cuenta = np.zeros(12)
+    repeticiones = 1500
+    for semilla in range(repeticiones):
+        escritor = _Contador()
+        seleccion._seleccion_secuencial(_bloques(12, 5), 4, 12, np.random.default_rng(semilla), escritor)
+        posiciones = np.concatenate(escritor.posiciones)
+        assert posiciones.size == np.unique(posiciones).size == 4
+        cuenta[posiciones - 1] += 1
+    assert np.allclose(cuenta / repeticiones, 1 / 3, atol=0.04)
+
+
+def test_mas_secuencial_memoria_del_orden_del_bloque():
+    # n ≥ N/50: un sorteo sobre todo el marco ocuparía 8·N bytes (80 MB)
+    N, n, tam_bloque = 10_000_000, 1_000_000, 50_000
+    escritor = _Contador()
+    bloques = _bloques(N, tam_bloque)
+    tracemalloc.start()
+    try:
+        seleccion._seleccion_secuencial(bloques, n, N, np.random.default_rng(1), escritor)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    posiciones = np.concatenate(escritor.posiciones)
+    assert posiciones.size == n and np.all(np.diff(posiciones) > 0)
+    # Solo crecen las posiciones elegidas (8·n bytes) y el bloque en curso
+    assert pico < 8 * n + 40 * tam_bloque + 4 * 1024 * 1024
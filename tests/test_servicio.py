@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from muestreo.servicio import AgrupadorLotes
+
+
+def ejecutar(corrutina):
+    async def con_agrupador():
+        agrupador = AgrupadorLotes(ventana=0.005)
+        await agrupador.iniciar()
+        try:
+            return await corrutina(agrupador)
+        finally:
+            await agrupador.detener()
+    return asyncio.run(con_agrupador())
+
+
+def test_solicitudes_identicas_comparten_calculo_y_cache():
+    async def prueba(agrupador):
+        resultados = await asyncio.gather(*(agrupador.calcular('proporcion', {'error': 0.05, 'N': 5000})
+                                            for _ in range(5)))
+        otra = await agrupador.calcular('proporcion', {'N': 5000, 'error': 0.05})
+        return resultados, otra, agrupador.estadisticas()
+
+    resultados, otra, estadisticas = ejecutar(prueba)
+    assert all(r['n'] == 357 for r in resultados) and otra['n'] == 357
+    assert estadisticas['cache']['entradas'] == 1
+    assert estadisticas['cache']['aciertos'] == 1
+
+
+def test_aleatorias_no_se_comparten_ni_se_guardan():
+    async def prueba(agrupador):
+        parametros = {'N': 1_000_000, 'n': 100}
+        resultados = await asyncio.gather(*(agrupador.calcular('sistematico', dict(parametros)) for _ in range(6)))
+        return resultados, agrupador.estadisticas()
+
+    resultados, estadisticas = ejecutar(prueba)
+    assert len({r['inicio'] for r in resultados}) > 1
+    assert estadisticas['cache'] == {'entradas': 0, 'aciertos': 0, 'fallos': 0, 'tasa_aciertos': 0.0}
+    assert estadisticas['en_curso'] == 0
+
+
+def test_sistematico_con_semilla_se_guarda():
+    async def prueba(agrupador):
+        parametros = {'N': 1_000_000, 'n': 100, 'semilla': 9}
+        primera = await agrupador.calcular('sistematico', parametros)
+        segunda = await agrupador.calcular('sistematico', parametros)
+        return primera, segunda, agrupador.estadisticas()
+
+    primera, segunda, estadisticas = ejecutar(prueba)
+    assert primera == segunda
+    assert estadisticas['cache']['aciertos'] == 1
+
+
+def test_errores_por_solicitud():
+    async def prueba(agrupador):
+        buena = agrupador.calcular('dif_medias', {'delta': -5, 'sigma': 10, 'bilateral': False})
+        mala = agrupador.calcular('dif_medias', {'delta': 5, 'sigma': 10, 'potencia': 1})
+        return await asyncio.gather(buena, mala, return_exceptions=True)
+
+    buena, mala = ejecutar(prueba)
+    assert buena['n_por_grupo'] == 51
+    assert isinstance(mala, ValueError)
+
+
+def test_calculadora_desconocida():
+    async def prueba(agrupador):
+        return await agrupador.calcular('nada', {})
+
+    with pytest.raises(ValueError):
+        ejecutar(prueba)
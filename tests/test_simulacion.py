@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from muestreo import simulacion
+
+
+def test_mas_cobertura_nominal_y_reproducible():
+    poblacion = simulacion.preparar_poblacion('mas', simulacion.poblacion_normal(5000, 50, 10, semilla=1))
+    r = simulacion.simular('mas', poblacion, {'n': 200}, replicas=4000, semilla=2, procesos=1)
+    assert r['cobertura'] == pytest.approx(0.95, abs=0.015)
+    assert abs(r['sesgo']) < 0.1
+    otra = simulacion.simular('mas', poblacion, {'n': 200}, replicas=4000, semilla=2, procesos=1)
+    assert otra['cobertura'] == r['cobertura']
+
+
+def test_dos_medias_potencia_del_n_exacto():
+    # n = 64 por grupo alcanza 80 % de potencia para d = 0.5
+    r = simulacion.simular('dos_medias', {}, {'delta': 5, 'sigma': 10, 'n': 64}, replicas=4000,
+                           semilla=3, procesos=1)
+    assert r['potencia'] == pytest.approx(0.80, abs=0.03)
+
+
+def test_estratificado_agrupa_por_estrato():
+    valores = np.array([1.0, 10, 2, 20, 3])
+    poblacion = simulacion.preparar_poblacion('estratificado', valores, ['a', 'b', 'a', 'b', 'a'])
+    assert poblacion['y'].tolist() == [1, 2, 3, 10, 20]
+    assert poblacion['limites'].tolist() == [0, 3, 5]
+    assert poblacion['estratos'].tolist() == ['a', 'b']
+
+
+def test_diseno_desconocido():
+    with pytest.raises(ValueError):
+        simulacion.preparar_poblacion('bola_de_nieve', [1.0])
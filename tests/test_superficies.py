@@ -0,0 +1,33 @@
+import numpy as np
+
+from muestreo import motor, superficies
+
+
+def test_dif_medias_normal_igual_al_motor_con_minimo_de_la_pagina():
+    deltas, potencias = superficies.eje(0.1, 30, 40), superficies.eje(0.5, 0.99, 20)
+    n = superficies.superficie_dif_medias(deltas, potencias, 10, 0.05, True, 'normal')
+    esperado = np.maximum(motor.n_dif_medias_z(deltas[None, :], 10, 0.05, potencias[:, None], True), 3)
+    assert np.array_equal(n, esperado)
+    assert n.min() == 3
+
+
+def test_dif_medias_t_aproxima_el_exacto():
+    deltas, potencias = np.array([0.5, 1, 2, 5, 8]), np.array([0.5, 0.8, 0.95])
+    for alpha in (0.01, 0.05, 0.10):
+        n = superficies.superficie_dif_medias(deltas, potencias, 10, alpha, True, 't')
+        exacto = np.maximum(motor.n_dif_medias_t(deltas[None, :], 10, alpha, potencias[:, None], True), 3)
+        assert np.all(np.abs(n - exacto) <= np.maximum(5, 0.01 * exacto))
+
+
+def test_media_igual_al_motor():
+    errores, confianzas = np.array([0.5, 1, 2]), np.array([0.9, 0.95, 0.99])
+    n = superficies.superficie_media(errores, confianzas, 20, 2000)
+    assert np.array_equal(n, motor.n_media(20, errores[None, :], confianzas[:, None], 2000))
+
+
+def test_proporcion_p_igual_a_la_curva():
+    ps, errores = superficies.eje(0.01, 0.99, 25), np.array([0.03, 0.05])
+    n = superficies.superficie_proporcion_p(ps, errores, 0.95, 5000)
+    z = motor.z_critico(0.95)
+    for fila, error in zip(n, errores):
+        assert np.array_equal(fila, motor.curva_n_proporcion(z, error, 5000, 25)[1])
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from muestreo import motor, tablas
+
+
+@pytest.fixture(scope='module')
+def tabla(tmp_path_factory):
+    directorio = tmp_path_factory.mktemp('tablas')
+    tablas.construir(directorio)
+    return tablas.TablaProporciones(directorio)
+
+
+def test_igual_al_motor(tabla):
+    rng = np.random.default_rng(0)
+    i_c = rng.integers(0, len(tablas.CONFIANZAS), 2000)
+    i_p = rng.integers(0, len(tablas.PROPORCIONES), 2000)
+    i_e = rng.integers(0, len(tablas.ERRORES), 2000)
+    i_n = rng.integers(0, len(tablas.POBLACIONES), 2000)
+    esperado = motor.n_proporcion(tablas.PROPORCIONES[i_p], tablas.ERRORES[i_e],
+                                  np.asarray(tablas.CONFIANZAS)[i_c], tablas.POBLACIONES[i_n])
+    assert np.array_equal(tabla.n[i_c, i_p, i_e, i_n], esperado)
+
+
+def test_buscar(tabla):
+    assert tabla.buscar(0.5, 0.05, 0.95, 1000) == 278
+    assert tabla.buscar(0.5, 0.05, 0.95, 0) == tabla.buscar(0.5, 0.05, 0.95, np.inf) == 385
+    # Fuera de la rejilla
+    assert tabla.buscar(0.505, 0.05, 0.95, 1000) is None
+    assert tabla.buscar(0.5, 0.05, 0.95, 1001) is None
+    assert tabla.buscar(0.5, 0.05, 0.97, 1000) is None
+    assert tabla.buscar(0.5, 0.5, 0.95, 1000) is None
+
+
+def test_n_proporcion_usa_la_tabla_o_calcula(tabla, monkeypatch):
+    monkeypatch.setenv('MUESTREO_TABLAS', str(tabla.directorio))
+    assert tablas.tabla_proporciones() is not None
+    assert tablas.n_proporcion(0.3, 0.02, 0.99, 5000) == motor.n_proporcion(0.3, 0.02, 0.99, 5000)
+    assert tablas.n_proporcion(0.333, 0.02, 0.99, 5001) == motor.n_proporcion(0.333, 0.02, 0.99, 5001)
+    estadisticas = tablas.tabla_proporciones().estadisticas()
+    assert (estadisticas['aciertos'], estadisticas['fallos']) == (1, 1)
+
+
+def test_sin_tabla_calcula():
+    assert tablas.tabla_proporciones() is None
+    assert tablas.n_proporcion(0.5, 0.05, 0.95, 1000) == 278
+
+
+def test_huella_distinta_invalida(tabla, monkeypatch):
+    monkeypatch.setattr(tablas, 'huella_motor', lambda: 'otra')
+    with pytest.raises(ValueError):
+        tablas.TablaProporciones(tabla.directorio)
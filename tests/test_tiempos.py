@@ -0,0 +1,30 @@
+import contextvars
+
+from muestreo import tiempos
+
+
+def test_etapas_anidadas_en_orden():
+    def rerun():
+        ejecucion = tiempos.iniciar_ejecucion('prueba')
+        with tiempos.etapa('pagina.calculo'):
+            tiempos.etapa('pagina.grafico', 'grafico')(lambda: None)()
+        ejecucion.cerrar()
+        return ejecucion
+
+    ejecucion = contextvars.Context().run(rerun)
+    assert [(e['etapa'], e['nivel']) for e in ejecucion.etapas] == [('pagina.calculo', 0), ('pagina.grafico', 1)]
+    assert ejecucion.total_etapas() == ejecucion.etapas[0]['segundos'] <= ejecucion.segundos
+
+
+def test_prometheus(tmp_path):
+    registro = tiempos.RegistroTiempos()
+    registro.observar('a"b', 'calculo', 0.003)
+    registro.observar('a"b', 'calculo', 2.0)
+    texto = registro.prometheus()
+    assert 'muestreo_etapa_segundos_bucket{etapa="a\\"b",tipo="calculo",le="0.005"} 1' in texto
+    assert 'muestreo_etapa_segundos_bucket{etapa="a\\"b",tipo="calculo",le="+Inf"} 2' in texto
+    assert 'muestreo_etapa_segundos_count{etapa="a\\"b",tipo="calculo"} 2' in texto
+
+    tiempos.escribir_prometheus(tmp_path / 'metricas.prom')
+    assert (tmp_path / 'metricas.prom').read_text().startswith('# HELP')
+    assert [p.name for p in tmp_path.iterdir()] == ['metricas.prom']